@@ -0,0 +1,100 @@
+"""Shared SQLAlchemy engines for ETL jobs and tools.
+
+Engines are cached per URL, so every caller in one process that points at the same database
+reuses one connection pool instead of reconnecting.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.engine.url import make_url
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").strip().lower() in {"1", "true", "yes", "on"}
+
+# MySQL session variables set on every new connection (0 keeps the server default).
+MYSQL_SESSION_VARIABLES = {
+    "net_read_timeout": int(os.getenv("DB_NET_READ_TIMEOUT", "600")),
+    "net_write_timeout": int(os.getenv("DB_NET_WRITE_TIMEOUT", "600")),
+    "max_execution_time": int(os.getenv("DB_MAX_EXECUTION_TIME_MS", "0")),
+}
+
+_ENGINES: dict[str, Engine] = {}
+_LOCK = threading.Lock()
+
+
+def mysql_uri(
+    host: str,
+    port: int,
+    user: str,
+    password: str,
+    database: str | None = None,
+    **query: str | int,
+) -> URL:
+    """pymysql URL for the host/port/user style settings used by the tools (utf8mb4 by default)."""
+    params = {"charset": "utf8mb4", **{k: str(v) for k, v in query.items()}}
+    return URL.create(
+        "mysql+pymysql",
+        username=user,
+        password=password or None,
+        host=host,
+        port=int(port),
+        database=database or None,
+        query=params,
+    )
+
+
+def _set_session_variables(dbapi_conn, _record) -> None:
+    settings = {name: value for name, value in MYSQL_SESSION_VARIABLES.items() if value > 0}
+    cur = dbapi_conn.cursor()
+    try:
+        for name, value in settings.items():
+            try:
+                cur.execute(f"SET SESSION {name} = {int(value)}")
+            except Exception as exc:  # e.g. MariaDB has no max_execution_time
+                print(f"Skipping session variable {name}: {exc}", file=sys.stderr)
+    finally:
+        cur.close()
+
+
+def get_engine(uri: str | URL) -> Engine:
+    """Pooled engine for ``uri``; the same URL always returns the same engine."""
+    url = make_url(uri)
+    key = url.render_as_string(hide_password=False)
+    with _LOCK:
+        engine = _ENGINES.get(key)
+        if engine is not None:
+            return engine
+        if url.get_backend_name() == "sqlite":
+            engine = create_engine(url)
+        else:
+            engine = create_engine(
+                url,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_recycle=DB_POOL_RECYCLE_SECONDS,
+                pool_pre_ping=DB_POOL_PRE_PING,
+            )
+        if url.get_backend_name() == "mysql":
+            event.listen(engine, "connect", _set_session_variables)
+        _ENGINES[key] = engine
+        return engine
+
+
+def raw_connection(uri: str | URL):
+    """Pooled DBAPI connection for code written against pymysql cursors; ``close()`` returns it to the pool."""
+    return get_engine(uri).raw_connection()
+
+
+def dispose_all() -> None:
+    with _LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Backfill date-partitioned effective exposure history for a range of snapshot dates."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.jobs.traceability.backfill import main
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,20 +1,29 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
 import json
 import os
+import sys
 from decimal import Decimal
 from datetime import date, datetime
 from pathlib import Path
 
-import pymysql
-from pymysql.cursors import DictCursor
+from sqlalchemy import text
+
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.common.db import get_engine, mysql_uri
+from etl.jobs.traceability.instrumentation import RunReport
 
 DB_HOST = os.getenv("API_DB_HOST", "127.0.0.1")
 DB_PORT = int(os.getenv("API_DB_PORT", "3307"))
 DB_USER = os.getenv("API_DB_USER", "root")
 DB_PASSWORD = os.getenv("API_DB_PASSWORD", "")
 DB_NAME = os.getenv("API_DB_NAME", "funds_api")
+# Full SQLAlchemy URI of the API database (e.g. a SQLite file); overrides the API_DB_* parts above.
+API_DB_URI = os.getenv("API_DB_URI") or mysql_uri(DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME)
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 OUT_PATH = Path(os.getenv("OUT_PATH", str(PROJECT_ROOT / "examples" / "dashboard" / "data" / "dashboard_data.json")))
 
@@ -31,50 +40,51 @@ def norm_row(row: dict) -> dict:
     return out
 
 
-def fetch_all(cur, sql: str):
-    cur.execute(sql)
-    return [norm_row(r) for r in cur.fetchall()]
+def fetch_all(conn, sql: str):
+    return [norm_row(dict(r)) for r in conn.execute(text(sql)).mappings()]
 
 
-def main() -> int:
-    conn = pymysql.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        charset="utf8mb4",
-        cursorclass=DictCursor,
-    )
-
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM api_dashboard_summary LIMIT 1")
-            dashboard = norm_row(cur.fetchone() or {})
+def _export(report: RunReport) -> None:
+    with report.stage("fetch") as fetched:
+        with get_engine(API_DB_URI).connect() as conn:
+            dashboard = (fetch_all(conn, "SELECT * FROM api_dashboard_summary LIMIT 1") or [{}])[0]
 
             payload = {
                 "dashboard_summary": dashboard,
-                "dashboard_summary_thai": fetch_all(cur, "SELECT * FROM api_dashboard_summary_thai LIMIT 1")[0],
-                "dashboard_summary_global": fetch_all(cur, "SELECT * FROM api_dashboard_summary_global LIMIT 1")[0],
-                "top_thai_holdings_top10": fetch_all(cur, "SELECT * FROM api_top_thai_holdings ORDER BY rank_no"),
-                "top_thai_holdings_all": fetch_all(cur, "SELECT * FROM api_top_thai_holdings_all ORDER BY rank_no"),
-                "top_global_traceability_top10": fetch_all(cur, "SELECT * FROM api_top_global_traceability ORDER BY rank_no"),
-                "top_global_traceability_all": fetch_all(cur, "SELECT * FROM api_top_global_traceability_all ORDER BY rank_no"),
-                "sector_allocation_thai": fetch_all(cur, "SELECT * FROM api_sector_allocation_thai ORDER BY total_value_thb DESC"),
-                "sector_allocation_global": fetch_all(cur, "SELECT * FROM api_sector_allocation_global ORDER BY total_value_thb DESC"),
-                "country_allocation_thai": fetch_all(cur, "SELECT * FROM api_country_allocation_thai ORDER BY total_value_thb DESC"),
-                "country_allocation_global": fetch_all(cur, "SELECT * FROM api_country_allocation_global ORDER BY total_value_thb DESC"),
-                "search_by_fund": fetch_all(cur, "SELECT * FROM api_search_by_fund ORDER BY total_true_value_thb DESC LIMIT 500"),
-                "search_by_asset": fetch_all(cur, "SELECT * FROM api_search_by_asset ORDER BY total_true_value_thb DESC LIMIT 500"),
+                "dashboard_summary_thai": fetch_all(conn, "SELECT * FROM api_dashboard_summary_thai LIMIT 1")[0],
+                "dashboard_summary_global": fetch_all(conn, "SELECT * FROM api_dashboard_summary_global LIMIT 1")[0],
+                "top_thai_holdings_top10": fetch_all(conn, "SELECT * FROM api_top_thai_holdings ORDER BY rank_no"),
+                "top_thai_holdings_all": fetch_all(conn, "SELECT * FROM api_top_thai_holdings_all ORDER BY rank_no"),
+                "top_global_traceability_top10": fetch_all(conn, "SELECT * FROM api_top_global_traceability ORDER BY rank_no"),
+                "top_global_traceability_all": fetch_all(conn, "SELECT * FROM api_top_global_traceability_all ORDER BY rank_no"),
+                "sector_allocation_thai": fetch_all(conn, "SELECT * FROM api_sector_allocation_thai ORDER BY total_value_thb DESC"),
+                "sector_allocation_global": fetch_all(conn, "SELECT * FROM api_sector_allocation_global ORDER BY total_value_thb DESC"),
+                "country_allocation_thai": fetch_all(conn, "SELECT * FROM api_country_allocation_thai ORDER BY total_value_thb DESC"),
+                "country_allocation_global": fetch_all(conn, "SELECT * FROM api_country_allocation_global ORDER BY total_value_thb DESC"),
+                "search_by_fund": fetch_all(conn, "SELECT * FROM api_search_by_fund ORDER BY total_true_value_thb DESC LIMIT 500"),
+                "search_by_asset": fetch_all(conn, "SELECT * FROM api_search_by_asset ORDER BY total_true_value_thb DESC LIMIT 500"),
             }
-    finally:
-        conn.close()
+        # Summary sections are single rows; the rest are row lists.
+        fetched.count_out({key: len(rows) if isinstance(rows, list) else 1 for key, rows in payload.items()})
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUT_PATH.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    with report.stage("write") as stage:
+        stage.count_in(fetched.rows_out)
+        OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        OUT_PATH.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        stage.count_out({OUT_PATH.name: len(payload)})
     print(f"Wrote {OUT_PATH}")
-    return 0
 
 
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export the dashboard JSON payload from the funds API database.")
+    parser.add_argument("--profile", action="store_true", help="write a cProfile stats file per stage next to the run report")
+    args = parser.parse_args(argv)
+    report = RunReport("export_dashboard_payload", profile=args.profile)
+    try:
+        _export(report)
+    finally:
+        report.write()
+    return 0
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from etl.common.db import get_engine
+
+from .cache import read_arrow, write_arrow
+from .calculations import _prepare_nav_with_fx, build_fact_tables, normalize_bridge, prepare_items
+from .config import BACKFILL_WORKERS, FX_DB_URI, FX_TABLE, GLOBAL_DB_URI, LOAD_COMPACT_DTYPES, MART_DB_URI, THAI_DB_URI
+from .dtypes import compact_frames
+from .exposure import ExposureKernel
+from .loaders import (
+    FtColumns,
+    _with_fx_placeholder,
+    create_db_if_needed,
+    load_df,
+    resolve_ft_columns,
+    run_queries,
+    source_queries,
+)
+from .mapping import build_bridge
+from .models import Dataset
+from .schema import source_catalog
+from .securities import SECURITY_TABLE, SecurityMaster
+from .writer import _sql_dtypes
+
+HISTORY_TABLES = {
+    "fact_effective_exposure_stock": "fact_effective_exposure_stock_history",
+    "fact_effective_exposure_sector": "fact_effective_exposure_sector_history",
+    "fact_effective_exposure_region": "fact_effective_exposure_region_history",
+}
+# Frames without a snapshot history; loaded once by the parent and read from Arrow files by the workers.
+SHARED_FRAMES = ("thai_funds", "thai_isin", "ft_static", "fx_rates")
+DELETE_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class BackfillContext:
+    """Everything a worker process needs to compute and write one snapshot date (picklable)."""
+
+    thai_uri: str
+    global_uri: str
+    fx_uri: str
+    mart_uri: str
+    ft_cols: FtColumns
+    has_fx_table: bool
+    shared_dir: str
+
+
+def snapshot_dates(thai_engine: Engine, start: date, end: date) -> list[date]:
+    """Feeder snapshot dates (``funds_holding.as_of_date``) between ``start`` and ``end`` inclusive."""
+    df = load_df(
+        thai_engine,
+        """
+        SELECT DISTINCT as_of_date
+        FROM funds_holding
+        WHERE type = 'Fund' AND as_of_date BETWEEN :start AND :end
+        ORDER BY as_of_date
+        """,
+        {"start": start, "end": end},
+    )
+    return [pd.Timestamp(d).date() for d in df["as_of_date"].dropna()]
+
+
+def _shared_path(shared_dir: str, name: str) -> Path:
+    return Path(shared_dir) / f"{name}.arrow"
+
+
+def write_shared_frames(shared_dir: str, frames: dict[str, pd.DataFrame]) -> None:
+    for name, df in frames.items():
+        write_arrow(_shared_path(shared_dir, name), df)
+
+
+def read_shared_frames(shared_dir: str) -> dict[str, pd.DataFrame]:
+    return {name: read_arrow(_shared_path(shared_dir, name)) for name in SHARED_FRAMES}
+
+
+def compute_date_facts(ctx: BackfillContext, as_of: date) -> dict[str, pd.DataFrame]:
+    """Fact tables for one snapshot date, keyed by history table name with ``snapshot_date`` first."""
+    queries = source_queries(
+        get_engine(ctx.thai_uri),
+        get_engine(ctx.global_uri),
+        get_engine(ctx.fx_uri),
+        ctx.ft_cols,
+        ctx.has_fx_table,
+        as_of_date=as_of,
+    )
+    frames = run_queries([q for q in queries if q.name not in SHARED_FRAMES], parallel=False)
+    frames.update(read_shared_frames(ctx.shared_dir))
+    if LOAD_COMPACT_DTYPES:
+        frames = compact_frames(frames)
+    ds = Dataset(**frames)
+
+    bridge_ok = normalize_bridge(build_bridge(ds))
+    kernel = ExposureKernel(bridge_ok, _prepare_nav_with_fx(ds))
+    # Read-only: dates run concurrently; register_securities gave every holding of the dates an id.
+    securities = SecurityMaster(read_arrow(_shared_path(ctx.shared_dir, SECURITY_TABLE)), read_only=True)
+    facts = build_fact_tables(kernel, prepare_items(ds, kernel.masters, securities))
+    snapshot = pd.Timestamp(as_of)
+    out = {}
+    for name, df in facts.items():
+        df.insert(0, "snapshot_date", snapshot)
+        out[HISTORY_TABLES[name]] = df
+    return out
+
+
+def register_securities(ctx: BackfillContext, dates: list[date]) -> SecurityMaster:
+    """Security master with an id for every FT holding of ``dates``, saved to the mart.
+
+    The parent assigns the ids once, before the read-only workers run. One query reads the distinct
+    holdings of every FT snapshot from the one each ticker has on the first date up to the last.
+    """
+    mart_engine = get_engine(ctx.mart_uri)
+    securities = SecurityMaster.load(mart_engine)
+    holdings = load_df(
+        get_engine(ctx.global_uri),
+        """
+        WITH first_snapshot AS (
+            SELECT ticker, MAX(date_scraper) AS date_scraper
+            FROM ft_holdings
+            WHERE date_scraper < :first_end
+            GROUP BY ticker
+        )
+        SELECT h.holding_ticker, h.holding_name
+        FROM ft_holdings h
+        LEFT JOIN first_snapshot f ON f.ticker = h.ticker
+        WHERE h.allocation_type = 'top_10_holdings'
+          AND h.date_scraper < :last_end
+          AND (f.date_scraper IS NULL OR h.date_scraper >= f.date_scraper)
+        GROUP BY h.holding_ticker, h.holding_name
+        ORDER BY MIN(h.date_scraper), h.holding_ticker, h.holding_name
+        """,
+        # Exclusive upper bounds, so DATETIME scrape columns keep rows from later that day.
+        {"first_end": min(dates) + timedelta(days=1), "last_end": max(dates) + timedelta(days=1)},
+    )
+    securities.resolve_raw(holdings["holding_ticker"], holdings["holding_name"])
+    securities.write(mart_engine)
+    return securities
+
+
+def _partition(as_of: date) -> str:
+    return f"PARTITION p{as_of:%Y%m%d} VALUES IN ('{as_of:%Y-%m-%d}')"
+
+
+def _existing_partitions(conn: Connection, table: str) -> set[str] | None:
+    """Partition names of a MySQL table, or ``None`` when it is not partitioned."""
+    names = conn.execute(
+        text(
+            """
+            SELECT PARTITION_NAME FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = :table
+            """
+        ),
+        {"table": table},
+    ).scalars().all()
+    return {n for n in names if n} or None
+
+
+def prepare_history_tables(mart_engine: Engine, sample: dict[str, pd.DataFrame], dates: list[date]) -> None:
+    """Create missing history tables and empty the rows of ``dates``.
+
+    On MySQL the tables are ``LIST COLUMNS (snapshot_date)`` partitioned with one partition per
+    date: missing partitions are added and existing ones truncated up front, so workers only
+    append. Other backends (or tables created unpartitioned) delete the dates' rows instead.
+    """
+    mysql = mart_engine.dialect.name == "mysql"
+    with mart_engine.begin() as conn:
+        for table, df in sample.items():
+            if not inspect(conn).has_table(table):
+                ddl = pd.io.sql.get_schema(df, table, con=conn, dtype=_sql_dtypes(df))
+                if mysql:
+                    ddl += f"\nPARTITION BY LIST COLUMNS (snapshot_date) ({_partition(dates[0])})"
+                conn.exec_driver_sql(ddl)
+
+            partitions = _existing_partitions(conn, table) if mysql else None
+            if partitions is None:
+                stmt = text(f"DELETE FROM {table} WHERE snapshot_date IN :dates").bindparams(
+                    bindparam("dates", expanding=True)
+                )
+                for start in range(0, len(dates), DELETE_CHUNK):
+                    conn.execute(stmt, {"dates": dates[start : start + DELETE_CHUNK]})
+                continue
+            present = [d for d in dates if f"p{d:%Y%m%d}" in partitions]
+            missing = [d for d in dates if f"p{d:%Y%m%d}" not in partitions]
+            if present:
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table} TRUNCATE PARTITION {', '.join(f'p{d:%Y%m%d}' for d in present)}"
+                )
+            if missing:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD PARTITION ({', '.join(_partition(d) for d in missing)})")
+
+
+def write_history(mart_engine: Engine, facts: dict[str, pd.DataFrame]) -> int:
+    with mart_engine.begin() as conn:
+        for table, df in facts.items():
+            df.to_sql(table, conn, if_exists="append", index=False, dtype=_sql_dtypes(df))
+    return sum(len(df) for df in facts.values())
+
+
+def backfill_date(ctx: BackfillContext, as_of: date) -> tuple[date, int, float]:
+    """Worker entry point: compute and append one snapshot date; returns (date, rows, seconds)."""
+    started = time.perf_counter()
+    rows = write_history(get_engine(ctx.mart_uri), compute_date_facts(ctx, as_of))
+    return as_of, rows, time.perf_counter() - started
+
+
+def run_backfill(dates: list[date], workers: int = BACKFILL_WORKERS) -> list[date]:
+    """Write the history fact tables for every date in ``dates``; returns the dates that failed."""
+    thai_engine = get_engine(THAI_DB_URI)
+    global_engine = get_engine(GLOBAL_DB_URI)
+    fx_engine = get_engine(FX_DB_URI)
+    mart_engine = get_engine(MART_DB_URI)
+
+    catalog = source_catalog(global_engine, fx_engine)
+    ft_cols = resolve_ft_columns(
+        catalog.columns(global_engine, "ft_sector_allocation"),
+        catalog.columns(global_engine, "ft_region_allocation"),
+        catalog.columns(global_engine, "ft_avg_fund_return"),
+    )
+    has_fx_table = catalog.has_table(fx_engine, FX_TABLE)
+
+    started = time.perf_counter()
+    failed: list[date] = []
+    with tempfile.TemporaryDirectory(prefix="traceability_backfill_") as shared_dir:
+        print("Loading shared inputs...")
+        queries = source_queries(thai_engine, global_engine, fx_engine, ft_cols, has_fx_table)
+        shared = _with_fx_placeholder(run_queries([q for q in queries if q.name in SHARED_FRAMES]))
+        ctx = BackfillContext(THAI_DB_URI, GLOBAL_DB_URI, FX_DB_URI, MART_DB_URI, ft_cols, has_fx_table, shared_dir)
+        securities = register_securities(ctx, dates)
+        print(f"Security master: {len(securities.table)} securities ({securities.added} new)")
+        write_shared_frames(shared_dir, {**shared, SECURITY_TABLE: securities.table})
+
+        # The first date runs here: its frames define the history tables before workers append.
+        first = compute_date_facts(ctx, dates[0])
+        prepare_history_tables(mart_engine, first, dates)
+        print(f"- {dates[0]}: {write_history(mart_engine, first)} rows")
+
+        # Spawned workers start with fresh engines and import state instead of forked pools.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(backfill_date, ctx, d): d for d in dates[1:]}
+            for future in as_completed(futures):
+                try:
+                    as_of, rows, seconds = future.result()
+                    print(f"- {as_of}: {rows} rows in {seconds:.1f}s")
+                except Exception as exc:
+                    failed.append(futures[future])
+                    print(f"- {futures[future]}: FAILED {exc!r}")
+
+    print(f"Backfilled {len(dates) - len(failed)} of {len(dates)} dates in {time.perf_counter() - started:.1f}s")
+    return sorted(failed)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backfill date-partitioned effective exposure history.")
+    parser.add_argument("--start", type=date.fromisoformat, help="first snapshot date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="last snapshot date")
+    parser.add_argument(
+        "--dates",
+        type=lambda s: [date.fromisoformat(d.strip()) for d in s.split(",") if d.strip()],
+        help="comma-separated snapshot dates instead of the feeder snapshot dates in --start/--end",
+    )
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="worker processes")
+    args = parser.parse_args(argv)
+    if args.dates is None and args.start is None:
+        parser.error("either --start or --dates is required")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    create_db_if_needed(MART_DB_URI)
+    dates = sorted(set(args.dates)) if args.dates else snapshot_dates(get_engine(THAI_DB_URI), args.start, args.end)
+    if not dates:
+        print("No snapshot dates to backfill")
+        return 0
+    print(f"Backfilling {len(dates)} snapshot dates ({dates[0]} .. {dates[-1]}) with {args.workers} workers")
+    failed = run_backfill(dates, workers=max(1, args.workers))
+    if failed:
+        print("Failed dates:", ", ".join(str(d) for d in failed))
+        return 1
+    return 0
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy.engine import Engine
+
+from .loaders import SourceQuery, load_df
+
+SNAPSHOT_SUFFIX = ".arrow"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as exc:  # pragma: no cover - depends on environment
+        raise RuntimeError("snapshot cache needs pyarrow (pip install pyarrow) or run with --no-cache") from exc
+    return pa
+
+
+def write_arrow(path: Path, df: pd.DataFrame) -> None:
+    """Write ``df`` as an Arrow IPC file (via a temp file, so readers never see a partial one)."""
+    pa = _require_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = Path(path).with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp.replace(path)
+
+
+def read_arrow(path: Path) -> pd.DataFrame:
+    """Read an Arrow IPC file written by ``write_arrow`` back into a frame.
+
+    The Arrow read is zero-copy over a memory map, but ``to_pandas`` copies every column, so the
+    frame costs its full size in memory.
+    """
+    pa = _require_pyarrow()
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+class SnapshotCache:
+    """Arrow IPC snapshots of source frames keyed by a cheap source fingerprint.
+
+    The fingerprint is ``COUNT(*)`` plus ``MAX(change column)`` of the source table, hashed
+    together with the query text, so a frame is reused only while its table looks unchanged
+    and the query producing it is the same. Files are evicted least-recently-used first once
+    the directory grows past ``max_bytes``.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, refresh: bool = False) -> None:
+        self.pa = _require_pyarrow()
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def keys_for(self, queries: list[SourceQuery]) -> dict[str, str]:
+        """One fingerprint round trip per engine for every query that declares a source table."""
+        by_engine: dict[int, tuple[Engine, list[SourceQuery]]] = {}
+        for q in queries:
+            if q.fingerprint is not None:
+                by_engine.setdefault(id(q.engine), (q.engine, []))[1].append(q)
+
+        keys: dict[str, str] = {}
+        for engine, group in by_engine.values():
+            parts = [
+                f"SELECT '{q.name}' AS frame_name, COUNT(*) AS row_count, "
+                f"CAST(MAX({q.fingerprint[1]}) AS CHAR) AS high_water FROM {q.fingerprint[0]}"
+                for q in group
+            ]
+            fp = load_df(engine, "\nUNION ALL\n".join(parts))
+            stamps = {str(r.frame_name): (int(r.row_count), r.high_water) for r in fp.itertuples(index=False)}
+            for q in group:
+                payload = json.dumps(
+                    [q.name, " ".join(q.sql.split()), q.params, stamps.get(q.name)], default=str, sort_keys=True
+                )
+                keys[q.name] = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+        return keys
+
+    def _path(self, name: str, key: str) -> Path:
+        return self.directory / f"{name}-{key}{SNAPSHOT_SUFFIX}"
+
+    def get(self, name: str, key: str) -> pd.DataFrame | None:
+        path = self._path(name, key)
+        if self.refresh or not path.exists():
+            return None
+        df = read_arrow(path)
+        os.utime(path)
+        return df
+
+    def put(self, name: str, key: str, df: pd.DataFrame) -> None:
+        write_arrow(self._path(name, key), df)
+        self.evict()
+
+    def evict(self) -> None:
+        files = sorted(self.directory.glob(f"*{SNAPSHOT_SUFFIX}"), key=lambda f: f.stat().st_mtime)
+        total = sum(f.stat().st_size for f in files)
+        while files and total > self.max_bytes:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
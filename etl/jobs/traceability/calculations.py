@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
-from .config import FX_BASE_CCY, TOP_N
+from .config import FX_ASOF_MAX_DAYS, FX_BASE_CCY, LOOKTHROUGH_MAX_DEPTH, LOOKTHROUGH_MIN_WEIGHT_PCT, TOP_N
+from .exposure import ExposureKernel, dedup_item_weights
+from .fx import FxRateBook
+from .lookthrough import LookThrough, expand_fund_holdings
 from .models import Dataset
-from .utils import is_country_label, to_float
+from .securities import SecurityMaster
+from .utils import clean_upper, is_country_label, to_float
 
 
 def _weighted_avg(group: pd.DataFrame, col: str) -> float | None:
@@ -14,64 +19,105 @@ def _weighted_avg(group: pd.DataFrame, col: str) -> float | None:
     return float((g[col] * g["aum"]).sum() / g["aum"].sum())
 
 
+RETURN_PERIODS = ("1y", "3y")
+
+
+def _return_sums(keys: pd.DataFrame, by: list[str], weight: pd.Series, returns: pd.DataFrame) -> pd.DataFrame:
+    """Per ``by`` group: total weight and, per period, weight and weight x return over rows with a return."""
+    sums = keys[by].copy()
+    sums["total_weight"] = weight.to_numpy()
+    for period in RETURN_PERIODS:
+        r = returns[f"avg_fund_return_{period}"].to_numpy(dtype=float)
+        has = ~np.isnan(r) & (sums["total_weight"].to_numpy() != 0)
+        sums[f"weight_{period}"] = np.where(has, sums["total_weight"], 0.0)
+        sums[f"weighted_{period}"] = np.where(has, sums["total_weight"] * np.nan_to_num(r), 0.0)
+    return sums.groupby(by, as_index=False, observed=True, dropna=False).sum()
+
+
+def _return_metrics(sums: pd.DataFrame) -> pd.DataFrame:
+    out = sums.drop(columns=[c for c in sums if c.startswith(("weight_", "weighted_"))])
+    total = sums["total_weight"].where(sums["total_weight"] != 0)
+    for period in RETURN_PERIODS:
+        covered = sums[f"weight_{period}"].where(sums[f"weight_{period}"] != 0)
+        out[f"lookthrough_return_{period}"] = sums[f"weighted_{period}"] / covered
+        out[f"return_{period}_coverage_pct"] = (sums[f"weight_{period}"] / total * 100.0).fillna(0.0)
+    return out
+
+
+def build_fund_returns(funds: pd.DataFrame, bridge_ok: pd.DataFrame, nav: pd.DataFrame, ret: pd.DataFrame) -> pd.DataFrame:
+    """Look-through 1y/3y returns per fund, and AUM-weighted per AMC and per fund category.
+
+    A fund's return is the ``feeder_weight_pct_norm``-weighted mean of its masters' returns over the
+    masters that have one; coverage is the share of mapped weight with a return. AMC / category rows
+    weight fund returns by THB AUM and report the share of AUM with a return as coverage.
+    """
+    rows = bridge_ok[["fund_code", "ft_ticker", "ticker", "feeder_weight_pct_norm"]].merge(
+        ret, on=["ft_ticker", "ticker"], how="left"
+    )
+    per_fund = _return_metrics(_return_sums(rows, ["fund_code"], rows["feeder_weight_pct_norm"], rows))
+    per_fund = per_fund.rename(columns={"total_weight": "mapped_weight_pct"})
+
+    labels = funds.drop_duplicates(["fund_code"], keep="first").reindex(columns=["fund_code", "amc", "category"])
+    per_fund = per_fund.merge(labels, on="fund_code", how="left").merge(
+        nav[["fund_code", "aum"]].drop_duplicates(["fund_code"], keep="first"), on="fund_code", how="left"
+    )
+    per_fund["aum"] = to_float(per_fund["aum"]).where(lambda a: a > 0)
+    per_fund["fund_count"] = 1
+
+    levels = [per_fund.assign(group_level="fund", group_key=per_fund["fund_code"].astype(object))]
+    fund_returns = per_fund.rename(columns={f"lookthrough_return_{p}": f"avg_fund_return_{p}" for p in RETURN_PERIODS})
+    for level in ("amc", "category"):
+        sums = _return_sums(fund_returns, [level], fund_returns["aum"].fillna(0.0), fund_returns)
+        counts = fund_returns.groupby(level, as_index=False, observed=True, dropna=False)["fund_count"].sum()
+        grouped = _return_metrics(sums).rename(columns={"total_weight": "aum"}).merge(counts, on=level, how="left")
+        levels.append(grouped.assign(group_level=level, group_key=grouped[level].astype(object)))
+
+    columns = [
+        "group_level",
+        "group_key",
+        "fund_code",
+        "amc",
+        "category",
+        "fund_count",
+        "aum",
+        "mapped_weight_pct",
+        *[f"lookthrough_return_{p}" for p in RETURN_PERIODS],
+        *[f"return_{p}_coverage_pct" for p in RETURN_PERIODS],
+    ]
+    return pd.concat([df.reindex(columns=columns) for df in levels], ignore_index=True)
+
+
 def _prepare_nav_with_fx(ds: Dataset) -> pd.DataFrame:
     nav = ds.thai_nav_aum.copy()
     nav["aum_native"] = to_float(nav["aum"]).fillna(0.0)
-    nav["nav_as_of_date"] = pd.to_datetime(nav["nav_as_of_date"], errors="coerce").dt.date
+    nav["nav_as_of_date"] = pd.to_datetime(nav["nav_as_of_date"], errors="coerce")
 
     fund_ccy = ds.thai_funds[["fund_code", "currency"]].drop_duplicates("fund_code").copy()
-    fund_ccy["fund_currency"] = fund_ccy["currency"].fillna(FX_BASE_CCY).astype(str).str.strip().str.upper()
+    fund_ccy["fund_currency"] = clean_upper(fund_ccy["currency"], FX_BASE_CCY).astype(str)
     fund_ccy = fund_ccy.drop(columns=["currency"])
 
     nav = nav.merge(fund_ccy, on="fund_code", how="left")
     nav["fund_currency"] = nav["fund_currency"].fillna(FX_BASE_CCY)
 
-    fx = ds.fx_rates.copy()
-    if fx.empty:
+    if ds.fx_rates.empty:
         nav["fx_rate_to_thb"] = 1.0
         nav["fx_rate_date"] = nav["nav_as_of_date"]
         nav["fx_rate_status"] = "default_1_no_fx_table"
     else:
-        fx["date_rate"] = pd.to_datetime(fx["date_rate"], errors="coerce").dt.date
-        fx["from_ccy"] = fx["from_ccy"].fillna("").astype(str).str.strip().str.upper()
-        fx["rate_to_thb"] = to_float(fx["rate_to_thb"])
-        fx = fx[fx["date_rate"].notna() & fx["from_ccy"].ne("") & fx["rate_to_thb"].notna()].copy()
-
-        fx_exact = fx[["from_ccy", "date_rate", "rate_to_thb"]].rename(
-            columns={"date_rate": "fx_rate_date_exact", "rate_to_thb": "fx_rate_exact"}
+        # Point-in-time: the latest rate dated on or before the NAV date.
+        rate, rate_date, _ = FxRateBook.from_frame(ds.fx_rates).asof(nav["fund_currency"], nav["nav_as_of_date"], FX_ASOF_MAX_DAYS)
+        nav["fx_rate_to_thb"] = pd.Series(rate, index=nav.index).fillna(1.0)
+        rate_date = pd.Series(rate_date, index=nav.index).astype(nav["nav_as_of_date"].dtype)
+        nav["fx_rate_date"] = rate_date.fillna(nav["nav_as_of_date"])
+        nav["fx_rate_status"] = np.select(
+            [
+                nav["fund_currency"].eq(FX_BASE_CCY).to_numpy(),
+                np.isnan(rate),
+                rate_date.eq(nav["nav_as_of_date"]).to_numpy(),
+            ],
+            ["base_currency", "default_1_missing_fx", "exact"],
+            default="asof",
         )
-        nav = nav.merge(
-            fx_exact,
-            left_on=["fund_currency", "nav_as_of_date"],
-            right_on=["from_ccy", "fx_rate_date_exact"],
-            how="left",
-        )
-        nav = nav.drop(columns=["from_ccy"], errors="ignore")
-
-        fx_latest = (
-            fx.sort_values(["from_ccy", "date_rate"])
-            .groupby("from_ccy", as_index=False)
-            .tail(1)[["from_ccy", "date_rate", "rate_to_thb"]]
-            .rename(columns={"date_rate": "fx_rate_date_latest", "rate_to_thb": "fx_rate_latest"})
-        )
-        nav = nav.merge(fx_latest, left_on="fund_currency", right_on="from_ccy", how="left")
-        nav = nav.drop(columns=["from_ccy"], errors="ignore")
-
-        nav["fx_rate_to_thb"] = (
-            nav["fx_rate_exact"].where(nav["fx_rate_exact"].notna(), nav["fx_rate_latest"]).fillna(1.0)
-        )
-        nav["fx_rate_date"] = nav["fx_rate_date_exact"].where(
-            nav["fx_rate_exact"].notna(), nav["fx_rate_date_latest"]
-        )
-        nav["fx_rate_date"] = nav["fx_rate_date"].fillna(nav["nav_as_of_date"])
-        nav["fx_rate_status"] = "exact_or_latest"
-        nav.loc[nav["fund_currency"] == FX_BASE_CCY, "fx_rate_status"] = "base_currency"
-        nav.loc[
-            (nav["fund_currency"] != FX_BASE_CCY)
-            & nav["fx_rate_exact"].isna()
-            & nav["fx_rate_latest"].isna(),
-            "fx_rate_status",
-        ] = "default_1_missing_fx"
 
     nav.loc[nav["fund_currency"] == FX_BASE_CCY, "fx_rate_to_thb"] = 1.0
     nav["aum"] = (nav["aum_native"] * nav["fx_rate_to_thb"]).fillna(0.0)
@@ -90,143 +136,162 @@ def _prepare_nav_with_fx(ds: Dataset) -> pd.DataFrame:
     ]
 
 
-def build_exposure_tables(ds: Dataset, bridge: pd.DataFrame) -> dict[str, pd.DataFrame]:
+STOCK_FACT_COLUMNS = [
+    "fund_code",
+    "ft_ticker",
+    "ticker",
+    "map_method",
+    "feeder_name",
+    "feeder_weight_pct",
+    "feeder_weight_pct_norm",
+    "holding_name",
+    "holding_ticker",
+    "holding_type",
+    "portfolio_weight_pct",
+    "true_weight_pct",
+    "aum",
+    "aum_native",
+    "fund_currency",
+    "fx_rate_to_thb",
+    "fx_rate_date",
+    "fx_rate_status",
+    "true_value_thb",
+    "nav_as_of_date",
+    "date_scraper",
+    "holding_ticker_norm",
+    "holding_name_norm",
+    "holding_key",
+    "security_id",
+    "lookthrough_depth",
+]
+
+ALLOCATION_FACT_COLUMNS = [
+    "fund_code",
+    "ft_ticker",
+    "ticker",
+    "map_method",
+    "category_name",
+    "weight_pct",
+    "feeder_weight_pct",
+    "feeder_weight_pct_norm",
+    "true_weight_pct",
+    "aum",
+    "aum_native",
+    "fund_currency",
+    "fx_rate_to_thb",
+    "fx_rate_date",
+    "fx_rate_status",
+    "true_value_thb",
+    "nav_as_of_date",
+    "date_scraper",
+]
+
+# Aggregate group keys per item table, as named in the item tables. Holdings group on the integer
+# security id; rows without one (no ticker and no name) are left out like any missing key.
+HOLDING_GROUP_KEYS = ["security_id", "holding_type"]
+# Per-holding attributes carried into the holding totals from the first fact row with a value.
+HOLDING_FIRST_COLUMNS = ("holding_key", "holding_ticker_norm", "holding_name")
+SECTOR_GROUP_KEYS = ["category_name"]
+REGION_GROUP_KEYS = ["category_name", "is_country_like"]
+
+
+def normalize_bridge(bridge: pd.DataFrame) -> pd.DataFrame:
+    """Mapped bridge rows with positive weight and ``feeder_weight_pct_norm`` capped at 100 per fund."""
     bridge_ok = bridge[bridge["ft_ticker"].notna()].copy()
     bridge_ok["feeder_weight_pct"] = to_float(bridge_ok["feeder_weight_pct"]).fillna(0.0)
     bridge_ok = bridge_ok[bridge_ok["feeder_weight_pct"] > 0].copy()
 
     # Normalize mapped weight per fund to avoid over-allocation from duplicate/over-100 inputs.
-    bridge_ok["sum_weight_by_fund"] = bridge_ok.groupby("fund_code")["feeder_weight_pct"].transform("sum")
+    bridge_ok["sum_weight_by_fund"] = bridge_ok.groupby("fund_code", observed=True)["feeder_weight_pct"].transform("sum")
     bridge_ok["target_weight_by_fund"] = bridge_ok["sum_weight_by_fund"].clip(upper=100.0)
     bridge_ok["feeder_weight_pct_norm"] = (
         bridge_ok["feeder_weight_pct"] / bridge_ok["sum_weight_by_fund"].replace(0, pd.NA) * bridge_ok["target_weight_by_fund"]
     ).fillna(0.0)
-    bridge_ok = bridge_ok.drop(columns=["sum_weight_by_fund", "target_weight_by_fund"])
+    return bridge_ok.drop(columns=["sum_weight_by_fund", "target_weight_by_fund"])
 
-    ft_holdings = ds.ft_holdings.copy()
-    ft_holdings["portfolio_weight_pct"] = to_float(ft_holdings["portfolio_weight_pct"]).fillna(0.0)
-    ft_holdings = (
-        ft_holdings.groupby(["ticker", "holding_name", "holding_ticker", "holding_type", "date_scraper"], as_index=False)
-        .agg(portfolio_weight_pct=("portfolio_weight_pct", "max"))
-    )
 
-    exp_stock = bridge_ok.merge(
-        ft_holdings,
-        left_on="ticker",
-        right_on="ticker",
-        how="inner",
-        suffixes=("_bridge", "_holding"),
+# Source frame, dedup keys and weight column of each "master -> item weight" table.
+ITEM_TABLES = {
+    "stock": ("ft_holdings", ["ticker", "holding_name", "holding_ticker", "holding_type", "date_scraper"], "portfolio_weight_pct"),
+    "sector": ("ft_sector", ["ticker", "category_name", "date_scraper"], "weight_pct"),
+    "region": ("ft_region", ["ticker", "category_name", "date_scraper"], "weight_pct"),
+}
+
+
+def finish_items(
+    ds: Dataset, items: dict[str, pd.DataFrame], roots: pd.Index, securities: SecurityMaster | None = None
+) -> dict[str, pd.DataFrame]:
+    """Per-master columns of the deduplicated item tables: look-through expansion, holding keys, country flag.
+
+    Holdings get their ``security_id`` from ``securities`` (a fresh, unsaved master when omitted).
+    """
+    ft_holdings = expand_fund_holdings(
+        items["stock"], ds.ft_static, roots, LOOKTHROUGH_MAX_DEPTH, LOOKTHROUGH_MIN_WEIGHT_PCT
+    )
+    # Normalized holding keys are derived per master holding, before the look-through fan-out.
+    ft_holdings["holding_ticker_norm"] = clean_upper(ft_holdings["holding_ticker"])
+    ft_holdings["holding_name_norm"] = clean_upper(ft_holdings["holding_name"])
+    securities = securities if securities is not None else SecurityMaster()
+    security_ids = securities.resolve(
+        ft_holdings["holding_ticker_norm"], ft_holdings["holding_name_norm"], ft_holdings["holding_name"]
     )
+    ft_holdings["holding_key"] = securities.holding_keys(security_ids)
+    ft_holdings["security_id"] = security_ids
 
-    exp_stock["true_weight_pct"] = (exp_stock["feeder_weight_pct_norm"] * exp_stock["portfolio_weight_pct"]) / 100.0
+    ft_region = items["region"].copy()
+    ft_region["is_country_like"] = ft_region["category_name"].map(is_country_label).astype(bool)
+    return {"stock": ft_holdings, "sector": items["sector"], "region": ft_region}
 
-    nav = _prepare_nav_with_fx(ds)
-    nav_native = nav[
-        ["fund_code", "nav_as_of_date", "aum_native", "fund_currency"]
-    ].drop_duplicates(["fund_code"], keep="first")
-    exp_stock = exp_stock.merge(nav, on="fund_code", how="left")
-    exp_stock["aum"] = to_float(exp_stock["aum"]).fillna(0.0)
-    exp_stock["true_value_thb"] = ((exp_stock["aum"] * exp_stock["true_weight_pct"]) / 100.0).fillna(0.0)
-
-    exp_stock = exp_stock[[
-        "fund_code",
-        "ft_ticker",
-        "ticker",
-        "map_method",
-        "feeder_name",
-        "feeder_weight_pct",
-        "feeder_weight_pct_norm",
-        "holding_name",
-        "holding_ticker",
-        "holding_type",
-        "portfolio_weight_pct",
-        "true_weight_pct",
-        "aum",
-        "aum_native",
-        "fund_currency",
-        "fx_rate_to_thb",
-        "fx_rate_date",
-        "fx_rate_status",
-        "true_value_thb",
-        "nav_as_of_date",
-        "date_scraper",
-    ]]
-    exp_stock["holding_ticker_norm"] = exp_stock["holding_ticker"].fillna("").astype(str).str.strip().str.upper()
-    exp_stock["holding_name_norm"] = exp_stock["holding_name"].fillna("").astype(str).str.strip().str.upper()
-    exp_stock["holding_key"] = exp_stock["holding_ticker_norm"].where(
-        exp_stock["holding_ticker_norm"] != "",
-        exp_stock["holding_name_norm"],
+
+def prepare_items(ds: Dataset, roots: pd.Index, securities: SecurityMaster | None = None) -> dict[str, pd.DataFrame]:
+    """Deduplicated "master -> item weight" tables (``stock``, ``sector``, ``region``) for ``roots`` masters."""
+    items = {
+        name: dedup_item_weights(getattr(ds, frame), keys, weight_col)
+        for name, (frame, keys, weight_col) in ITEM_TABLES.items()
+    }
+    return finish_items(ds, items, roots, securities)
+
+
+def build_fact_tables(kernel: ExposureKernel, items: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    exp_stock = kernel.propagate(items["stock"], "portfolio_weight_pct", STOCK_FACT_COLUMNS)
+
+    exp_sector = kernel.propagate(items["sector"], "weight_pct", ALLOCATION_FACT_COLUMNS).rename(
+        columns={"category_name": "sector_name", "weight_pct": "sector_weight_pct"}
     )
 
-    # Sector exposure
-    ft_sector = ds.ft_sector.copy()
-    ft_sector["weight_pct"] = to_float(ft_sector["weight_pct"]).fillna(0.0)
-    ft_sector = ft_sector.groupby(["ticker", "category_name", "date_scraper"], as_index=False).agg(weight_pct=("weight_pct", "max"))
-    exp_sector = bridge_ok.merge(ft_sector, on="ticker", how="inner")
-    exp_sector["true_weight_pct"] = (exp_sector["feeder_weight_pct_norm"] * exp_sector["weight_pct"]) / 100.0
-    exp_sector = exp_sector.merge(nav, on="fund_code", how="left")
-    exp_sector["aum"] = to_float(exp_sector["aum"]).fillna(0.0)
-    exp_sector["true_value_thb"] = ((exp_sector["aum"] * exp_sector["true_weight_pct"]) / 100.0).fillna(0.0)
-    exp_sector = exp_sector[[
-        "fund_code",
-        "ft_ticker",
-        "ticker",
-        "map_method",
-        "category_name",
-        "weight_pct",
-        "feeder_weight_pct",
-        "feeder_weight_pct_norm",
-        "true_weight_pct",
-        "aum",
-        "aum_native",
-        "fund_currency",
-        "fx_rate_to_thb",
-        "fx_rate_date",
-        "fx_rate_status",
-        "true_value_thb",
-        "nav_as_of_date",
-        "date_scraper",
-    ]].rename(columns={"category_name": "sector_name", "weight_pct": "sector_weight_pct"})
-
-    # Country/region exposure
-    ft_region = ds.ft_region.copy()
-    ft_region["weight_pct"] = to_float(ft_region["weight_pct"]).fillna(0.0)
-    ft_region = ft_region.groupby(["ticker", "category_name", "date_scraper"], as_index=False).agg(weight_pct=("weight_pct", "max"))
-    exp_region = bridge_ok.merge(ft_region, on="ticker", how="inner")
-    exp_region["true_weight_pct"] = (exp_region["feeder_weight_pct_norm"] * exp_region["weight_pct"]) / 100.0
-    exp_region = exp_region.merge(nav, on="fund_code", how="left")
-    exp_region["aum"] = to_float(exp_region["aum"]).fillna(0.0)
-    exp_region["true_value_thb"] = ((exp_region["aum"] * exp_region["true_weight_pct"]) / 100.0).fillna(0.0)
-    exp_region["is_country_like"] = exp_region["category_name"].map(is_country_label)
-    exp_region = exp_region[[
-        "fund_code",
-        "ft_ticker",
-        "ticker",
-        "map_method",
-        "category_name",
-        "weight_pct",
-        "feeder_weight_pct",
-        "feeder_weight_pct_norm",
-        "true_weight_pct",
-        "aum",
-        "aum_native",
-        "fund_currency",
-        "fx_rate_to_thb",
-        "fx_rate_date",
-        "fx_rate_status",
-        "true_value_thb",
-        "is_country_like",
-        "nav_as_of_date",
-        "date_scraper",
-    ]].rename(columns={"category_name": "region_name", "weight_pct": "region_weight_pct"})
+    region_columns = list(ALLOCATION_FACT_COLUMNS)
+    region_columns.insert(region_columns.index("true_value_thb") + 1, "is_country_like")
+    exp_region = kernel.propagate(items["region"], "weight_pct", region_columns).rename(
+        columns={"category_name": "region_name", "weight_pct": "region_weight_pct"}
+    )
+    return {
+        "fact_effective_exposure_stock": exp_stock,
+        "fact_effective_exposure_sector": exp_sector,
+        "fact_effective_exposure_region": exp_region,
+    }
 
+
+def build_aggregate_tables(
+    ds: Dataset,
+    bridge_ok: pd.DataFrame,
+    nav: pd.DataFrame,
+    holding_totals: pd.DataFrame,
+    sector_totals: pd.DataFrame,
+    region_totals: pd.DataFrame,
+    total_value: float,
+) -> dict[str, pd.DataFrame]:
+    """Dashboard/coverage tables from per-group totals (``total_true_weight_pct`` / ``total_true_value_thb``).
+
+    The totals frames are keyed by ``HOLDING_GROUP_KEYS`` (plus ``HOLDING_FIRST_COLUMNS``), ``SECTOR_GROUP_KEYS``
+    and ``REGION_GROUP_KEYS`` in group-key order; ``total_value`` is the THB value of all stock facts.
+    """
     # Coverage
     feeder_total = ds.thai_feeder.copy()
     feeder_total["feeder_weight_pct"] = to_float(feeder_total["feeder_weight_pct"]).fillna(0.0)
-    feeder_total = feeder_total.groupby("fund_code", as_index=False)["feeder_weight_pct"].sum().rename(columns={"feeder_weight_pct": "raw_total_fund_holdings_pct"})
+    feeder_total = feeder_total.groupby("fund_code", as_index=False, observed=True)["feeder_weight_pct"].sum().rename(columns={"feeder_weight_pct": "raw_total_fund_holdings_pct"})
     feeder_total["total_fund_holdings_pct"] = feeder_total["raw_total_fund_holdings_pct"].clip(upper=100.0)
 
-    mapped_weight = bridge_ok.groupby("fund_code", as_index=False)["feeder_weight_pct_norm"].sum().rename(columns={"feeder_weight_pct_norm": "mapped_holdings_pct"})
+    mapped_weight = bridge_ok.groupby("fund_code", as_index=False, observed=True)["feeder_weight_pct_norm"].sum().rename(columns={"feeder_weight_pct_norm": "mapped_holdings_pct"})
 
     coverage = feeder_total.merge(mapped_weight, on="fund_code", how="left")
     coverage["mapped_holdings_pct"] = coverage["mapped_holdings_pct"].fillna(0.0)
@@ -246,25 +311,17 @@ def build_exposure_tables(ds: Dataset, bridge: pd.DataFrame) -> dict[str, pd.Dat
 
     avg_1y = _weighted_avg(fund_ret, "avg_fund_return_1y")
     avg_3y = _weighted_avg(fund_ret, "avg_fund_return_3y")
+    fund_returns = build_fund_returns(ds.thai_funds, bridge_ok, nav, ret)
 
     # Aggregates for dashboard
-    top_holdings = (
-        exp_stock.groupby(["holding_key", "holding_ticker_norm", "holding_type"], as_index=False)
-        .agg(
-            total_true_weight_pct=("true_weight_pct", "sum"),
-            total_true_value_thb=("true_value_thb", "sum"),
-            holding_name=("holding_name", "first"),
-        )
-        .rename(columns={"holding_ticker_norm": "holding_ticker"})
-        .sort_values(["total_true_value_thb", "total_true_weight_pct"], ascending=False)
+    top_holdings = holding_totals.rename(columns={"holding_ticker_norm": "holding_ticker"}).sort_values(
+        ["total_true_value_thb", "total_true_weight_pct"], ascending=False
     )
     top_holdings["holding_ticker"] = top_holdings["holding_ticker"].replace("", pd.NA)
     top_holdings["rank_no"] = range(1, len(top_holdings) + 1)
 
-    sector_agg = (
-        exp_sector.groupby("sector_name", as_index=False)
-        .agg(total_true_weight_pct=("true_weight_pct", "sum"), total_true_value_thb=("true_value_thb", "sum"))
-        .sort_values("total_true_value_thb", ascending=False)
+    sector_agg = sector_totals.rename(columns={"category_name": "sector_name"}).sort_values(
+        "total_true_value_thb", ascending=False
     )
     sector_total_value = pd.to_numeric(sector_agg["total_true_value_thb"], errors="coerce").fillna(0.0).sum()
     sector_agg["allocation_share_pct"] = (
@@ -273,10 +330,8 @@ def build_exposure_tables(ds: Dataset, bridge: pd.DataFrame) -> dict[str, pd.Dat
         else 0.0
     )
 
-    region_agg = (
-        exp_region.groupby(["region_name", "is_country_like"], as_index=False)
-        .agg(total_true_weight_pct=("true_weight_pct", "sum"), total_true_value_thb=("true_value_thb", "sum"))
-        .sort_values("total_true_value_thb", ascending=False)
+    region_agg = region_totals.rename(columns={"category_name": "region_name"}).sort_values(
+        "total_true_value_thb", ascending=False
     )
 
     country_agg = region_agg[region_agg["is_country_like"]].copy()
@@ -287,8 +342,6 @@ def build_exposure_tables(ds: Dataset, bridge: pd.DataFrame) -> dict[str, pd.Dat
         else 0.0
     )
 
-    total_value = float(pd.to_numeric(exp_stock["true_value_thb"], errors="coerce").fillna(0.0).sum())
-
     top_sector_row = sector_agg.head(1)
     top_country_row = country_agg.head(1)
 
@@ -313,11 +366,6 @@ def build_exposure_tables(ds: Dataset, bridge: pd.DataFrame) -> dict[str, pd.Dat
     country_topn = country_agg.head(TOP_N).copy()
 
     return {
-        "stg_nav_aum_native": nav_native,
-        "bridge_thai_master": bridge,
-        "fact_effective_exposure_stock": exp_stock,
-        "fact_effective_exposure_sector": exp_sector,
-        "fact_effective_exposure_region": exp_region,
         "agg_top_holdings": top_holdings,
         "agg_top_holdings_topn": top_holdings_topn,
         "agg_sector_exposure": sector_agg,
@@ -326,5 +374,81 @@ def build_exposure_tables(ds: Dataset, bridge: pd.DataFrame) -> dict[str, pd.Dat
         "agg_country_exposure_topn": country_topn,
         "agg_region_exposure": region_agg,
         "agg_fund_coverage": coverage,
+        "agg_fund_returns": fund_returns,
         "agg_dashboard_cards": dashboard_cards,
     }
+
+
+# Fact table per item table, and the aggregate group keys as named in the fact tables.
+FACT_TABLES = {
+    "stock": "fact_effective_exposure_stock",
+    "sector": "fact_effective_exposure_sector",
+    "region": "fact_effective_exposure_region",
+}
+FACT_GROUP_KEYS = {
+    "stock": HOLDING_GROUP_KEYS,
+    "sector": ["sector_name"],
+    "region": ["region_name", "is_country_like"],
+}
+
+
+def fund_partials(facts: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """Per fund x aggregate group totals of the fact rows (``HOLDING_FIRST_COLUMNS`` = first non-missing per fund)."""
+    partials = {}
+    for name, table in FACT_TABLES.items():
+        aggs = {
+            "total_true_weight_pct": ("true_weight_pct", "sum"),
+            "total_true_value_thb": ("true_value_thb", "sum"),
+        }
+        if name == "stock":
+            aggs.update({col: (col, "first") for col in HOLDING_FIRST_COLUMNS})
+        keys = ["fund_code", *FACT_GROUP_KEYS[name]]
+        partials[name] = facts[table].groupby(keys, as_index=False, observed=True, sort=False).agg(**aggs)
+    return partials
+
+
+def combine_partials(
+    partials: pd.DataFrame, name: str, fund_order: pd.Index, first: tuple[str, ...] = ()
+) -> pd.DataFrame:
+    """Group totals over all funds from ``fund_partials`` rows, keyed like ``build_aggregate_tables`` expects.
+
+    ``first`` columns come from the earliest fund in ``fund_order``; with the bridge sorted by fund
+    that is the same row ``LookThrough.group_totals`` picks in exposure-row order.
+    """
+    keys = FACT_GROUP_KEYS[name]
+    rank = fund_order.get_indexer(partials["fund_code"])
+    ordered = partials.iloc[np.argsort(rank, kind="stable")]
+    aggs = {
+        "total_true_weight_pct": ("total_true_weight_pct", "sum"),
+        "total_true_value_thb": ("total_true_value_thb", "sum"),
+        **{col: (col, "first") for col in first},
+    }
+    totals = ordered.groupby(keys, as_index=False, observed=True, sort=True).agg(**aggs)
+    return totals.rename(columns={"sector_name": "category_name", "region_name": "category_name"})
+
+
+def stg_nav_native(nav: pd.DataFrame) -> pd.DataFrame:
+    return nav[["fund_code", "nav_as_of_date", "aum_native", "fund_currency"]].drop_duplicates(["fund_code"], keep="first")
+
+
+def build_exposure_tables(
+    ds: Dataset, bridge: pd.DataFrame, securities: SecurityMaster | None = None
+) -> dict[str, pd.DataFrame]:
+    bridge_ok = normalize_bridge(bridge)
+    nav = _prepare_nav_with_fx(ds)
+    kernel = ExposureKernel(bridge_ok, nav)
+    items = prepare_items(ds, kernel.masters, securities)
+    facts = build_fact_tables(kernel, items)
+
+    # Aggregates come from the fund x master x item matrices rather than the fact rows.
+    lookthrough = LookThrough(kernel)
+    aggregates = build_aggregate_tables(
+        ds,
+        bridge_ok,
+        nav,
+        lookthrough.group_totals(items["stock"], "portfolio_weight_pct", HOLDING_GROUP_KEYS, first=HOLDING_FIRST_COLUMNS),
+        lookthrough.group_totals(items["sector"], "weight_pct", SECTOR_GROUP_KEYS),
+        lookthrough.group_totals(items["region"], "weight_pct", REGION_GROUP_KEYS),
+        float(pd.to_numeric(facts["fact_effective_exposure_stock"]["true_value_thb"], errors="coerce").fillna(0.0).sum()),
+    )
+    return {"stg_nav_aum_native": stg_nav_native(nav), "bridge_thai_master": bridge, **facts, **aggregates}
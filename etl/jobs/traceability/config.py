@@ -1,6 +1,12 @@
 from __future__ import annotations
 
 import os
+from pathlib import Path
+
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default).strip().lower() in {"1", "true", "yes", "on"}
+
 
 THAI_DB_URI = os.getenv("THAI_DB_URI", "mysql+pymysql://root:@127.0.0.1:3307/raw_thai_funds")
 GLOBAL_DB_URI = os.getenv("GLOBAL_DB_URI", "mysql+pymysql://root:@127.0.0.1:3306/raw_ft")
@@ -8,9 +14,84 @@ MART_DB_URI = os.getenv("MART_DB_URI", "mysql+pymysql://root:@127.0.0.1:3307/fun
 FX_DB_URI = os.getenv("FX_DB_URI", MART_DB_URI)
 FX_TABLE = os.getenv("FX_TABLE", "daily_fx_rates")
 FX_BASE_CCY = os.getenv("FX_BASE_CCY", "THB").upper()
+# NAV values use the latest FX rate on or before the NAV date; older than this many days counts as missing.
+FX_ASOF_MAX_DAYS = int(os.getenv("FX_ASOF_MAX_DAYS")) if os.getenv("FX_ASOF_MAX_DAYS", "").strip() else None
 
 TOP_N = int(os.getenv("TOP_N", "10"))
 
+# Source loading: run independent queries concurrently, one snapshot transaction per connection.
+LOAD_PARALLEL = _env_flag("LOAD_PARALLEL")
+LOAD_WORKERS_PER_ENGINE = max(1, int(os.getenv("LOAD_WORKERS_PER_ENGINE", "1")))
+
+# Result fetch path for source queries: "buffered" (pd.read_sql), "stream" (server-side cursor in chunks)
+# or "columnar" (raw cursor decoded straight into typed column arrays).
+LOAD_FETCH_MODE = os.getenv("LOAD_FETCH_MODE", "buffered").strip().lower()
+LOAD_CHUNK_ROWS = max(1, int(os.getenv("LOAD_CHUNK_ROWS", "50000")))
+
+# Convert loaded frames to the declared dtypes (categorical keys, datetime64 dates, float64 amounts).
+LOAD_COMPACT_DTYPES = _env_flag("LOAD_COMPACT_DTYPES", "1")
+
+# Feeder name matching: a feeder the ISIN joins leave unmapped takes the FT master whose name scores highest
+# (TF-IDF token cosine, 0-1) if it reaches MAP_FUZZY_MIN_SCORE; funds mapped by the Thai fund ISIN fallback are skipped.
+# Opt-in: a false match silently moves a feeder's exposure to the wrong master.
+MAP_FUZZY_NAMES = _env_flag("MAP_FUZZY_NAMES")
+MAP_FUZZY_MIN_SCORE = float(os.getenv("MAP_FUZZY_MIN_SCORE", "0.85"))
+
+# Two-phase loading: build the bridge first, then load FT detail rows only for bridged tickers.
+LOAD_TICKER_PUSHDOWN = _env_flag("LOAD_TICKER_PUSHDOWN")
+
+# Incremental loading: fetch only rows at/after the stored high-water marks and merge into mart state.
+LOAD_INCREMENTAL = _env_flag("LOAD_INCREMENTAL")
+WATERMARK_TABLE = os.getenv("WATERMARK_TABLE", "etl_source_watermarks")
+
+# Opt-in local Arrow snapshot cache of loaded frames, keyed by source fingerprints (--no-cache / --refresh).
+# The COUNT(*)/MAX(change column) fingerprint cannot see in-place updates such as upserted NAV/AUM rows.
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+SNAPSHOT_CACHE = _env_flag("SNAPSHOT_CACHE")
+SNAPSHOT_CACHE_DIR = Path(os.getenv("SNAPSHOT_CACHE_DIR", str(PROJECT_ROOT / ".cache" / "traceability_snapshots")))
+SNAPSHOT_CACHE_MAX_MB = int(os.getenv("SNAPSHOT_CACHE_MAX_MB", "2048"))
+
+# Source column-set introspection, batched per server and cached on disk; each run validates cached entries
+# with a cheap per-server schema-version probe, and entries older than the TTL are re-read (--refresh forces it).
+SCHEMA_CACHE_PATH = Path(os.getenv("SCHEMA_CACHE_PATH", str(PROJECT_ROOT / ".cache" / "schema_catalog.json")))
+SCHEMA_CACHE_TTL_SECONDS = int(os.getenv("SCHEMA_CACHE_TTL_SECONDS", "3600"))
+
+# Fund-of-funds look-through: holdings whose type is in LOOKTHROUGH_FUND_TYPES are resolved to FT masters
+# and expanded into their own holdings, up to LOOKTHROUGH_MAX_DEPTH hops (1 = master holdings only).
+# Branches below LOOKTHROUGH_MIN_WEIGHT_PCT of the root master stay as the fund holding itself.
+LOOKTHROUGH_MAX_DEPTH = max(1, int(os.getenv("LOOKTHROUGH_MAX_DEPTH", "1")))
+LOOKTHROUGH_MIN_WEIGHT_PCT = float(os.getenv("LOOKTHROUGH_MIN_WEIGHT_PCT", "0.01"))
+LOOKTHROUGH_FUND_TYPES = frozenset(
+    t.strip().upper() for t in os.getenv("LOOKTHROUGH_FUND_TYPES", "Fund,ETF").split(",") if t.strip()
+)
+
+# Rollup cube: value/weight sums over (amc, category, fund_currency, map_method) grouping sets per item table.
+# Off by default: the cube has about twice the fact rows and is rebuilt in full, also after a delta build.
+BUILD_CUBE = _env_flag("BUILD_CUBE")
+# Holdings kept per cube slice by value rank (0 = all); sector and country slices are always complete.
+CUBE_HOLDINGS_TOP_N = max(0, int(os.getenv("CUBE_HOLDINGS_TOP_N", "100")))
+
+# Sharded build: split the fact computation into this many fund_code hash shards on a process pool (1 = off).
+BUILD_SHARDS = max(1, int(os.getenv("BUILD_SHARDS", "1")))
+
+# Historical backfill: worker processes computing snapshot dates in parallel (one date per task).
+BACKFILL_WORKERS = max(1, int(os.getenv("BACKFILL_WORKERS", str(min(8, os.cpu_count() or 1)))))
+
+# Delta build: recompute facts only for funds whose input fingerprint changed since the last run (--rebuild).
+BUILD_DELTA = _env_flag("BUILD_DELTA")
+
+# Execution engine of the bridge and the full exposure build: "pandas" (reference), "duckdb" (in-process SQL)
+# or "polars" (lazy query plans; POLARS_MAX_THREADS caps its thread pool).
+BUILD_ENGINE = os.getenv("BUILD_ENGINE", "pandas").strip().lower()
+# DuckDB settings: worker threads (0 = all cores), memory limit before spilling (e.g. "8GB", "" = DuckDB default)
+# and the spill directory.
+DUCKDB_THREADS = max(0, int(os.getenv("DUCKDB_THREADS", "0")))
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "").strip()
+DUCKDB_TEMP_DIR = Path(os.getenv("DUCKDB_TEMP_DIR", str(PROJECT_ROOT / ".cache" / "duckdb")))
+
+# JSON run reports (per-stage wall/CPU time, peak RSS, row counts) and --profile stats files of each job run.
+RUN_REPORT_DIR = Path(os.getenv("RUN_REPORT_DIR", str(PROJECT_ROOT / ".cache" / "run_reports")))
+
 REGION_LIKE_VALUES = {
     "Americas",
     "North America",
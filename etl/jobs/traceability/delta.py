@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .calculations import (
+    FACT_GROUP_KEYS,
+    FACT_TABLES,
+    HOLDING_FIRST_COLUMNS,
+    STOCK_FACT_COLUMNS,
+    _prepare_nav_with_fx,
+    build_aggregate_tables,
+    build_fact_tables,
+    combine_partials,
+    fund_partials,
+    normalize_bridge,
+    prepare_items,
+    stg_nav_native,
+)
+from .config import (
+    FX_ASOF_MAX_DAYS,
+    FX_BASE_CCY,
+    LOOKTHROUGH_FUND_TYPES,
+    LOOKTHROUGH_MAX_DEPTH,
+    LOOKTHROUGH_MIN_WEIGHT_PCT,
+)
+from .exposure import ExposureKernel
+from .loaders import load_df
+from .models import Dataset
+from .securities import SecurityMaster
+from .writer import _sql_dtypes, write_tables
+
+FINGERPRINT_TABLE = "etl_delta_fund_fingerprints"
+PARTIAL_TABLES = {
+    "stock": "etl_delta_partial_holdings",
+    "sector": "etl_delta_partial_sector",
+    "region": "etl_delta_partial_region",
+}
+BRIDGE_HASH_COLUMNS = ["fund_code", "ft_ticker", "ticker", "map_method", "feeder_name", "feeder_weight_pct", "feeder_weight_pct_norm"]
+NAV_HASH_COLUMNS = ["nav_as_of_date", "aum", "aum_native", "fund_currency", "fx_rate_to_thb", "fx_rate_date", "fx_rate_status"]
+DELETE_CHUNK = 1000
+
+
+def build_settings_digest() -> str:
+    """Settings that change per-fund results; a different digest forces a full rebuild."""
+    settings = {
+        "fx_base_ccy": FX_BASE_CCY,
+        "fx_asof_max_days": FX_ASOF_MAX_DAYS,
+        "lookthrough_max_depth": LOOKTHROUGH_MAX_DEPTH,
+        "lookthrough_min_weight_pct": LOOKTHROUGH_MIN_WEIGHT_PCT,
+        "lookthrough_fund_types": sorted(LOOKTHROUGH_FUND_TYPES),
+        "stock_fact_columns": STOCK_FACT_COLUMNS,
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    # Value-based (categoricals hash their values, not codes), so hashes are stable across runs.
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def _sum_by_code(codes: np.ndarray, hashes: np.ndarray, n: int) -> np.ndarray:
+    # Order-independent multiset digest; uint64 addition wraps.
+    out = np.zeros(n, dtype=np.uint64)
+    keep = codes >= 0
+    np.add.at(out, codes[keep], hashes[keep])
+    return out
+
+
+def fund_fingerprints(bridge_ok: pd.DataFrame, nav: pd.DataFrame, items: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """One ``fingerprint`` per bridged fund over its bridge rows, its masters' item rows and its NAV/FX row."""
+    bridge_ok = bridge_ok.reset_index(drop=True)
+    master_codes, masters = pd.factorize(bridge_ok["ticker"])
+    rows = bridge_ok[BRIDGE_HASH_COLUMNS].astype({"feeder_weight_pct": float, "feeder_weight_pct_norm": float})
+    for name, table in items.items():
+        item_codes = masters.get_indexer(table["ticker"])
+        digest = _sum_by_code(item_codes, _row_hashes(table), len(masters))
+        rows[f"{name}_digest"] = np.where(master_codes >= 0, digest[np.where(master_codes >= 0, master_codes, 0)], 0)
+
+    fund_codes, funds = pd.factorize(bridge_ok["fund_code"])
+    fingerprint = _sum_by_code(fund_codes, _row_hashes(rows), len(funds))
+
+    nav_first = nav.drop_duplicates(["fund_code"], keep="first")
+    nav_pos = pd.Index(nav_first["fund_code"]).get_indexer(funds)
+    nav_hashes = _row_hashes(nav_first[NAV_HASH_COLUMNS].reset_index(drop=True))
+    fingerprint += np.where(nav_pos >= 0, nav_hashes[np.where(nav_pos >= 0, nav_pos, 0)], 0).astype(np.uint64)
+    return pd.DataFrame({"fund_code": np.asarray(funds, dtype=object), "fingerprint": [f"{v:016x}" for v in fingerprint]})
+
+
+def _read_state(mart_engine: Engine, settings: str) -> pd.DataFrame | None:
+    inspector = inspect(mart_engine)
+    needed = [FINGERPRINT_TABLE, *PARTIAL_TABLES.values(), *FACT_TABLES.values()]
+    if not all(inspector.has_table(t) for t in needed):
+        return None
+    stored = load_df(mart_engine, f"SELECT fund_code, fingerprint, settings, true_value_thb FROM {FINGERPRINT_TABLE}")
+    if stored.empty or (stored["settings"] != settings).any():
+        return None
+    return stored
+
+
+def _delete_funds(conn: Connection, table: str, fund_codes: list[str]) -> None:
+    stmt = text(f"DELETE FROM {table} WHERE fund_code IN :codes").bindparams(bindparam("codes", expanding=True))
+    for start in range(0, len(fund_codes), DELETE_CHUNK):
+        conn.execute(stmt, {"codes": fund_codes[start : start + DELETE_CHUNK]})
+
+
+def _append(conn: Connection, table: str, df: pd.DataFrame) -> None:
+    if not df.empty:
+        df.to_sql(table, conn, if_exists="append", index=False, dtype=_sql_dtypes(df))
+
+
+def build_delta(
+    ds: Dataset,
+    bridge: pd.DataFrame,
+    mart_engine: Engine,
+    rebuild: bool = False,
+    securities: SecurityMaster | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Recompute facts only for funds whose input fingerprint changed and write them to the mart.
+
+    Fact rows of changed or removed funds are replaced in place; per-fund partial aggregates are
+    stored next to them, and every ``agg_*`` table is rebuilt from the partials. Without usable
+    state (first run, different settings, ``rebuild``) every fund is computed and written.
+    Returns the mart tables of this run; fact tables only hold the recomputed funds.
+    """
+    bridge_ok = normalize_bridge(bridge)
+    nav = _prepare_nav_with_fx(ds)
+    items = prepare_items(ds, ExposureKernel(bridge_ok, nav).masters, securities)
+    settings = build_settings_digest()
+    current = fund_fingerprints(bridge_ok, nav, items)
+
+    stored = None if rebuild else _read_state(mart_engine, settings)
+    if stored is None:
+        changed = set(current["fund_code"])
+        removed: set[str] = set()
+        print(f"Delta build: no usable state, computing all {len(changed)} funds")
+    else:
+        previous = dict(zip(stored["fund_code"].astype(str), stored["fingerprint"]))
+        changed = {f for f, fp in zip(current["fund_code"].astype(str), current["fingerprint"]) if previous.get(f) != fp}
+        removed = set(previous) - set(current["fund_code"].astype(str))
+        print(f"Delta build: {len(changed)} of {len(current)} funds changed, {len(removed)} removed")
+
+    fund_codes = bridge_ok["fund_code"].astype(str)
+    kernel = ExposureKernel(bridge_ok[fund_codes.isin(changed).to_numpy()], nav)
+    facts = build_fact_tables(kernel, items)
+    # Plain labels, so fresh partials concatenate cleanly with the ones read back from the mart.
+    partials = {
+        name: df.astype({k: object for k in ["fund_code", *FACT_GROUP_KEYS[name]] if k not in ("is_country_like", "security_id")})
+        for name, df in fund_partials(facts).items()
+    }
+
+    fund_values = facts[FACT_TABLES["stock"]].groupby("fund_code", observed=True)["true_value_thb"].sum()
+    current["fund_code"] = current["fund_code"].astype(str)
+    current["settings"] = settings
+    current["true_value_thb"] = current["fund_code"].map(fund_values.rename(index=str)).astype(float).fillna(0.0)
+    if stored is not None:
+        unchanged = stored.set_index(stored["fund_code"].astype(str))["true_value_thb"]
+        keep = ~current["fund_code"].isin(changed)
+        current.loc[keep, "true_value_thb"] = current.loc[keep, "fund_code"].map(unchanged).to_numpy()
+
+    # Partials of all funds: stored rows of unchanged funds plus the fresh ones.
+    replaced = sorted(changed | removed)
+    combined = {}
+    for name, table in PARTIAL_TABLES.items():
+        if stored is None:
+            combined[name] = partials[name]
+        else:
+            kept = load_df(mart_engine, f"SELECT * FROM {table}")
+            kept = kept[~kept["fund_code"].astype(str).isin(replaced)]
+            if "is_country_like" in kept:
+                kept["is_country_like"] = kept["is_country_like"].astype(bool)
+            if "security_id" in kept:
+                kept["security_id"] = kept["security_id"].astype("Int64")
+            combined[name] = pd.concat([kept, partials[name]], ignore_index=True)
+
+    fund_order = pd.Index(pd.unique(fund_codes))
+    aggregates = build_aggregate_tables(
+        ds,
+        bridge_ok,
+        nav,
+        combine_partials(combined["stock"], "stock", fund_order, first=HOLDING_FIRST_COLUMNS),
+        combine_partials(combined["sector"], "sector", fund_order),
+        combine_partials(combined["region"], "region", fund_order),
+        float(current["true_value_thb"].sum()),
+    )
+    tables = {"stg_nav_aum_native": stg_nav_native(nav), "bridge_thai_master": bridge, **facts, **aggregates}
+
+    print("Writing materialized tables...")
+    if stored is None:
+        write_tables(mart_engine, tables)
+        write_tables(mart_engine, {PARTIAL_TABLES[name]: partials[name] for name in PARTIAL_TABLES})
+    else:
+        with mart_engine.begin() as conn:
+            for name in FACT_TABLES:
+                for table, rows in ((FACT_TABLES[name], facts[FACT_TABLES[name]]), (PARTIAL_TABLES[name], partials[name])):
+                    _delete_funds(conn, table, replaced)
+                    _append(conn, table, rows)
+        write_tables(mart_engine, {k: v for k, v in tables.items() if k not in FACT_TABLES.values()})
+    write_tables(mart_engine, {FINGERPRINT_TABLE: current})
+    return tables
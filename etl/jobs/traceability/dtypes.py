@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import pandas as pd
+
+# Key columns shared between frames. Each domain gets one CategoricalDtype built from the union of
+# its values, so merges on these keys compare integer codes instead of strings.
+KEY_DOMAINS: dict[str, tuple[tuple[str, str], ...]] = {
+    "fund_code": (
+        ("thai_funds", "fund_code"),
+        ("thai_isin", "fund_code"),
+        ("thai_nav_aum", "fund_code"),
+        ("thai_feeder", "fund_code"),
+    ),
+    "ft_ticker": (
+        ("ft_static", "ft_ticker"),
+        ("ft_return", "ft_ticker"),
+    ),
+    "ticker": (
+        ("ft_static", "ticker"),
+        ("ft_holdings", "ticker"),
+        ("ft_sector", "ticker"),
+        ("ft_region", "ticker"),
+        ("ft_return", "ticker"),
+    ),
+}
+
+# Remaining columns per Dataset frame: "category" for repeated labels, "date" for datetime64,
+# "float" for weights, amounts and rates (DECIMAL arrives as Python Decimal objects).
+# Free-text columns (names, ISINs, URLs) are left as loaded.
+FRAME_DTYPES: dict[str, dict[str, str]] = {
+    "thai_funds": {"amc": "category", "category": "category", "currency": "category", "country": "category"},
+    "thai_nav_aum": {"nav_as_of_date": "date", "aum": "float"},
+    "thai_feeder": {"feeder_weight_pct": "float", "as_of_date": "date"},
+    "ft_static": {"ticker_type": "category", "date_scraper": "date", "assets_aum_full_value": "float"},
+    "ft_holdings": {
+        "holding_name": "category",
+        "holding_ticker": "category",
+        "holding_type": "category",
+        "portfolio_weight_pct": "float",
+        "date_scraper": "date",
+    },
+    "ft_sector": {"category_name": "category", "weight_pct": "float", "date_scraper": "date"},
+    "ft_region": {"category_name": "category", "weight_pct": "float", "date_scraper": "date"},
+    "ft_return": {"avg_fund_return_1y": "float", "avg_fund_return_3y": "float", "date_scraper": "date"},
+    "fx_rates": {
+        "date_rate": "date",
+        "from_ccy": "category",
+        "to_ccy": "category",
+        "rate_to_thb": "float",
+        "source_system": "category",
+    },
+}
+
+
+def _key_dtype(frames: dict[str, pd.DataFrame], members: tuple[tuple[str, str], ...]) -> pd.CategoricalDtype:
+    values = [frames[name][col].dropna() for name, col in members if name in frames and col in frames[name]]
+    if not values:
+        return pd.CategoricalDtype([])
+    categories = pd.Index(pd.concat(values, ignore_index=True).unique()).sort_values()
+    return pd.CategoricalDtype(categories)
+
+
+def _convert(series: pd.Series, kind: str) -> pd.Series:
+    if kind == "date":
+        return pd.to_datetime(series, errors="coerce")
+    if kind == "float":
+        return pd.to_numeric(series, errors="coerce").astype("float64")
+    if kind == "category":
+        return series.astype("category")
+    raise ValueError(f"unknown dtype kind: {kind}")
+
+
+def align_key_dtypes(df: pd.DataFrame, frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Cast the ``KEY_DOMAINS`` columns of ``df`` to the key dtypes already applied to ``frames``."""
+    out = df.copy(deep=False)
+    for key, members in KEY_DOMAINS.items():
+        dtypes = [frames[name][col].dtype for name, col in members if name in frames and col in frames[name]]
+        if key in out and dtypes:
+            out[key] = out[key].astype(dtypes[0])
+    return out
+
+
+def frames_memory_bytes(frames: dict[str, pd.DataFrame]) -> int:
+    return int(sum(df.memory_usage(index=True, deep=True).sum() for df in frames.values()))
+
+
+def compact_frames(frames: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """Apply ``KEY_DOMAINS`` and ``FRAME_DTYPES`` to the loaded frames (missing columns are skipped)."""
+    before = frames_memory_bytes(frames)
+    out = {name: df.copy(deep=False) for name, df in frames.items()}
+
+    for members in KEY_DOMAINS.values():
+        dtype = _key_dtype(out, members)
+        for name, col in members:
+            if name in out and col in out[name]:
+                out[name][col] = out[name][col].astype(dtype)
+
+    for name, columns in FRAME_DTYPES.items():
+        df = out.get(name)
+        if df is None:
+            continue
+        for col, kind in columns.items():
+            if col in df:
+                df[col] = _convert(df[col], kind)
+
+    after = frames_memory_bytes(out)
+    mb = 1024 * 1024
+    print(f"Compacted dataset dtypes: {before / mb:.1f} MB -> {after / mb:.1f} MB")
+    return out
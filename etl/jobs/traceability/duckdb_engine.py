@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .calculations import (
+    ALLOCATION_FACT_COLUMNS,
+    FACT_GROUP_KEYS,
+    FACT_TABLES,
+    HOLDING_FIRST_COLUMNS,
+    ITEM_TABLES,
+    STOCK_FACT_COLUMNS,
+    _prepare_nav_with_fx,
+    build_aggregate_tables,
+    finish_items,
+    stg_nav_native,
+)
+from .config import DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIR, DUCKDB_THREADS, MAP_FUZZY_NAMES
+from .mapping import BRIDGE_COLUMNS, match_feeder_names
+from .models import Dataset
+from .securities import SecurityMaster
+
+# Python's str.strip(): leading/trailing whitespace including Unicode separators.
+_SETUP_SQL = r"""
+CREATE OR REPLACE TEMP MACRO py_strip(s) AS regexp_replace(s, '^[\s\p{Z}]+|[\s\p{Z}]+$', '', 'g');
+CREATE OR REPLACE TEMP MACRO to_float(x) AS TRY_CAST(x AS DOUBLE);
+"""
+
+# ``mapping.build_bridge`` in SQL. ``_row`` / ``_srow`` / ``_irow`` are the source row positions, so
+# ties resolve in the same order as the pandas merges, stable sorts and drop_duplicates(keep="first").
+_BRIDGE_SQL = r"""
+WITH static_norm AS (
+    SELECT ft_ticker, ticker, upper(py_strip(coalesce(isin_number::VARCHAR, ''))) AS isin_number,
+           name, ticker_type, assets_aum_full_value, _srow
+    FROM ft_static
+), feeder_tokens AS (
+    SELECT *, NULLIF(upper(py_strip(regexp_extract(py_strip(feeder_name::VARCHAR), '\(([^()]*)\)\s*$', 1))), '') AS token
+    FROM thai_feeder
+), feeder AS (
+    SELECT *, CASE WHEN regexp_full_match(replace(token, ' ', ''), '[A-Z0-9]{{12}}') THEN replace(token, ' ', '') END AS token_isin
+    FROM feeder_tokens
+), by_isin AS (
+    SELECT f.fund_code::VARCHAR AS fund_code, f.feeder_name::VARCHAR AS feeder_name,
+           coalesce(to_float(f.feeder_weight_pct), 0.0) AS feeder_weight_pct, f.as_of_date, f.token, f.token_isin,
+           s.ft_ticker::VARCHAR AS ft_ticker, s.ticker::VARCHAR AS ticker, s.name::VARCHAR AS name,
+           s.ticker_type::VARCHAR AS ticker_type, 'feeder_holding_isin' AS map_method,
+           1 AS priority, 0 AS part, f._row AS row_a, s._srow AS row_b
+    FROM feeder f
+    LEFT JOIN static_norm s ON s.isin_number = f.token_isin
+), by_fund_isin AS (
+    SELECT i.fund_code::VARCHAR AS fund_code, s.name::VARCHAR AS feeder_name, 100.0 AS feeder_weight_pct,
+           NULL::TIMESTAMP AS as_of_date, NULL::VARCHAR AS token, i.isin_code::VARCHAR AS token_isin,
+           s.ft_ticker::VARCHAR AS ft_ticker, s.ticker::VARCHAR AS ticker, s.name::VARCHAR AS name,
+           s.ticker_type::VARCHAR AS ticker_type, 'thai_fund_isin_fallback' AS map_method,
+           2 AS priority, 1 AS part, i._irow AS row_a, s._srow AS row_b
+    FROM thai_isin i
+    JOIN static_norm s ON s.isin_number = i.isin_code::VARCHAR
+    WHERE NOT EXISTS (
+        SELECT 1 FROM by_isin m WHERE m.ft_ticker IS NOT NULL AND m.fund_code = i.fund_code::VARCHAR
+    )
+    QUALIFY row_number() OVER (
+        PARTITION BY i.fund_code::VARCHAR
+        ORDER BY CASE s.ticker_type::VARCHAR WHEN 'Fund' THEN 1 WHEN 'ETF' THEN 2 ELSE 9 END,
+                 coalesce(to_float(s.assets_aum_full_value), 0.0) DESC, i._irow, s._srow
+    ) = 1
+), unmapped AS (
+    -- Feeders still unmapped outside the funds the Thai fund ISIN fallback maps; feeder_fuzzy holds their name matches.
+    SELECT b.row_a AS _row, b.feeder_name
+    FROM by_isin b
+    WHERE b.ft_ticker IS NULL
+      AND NOT EXISTS (SELECT 1 FROM by_fund_isin m WHERE m.fund_code IS NOT DISTINCT FROM b.fund_code)
+), by_feeder AS (
+    SELECT b.fund_code, b.feeder_name, b.feeder_weight_pct, b.as_of_date, b.token, b.token_isin,
+           CASE WHEN z._row IS NULL THEN b.ft_ticker ELSE s.ft_ticker::VARCHAR END AS ft_ticker,
+           CASE WHEN z._row IS NULL THEN b.ticker ELSE s.ticker::VARCHAR END AS ticker,
+           CASE WHEN z._row IS NULL THEN b.name ELSE s.name::VARCHAR END AS name,
+           CASE WHEN z._row IS NULL THEN b.ticker_type ELSE s.ticker_type::VARCHAR END AS ticker_type,
+           CASE WHEN z._row IS NULL THEN b.map_method ELSE 'feeder_name_fuzzy' END AS map_method,
+           CASE WHEN z._row IS NULL THEN b.priority ELSE 3 END AS priority,
+           b.part, b.row_a, CASE WHEN z._row IS NULL THEN b.row_b ELSE s._srow END AS row_b
+    FROM by_isin b
+    LEFT JOIN feeder_fuzzy z ON z._row = b.row_a
+    LEFT JOIN static_norm s ON s._srow = z._srow
+), candidates AS (
+    SELECT * FROM by_feeder
+    UNION ALL
+    SELECT * FROM by_fund_isin
+)
+{select}
+"""
+_BRIDGE_SELECT = """
+SELECT {columns}
+FROM candidates
+-- Prefer feeder_holding_isin over thai_fund_isin (and name matches) when both map to same fund/master pair.
+QUALIFY row_number() OVER (PARTITION BY fund_code, ft_ticker ORDER BY priority, part, row_a, row_b) = 1
+ORDER BY fund_code NULLS LAST, ft_ticker NULLS LAST, priority, part, row_a, row_b
+"""
+_UNMAPPED_SELECT = "SELECT _row, feeder_name FROM unmapped ORDER BY _row"
+
+# ``calculations.normalize_bridge`` in SQL.
+_BRIDGE_OK_SQL = """
+CREATE OR REPLACE TEMP TABLE bridge_ok AS
+WITH positive AS (
+    SELECT * REPLACE (coalesce(to_float(feeder_weight_pct), 0.0) AS feeder_weight_pct)
+    FROM bridge
+    WHERE ft_ticker IS NOT NULL AND coalesce(to_float(feeder_weight_pct), 0.0) > 0
+), fund_sums AS (
+    SELECT *, CASE WHEN fund_code IS NOT NULL THEN fsum(feeder_weight_pct) OVER (PARTITION BY fund_code) END AS fund_weight
+    FROM positive
+)
+SELECT * EXCLUDE (fund_weight),
+       coalesce(feeder_weight_pct / NULLIF(fund_weight, 0) * least(fund_weight, 100.0), 0.0) AS feeder_weight_pct_norm
+FROM fund_sums
+"""
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError as exc:  # pragma: no cover - depends on environment
+        raise RuntimeError("BUILD_ENGINE=duckdb needs duckdb (pip install duckdb)") from exc
+    return duckdb
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect():
+    """In-memory DuckDB connection with the ``DUCKDB_*`` settings; results are ordered explicitly."""
+    duckdb = _require_duckdb()
+    con = duckdb.connect(":memory:")
+    DUCKDB_TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    con.execute(f"SET temp_directory = '{DUCKDB_TEMP_DIR.as_posix()}'")
+    con.execute("SET preserve_insertion_order = false")
+    if DUCKDB_THREADS:
+        con.execute(f"SET threads = {DUCKDB_THREADS}")
+    if DUCKDB_MEMORY_LIMIT:
+        con.execute(f"SET memory_limit = '{DUCKDB_MEMORY_LIMIT}'")
+    con.execute(_SETUP_SQL)
+    return con
+
+
+def _register(con, name: str, df: pd.DataFrame, row_col: str) -> None:
+    # Replacement scan over the pandas columns (no copy); the row position drives every tie-break.
+    con.register(name, df.assign(**{row_col: np.arange(len(df), dtype=np.int64)}))
+
+
+def build_bridge_duckdb(ds: Dataset, con=None) -> pd.DataFrame:
+    """``mapping.build_bridge`` run as one DuckDB query; same rows in the same order."""
+    con = con or connect()
+    _register(con, "thai_feeder", ds.thai_feeder, "_row")
+    _register(con, "ft_static", ds.ft_static, "_srow")
+    _register(con, "thai_isin", ds.thai_isin, "_irow")
+    fuzzy = pd.DataFrame({"_row": np.array([], dtype=np.int64), "_srow": np.array([], dtype=np.int64)})
+    con.register("feeder_fuzzy", fuzzy)
+    if MAP_FUZZY_NAMES:
+        unmapped = con.execute(_BRIDGE_SQL.format(select=_UNMAPPED_SELECT)).df()
+        if len(unmapped):
+            pos = match_feeder_names(unmapped["feeder_name"], ds.ft_static)
+            fuzzy = pd.DataFrame({"_row": unmapped["_row"].to_numpy()[pos >= 0], "_srow": pos[pos >= 0]})
+            con.register("feeder_fuzzy", fuzzy)
+    columns = ", ".join(_quote(c) for c in BRIDGE_COLUMNS)
+    bridge = con.execute(_BRIDGE_SQL.format(select=_BRIDGE_SELECT.format(columns=columns))).df()
+    bridge["as_of_date"] = pd.to_datetime(bridge["as_of_date"])
+    return bridge
+
+
+def _dedup_sql(frame: str, keys: list[str], weight_col: str) -> str:
+    """``exposure.dedup_item_weights`` in SQL: rows with a missing key are dropped, groups in key order."""
+    cols = ", ".join(_quote(k) for k in keys)
+    not_null = " AND ".join(f"{_quote(k)} IS NOT NULL" for k in keys)
+    return f"""
+        SELECT {cols}, max(coalesce(to_float({_quote(weight_col)}), 0.0)) AS {_quote(weight_col)}
+        FROM {frame}
+        WHERE {not_null}
+        GROUP BY {cols}
+        ORDER BY {cols}
+    """
+
+
+def _fact_sql(table: str, items: str, weight_col: str, columns: list[str], sources: dict[str, list[str]]) -> str:
+    """``ExposureKernel.propagate`` in SQL, materialized as ``table`` with the fact row position ``_frow``.
+
+    Columns resolve like the kernel: computed, then bridge, then item, then NAV columns.
+    """
+    true_weight = f"(b.feeder_weight_pct_norm * i.{_quote(weight_col)} / 100.0)"
+    computed = {
+        "true_weight_pct": true_weight,
+        "aum": "coalesce(n.aum, 0.0)",
+        "true_value_thb": f"coalesce(coalesce(n.aum, 0.0) * {true_weight} / 100.0, 0.0)",
+    }
+    exprs = []
+    for col in columns:
+        if col in computed:
+            expr = computed[col]
+        else:
+            alias = next((a for a in ("b", "i", "n") if col in sources[a]), None)
+            if alias is None:
+                raise KeyError(f"exposure column not found in bridge, items or nav: {col}")
+            expr = f"{alias}.{_quote(col)}"
+        exprs.append(f"{expr} AS {_quote(col)}")
+    return f"""
+        CREATE OR REPLACE TEMP TABLE {table} AS
+        SELECT {", ".join(exprs)}, row_number() OVER (ORDER BY b._row, i._irow) AS _frow
+        FROM bridge_ok b
+        JOIN {items} i ON i.ticker = b.ticker
+        LEFT JOIN nav n ON n.fund_code = b.fund_code
+    """
+
+
+def _totals_sql(table: str, keys: list[str], first: tuple[str, ...] = ()) -> str:
+    """``LookThrough.group_totals`` over a fact table: sorted groups, missing keys dropped, ``first`` by row."""
+    cols = ", ".join(_quote(k) for k in keys)
+    firsts = "".join(
+        f", arg_min({_quote(c)}, _frow) FILTER (WHERE {_quote(c)} IS NOT NULL) AS {_quote(c)}" for c in first
+    )
+    not_null = " AND ".join(f"{_quote(k)} IS NOT NULL" for k in keys)
+    return f"""
+        SELECT {cols}, fsum(true_weight_pct) AS total_true_weight_pct, fsum(true_value_thb) AS total_true_value_thb{firsts}
+        FROM {table}
+        WHERE {not_null}
+        GROUP BY {cols}
+        ORDER BY {cols}
+    """
+
+
+def build_exposure_tables_duckdb(
+    ds: Dataset, bridge: pd.DataFrame, securities: SecurityMaster | None = None, con=None
+) -> dict[str, pd.DataFrame]:
+    """``build_exposure_tables`` with the joins and groupbys executed by DuckDB.
+
+    Bridge normalization, item dedup, the three fact joins and the group totals run as SQL over
+    the registered ``Dataset`` frames, in parallel and spilling to ``DUCKDB_TEMP_DIR`` beyond
+    ``DUCKDB_MEMORY_LIMIT``. Per-fund NAV/FX rows, per-master item columns (look-through expansion,
+    holding keys, security ids) and the small dashboard tables reuse the pandas code. Rows and row
+    order match the pandas path; sums may differ in the last floating-point digits.
+    """
+    con = con or connect()
+    _register(con, "bridge", bridge, "_row")
+    con.execute(_BRIDGE_OK_SQL)
+    bridge_ok = con.execute("SELECT * EXCLUDE (_row) FROM bridge_ok ORDER BY _row").df()
+    roots = pd.Index(pd.unique(bridge_ok["ticker"].dropna()))
+
+    nav = _prepare_nav_with_fx(ds)
+    con.register("nav", nav.drop_duplicates(["fund_code"], keep="first"))
+
+    deduped = {}
+    for name, (frame, keys, weight_col) in ITEM_TABLES.items():
+        con.register(frame, getattr(ds, frame))
+        deduped[name] = con.execute(_dedup_sql(frame, keys, weight_col)).df()
+    items = finish_items(ds, deduped, roots, securities)
+
+    sources = {"b": list(bridge_ok.columns), "n": list(nav.columns)}
+    region_columns = list(ALLOCATION_FACT_COLUMNS)
+    region_columns.insert(region_columns.index("true_value_thb") + 1, "is_country_like")
+    fact_specs = {
+        "stock": ("portfolio_weight_pct", STOCK_FACT_COLUMNS, {}),
+        "sector": ("weight_pct", ALLOCATION_FACT_COLUMNS, {"category_name": "sector_name", "weight_pct": "sector_weight_pct"}),
+        "region": ("weight_pct", region_columns, {"category_name": "region_name", "weight_pct": "region_weight_pct"}),
+    }
+    facts = {}
+    for name, (weight_col, columns, renames) in fact_specs.items():
+        _register(con, f"items_{name}", items[name], "_irow")
+        sql = _fact_sql(f"fact_{name}", f"items_{name}", weight_col, columns, {**sources, "i": list(items[name].columns)})
+        con.execute(sql)
+        for old, new in renames.items():
+            con.execute(f"ALTER TABLE fact_{name} RENAME COLUMN {_quote(old)} TO {_quote(new)}")
+        facts[name] = con.execute(f"SELECT * EXCLUDE (_frow) FROM fact_{name} ORDER BY _frow").df()
+    facts["stock"]["security_id"] = facts["stock"]["security_id"].astype("Int64")
+
+    totals = {
+        name: con.execute(
+            _totals_sql(f"fact_{name}", FACT_GROUP_KEYS[name], HOLDING_FIRST_COLUMNS if name == "stock" else ())
+        ).df()
+        for name in FACT_TABLES
+    }
+    totals["stock"]["security_id"] = totals["stock"]["security_id"].astype("Int64")
+    total_value = float(con.execute("SELECT coalesce(fsum(true_value_thb), 0.0) FROM fact_stock").fetchone()[0])
+
+    aggregates = build_aggregate_tables(
+        ds,
+        bridge_ok,
+        nav,
+        totals["stock"],
+        totals["sector"].rename(columns={"sector_name": "category_name"}),
+        totals["region"].rename(columns={"region_name": "category_name"}),
+        total_value,
+    )
+    fact_tables = {FACT_TABLES[name]: df for name, df in facts.items()}
+    return {"stg_nav_aum_native": stg_nav_native(nav), "bridge_thai_master": bridge, **fact_tables, **aggregates}
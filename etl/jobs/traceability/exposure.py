@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+from .utils import to_float
+
+# Columns produced by the kernel itself rather than copied from an input frame.
+COMPUTED_COLUMNS = ("true_weight_pct", "aum", "true_value_thb")
+
+
+def dedup_item_weights(items: pd.DataFrame, keys: list[str], weight_col: str) -> pd.DataFrame:
+    """One row per ``keys`` with the largest numeric weight (missing weights count as 0)."""
+    items = items.copy()
+    items[weight_col] = to_float(items[weight_col]).fillna(0.0)
+    return items.groupby(keys, as_index=False, observed=True).agg(**{weight_col: (weight_col, "max")})
+
+
+def join_positions(left_codes: np.ndarray, right_codes: np.ndarray, n_keys: int) -> tuple[np.ndarray, np.ndarray]:
+    """Row positions of an inner equi-join on integer key codes (``-1`` never matches).
+
+    Rows come out in ``DataFrame.merge(how="inner")`` order: left rows in order, each followed
+    by its right matches in right order.
+    """
+    right_rows = np.flatnonzero(right_codes >= 0)
+    right_keys = right_codes[right_rows]
+    right_sorted = right_rows[np.argsort(right_keys, kind="stable")]
+    counts = np.bincount(right_keys, minlength=n_keys)
+    starts = np.cumsum(counts) - counts
+
+    matched = left_codes >= 0
+    left_keys = np.where(matched, left_codes, 0)
+    repeat = np.where(matched, counts[left_keys], 0)
+    left_idx = np.repeat(np.arange(len(left_codes)), repeat)
+    offsets = np.arange(len(left_idx)) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    right_idx = right_sorted[np.repeat(starts[left_keys], repeat) + offsets]
+    return left_idx, right_idx
+
+
+def _text_as_category(df: pd.DataFrame) -> pd.DataFrame:
+    # Bridge and NAV rows are repeated once per item; categorical codes are much cheaper to
+    # repeat than strings.
+    text_cols = [c for c in df.columns if pd.api.types.is_object_dtype(df[c]) or pd.api.types.is_string_dtype(df[c])]
+    if not text_cols:
+        return df
+    return df.astype({c: "category" for c in text_cols if not isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+class ExposureKernel:
+    """Propagate mapped fund weights through any "master -> item weight" table.
+
+    Master keys are factorized and the NAV/FX row of every bridge row is located once; each
+    ``propagate`` call is then a positional join plus array arithmetic, and only the requested
+    output columns are materialized.
+    """
+
+    def __init__(self, bridge_ok: pd.DataFrame, nav: pd.DataFrame, master_key: str = "ticker") -> None:
+        self.bridge = _text_as_category(bridge_ok.reset_index(drop=True))
+        self.master_key = master_key
+        self.master_codes, self.masters = pd.factorize(self.bridge[master_key])
+
+        # nav carries one row per fund; keep the first if a source ever repeats one.
+        self.nav = _text_as_category(nav.drop_duplicates(["fund_code"], keep="first").reset_index(drop=True))
+        self.nav_pos = pd.Index(self.nav["fund_code"]).get_indexer(self.bridge["fund_code"])
+        aum = take(to_float(self.nav["aum"]).to_numpy(dtype=float), self.nav_pos, allow_fill=True)
+        self.aum = np.nan_to_num(aum, nan=0.0)
+        self.weight_norm = self.bridge["feeder_weight_pct_norm"].to_numpy(dtype=float)
+
+    def propagate(self, items: pd.DataFrame, weight_col: str, columns: list[str]) -> pd.DataFrame:
+        """Inner-join ``items`` on the master key and return ``columns`` in that order.
+
+        Each column comes from the bridge, from ``items`` or from NAV (NaN when the fund has no
+        NAV row), or is one of ``COMPUTED_COLUMNS``.
+        """
+        items = items.reset_index(drop=True)
+        item_codes = self.masters.get_indexer(items[self.master_key])
+        b_idx, i_idx = join_positions(self.master_codes, item_codes, len(self.masters))
+
+        true_weight = self.weight_norm[b_idx] * to_float(items[weight_col]).to_numpy(dtype=float)[i_idx] / 100.0
+        aum = self.aum[b_idx]
+        computed = {
+            "true_weight_pct": true_weight,
+            "aum": aum,
+            "true_value_thb": np.nan_to_num(aum * true_weight / 100.0, nan=0.0),
+        }
+        nav_idx = self.nav_pos[b_idx]
+
+        data = {}
+        for col in columns:
+            if col in computed:
+                data[col] = computed[col]
+            elif col in self.bridge.columns:
+                data[col] = self._take(self.bridge[col], b_idx)
+            elif col in items.columns:
+                data[col] = self._take(items[col], i_idx)
+            elif col in self.nav.columns:
+                data[col] = self._take(self.nav[col], nav_idx, allow_fill=True)
+            else:
+                raise KeyError(f"exposure column not found in bridge, items or nav: {col}")
+        # Every column is already a fresh array; skip the copy into consolidated 2-D blocks.
+        return pd.DataFrame(data, copy=False)
+
+    @staticmethod
+    def _take(series: pd.Series, positions: np.ndarray, allow_fill: bool = False) -> pd.Series:
+        return pd.Series(series.array.take(positions, allow_fill=allow_fill), name=series.name)
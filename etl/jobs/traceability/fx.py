@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .utils import clean_upper, to_float
+
+
+class FxRateBook:
+    """In-memory ``rate_to_thb`` history, sorted by (currency, date), for batched as-of lookups.
+
+    Each rate is addressed by one int64 key ``currency code * span + day``, so a whole batch of
+    (currency, date) queries resolves with a single ``searchsorted`` over the sorted keys.
+    """
+
+    def __init__(self, currencies: pd.Index, ccy_codes: np.ndarray, days: np.ndarray, rates: np.ndarray) -> None:
+        self.currencies = currencies
+        self.ccy_codes = ccy_codes
+        self.days = days
+        self.rates = rates
+        self.first_day = int(days.min()) if len(days) else 0
+        self.span = (int(days.max()) - self.first_day + 2) if len(days) else 1
+        self.keys = ccy_codes * self.span + (days - self.first_day)
+
+    @classmethod
+    def from_frame(cls, fx: pd.DataFrame) -> FxRateBook:
+        """Build from ``date_rate`` / ``from_ccy`` / ``rate_to_thb`` rows; the last row wins per currency and day."""
+        if fx.empty:
+            return cls(pd.Index([], dtype=object), np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([]))
+        dates = pd.to_datetime(fx["date_rate"], errors="coerce").to_numpy(dtype="datetime64[D]")
+        ccy = clean_upper(fx["from_ccy"]).astype(str).to_numpy()
+        rates = to_float(fx["rate_to_thb"]).to_numpy(dtype=float)
+        valid = ~np.isnat(dates) & (ccy != "") & ~np.isnan(rates)
+
+        codes, currencies = pd.factorize(ccy[valid], sort=True)
+        days = dates[valid].astype(np.int64)
+        order = np.lexsort((np.arange(len(days)), days, codes))
+        codes, days, rates = codes[order].astype(np.int64), days[order], rates[valid][order]
+        last = np.ones(len(days), dtype=bool)
+        last[:-1] = (codes[1:] != codes[:-1]) | (days[1:] != days[:-1])
+        return cls(pd.Index(currencies), codes[last], days[last], rates[last])
+
+    def __len__(self) -> int:
+        return len(self.rates)
+
+    def asof(
+        self, currencies, dates, max_stale_days: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Latest rate on or before each date, per currency.
+
+        Returns ``(rate, rate_date, position)``; ``position`` is ``-1`` (rate NaN, date NaT) when
+        the currency has no rate on or before the date, or only one older than ``max_stale_days``.
+        A missing date takes the currency's latest rate.
+        """
+        codes = self.currencies.get_indexer(pd.Index(np.asarray(currencies, dtype=object)))
+        days = pd.to_datetime(pd.Series(dates), errors="coerce").to_numpy(dtype="datetime64[D]")
+        rate = np.full(len(codes), np.nan)
+        rate_date = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[ns]")
+        pos = np.full(len(codes), -1)
+        if not len(self):
+            return rate, rate_date, pos
+
+        no_date = np.isnat(days)
+        day_num = np.where(no_date, self.first_day + self.span, days.astype(np.int64))
+        # Dates past the book's range look up its last day; earlier ones cannot match.
+        offset = np.clip(day_num - self.first_day, -1, self.span - 1)
+        hit = np.searchsorted(self.keys, codes * self.span + offset, side="right") - 1
+        hit_ok = np.where(hit >= 0, hit, 0)
+        found = (codes >= 0) & (offset >= 0) & (hit >= 0) & (self.ccy_codes[hit_ok] == codes)
+        if max_stale_days is not None:
+            found &= no_date | (day_num - self.days[hit_ok] <= max_stale_days)
+
+        pos[found] = hit[found]
+        rate[found] = self.rates[hit[found]]
+        rate_date[found] = self.days[hit[found]].astype("datetime64[D]")
+        return rate, rate_date, pos
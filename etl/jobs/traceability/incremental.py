@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .config import LOAD_PARALLEL, LOAD_WORKERS_PER_ENGINE, WATERMARK_TABLE
+from .loaders import FtColumns, SourceQuery, load_df, run_queries
+from .writer import _sql_dtypes
+
+if TYPE_CHECKING:
+    from .cache import SnapshotCache
+
+STATE_TABLE_PREFIX = "etl_state_"
+DELETE_CHUNK = 1000
+WRITE_CHUNK = 10000
+
+
+@dataclass
+class IncrementalSource:
+    """A source frame that can be refreshed from rows inserted at or after a high-water mark.
+
+    ``watermark_col`` is the insert timestamp of the source table, so rows scraped late for an
+    older date are still picked up. ``merge`` is either ``replace``: every key touched by the
+    delta gets its new latest snapshot (possibly empty), or ``rerank``: delta rows compete with
+    the stored row per key using ``order_by``.
+    """
+
+    name: str
+    table: str
+    watermark_col: str
+    key: str
+    merge: str
+    sql: str
+    order_by: tuple[str, ...] = ()
+    state_only_cols: tuple[str, ...] = ()
+
+
+def _snapshot_sql(table: str, key: str, date_col: str, watermark_col: str, columns: str, join_filter: str = "") -> str:
+    # ``touched`` holds the keys with inserted rows; ``latest`` looks at all rows of those keys.
+    return f"""
+            WITH touched AS (
+                SELECT {key}, MAX({watermark_col}) AS changed_at
+                FROM {table}
+                {{since}}
+                GROUP BY {key}
+            ),
+            latest AS (
+                SELECT s.{key}, MAX(s.{date_col}) AS {date_col}, t.changed_at
+                FROM {table} s
+                JOIN touched t ON t.{key} = s.{key}
+                GROUP BY s.{key}, t.changed_at
+            )
+            SELECT
+                l.{key} AS snapshot_key,
+                l.changed_at,
+                {columns}
+            FROM latest l
+            LEFT JOIN {table} a
+              ON l.{key} = a.{key}
+             AND l.{date_col} = a.{date_col}{join_filter}
+            """
+
+
+def incremental_sources(ft_cols: FtColumns) -> list[IncrementalSource]:
+    """Delta queries per source. ``{since}`` becomes ``WHERE <watermark> >= :since`` or nothing.
+
+    Every query returns ``changed_at``, the newest insert timestamp per key, for the next mark.
+    Snapshot sources select ``snapshot_key`` from the ``latest`` CTE through a LEFT JOIN, so a
+    key whose newest snapshot has no matching rows still shows up and clears the old rows.
+    """
+    return [
+        IncrementalSource(
+            name="thai_nav_aum",
+            table="funds_daily",
+            watermark_col="scraped_at",
+            key="fund_code",
+            merge="rerank",
+            order_by=("has_aum", "nav_as_of_date"),
+            state_only_cols=("has_aum",),
+            sql="""
+            WITH ranked AS (
+                SELECT
+                    fund_code,
+                    nav_date,
+                    aum,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY fund_code
+                        ORDER BY (aum IS NOT NULL) DESC, nav_date DESC
+                    ) AS rn,
+                    MAX(scraped_at) OVER (PARTITION BY fund_code) AS changed_at
+                FROM funds_daily
+                {since}
+            )
+            SELECT
+                fund_code,
+                nav_date AS nav_as_of_date,
+                aum,
+                CASE WHEN aum IS NULL THEN 0 ELSE 1 END AS has_aum,
+                changed_at
+            FROM ranked
+            WHERE rn = 1
+            """,
+        ),
+        IncrementalSource(
+            name="thai_feeder",
+            table="funds_holding",
+            watermark_col="scraped_at",
+            key="fund_code",
+            merge="replace",
+            sql=_snapshot_sql(
+                "funds_holding",
+                "fund_code",
+                "as_of_date",
+                "scraped_at",
+                """a.fund_code,
+                a.name AS feeder_name,
+                a.percent AS feeder_weight_pct,
+                a.as_of_date,
+                a.source_url""",
+                join_filter="\n             AND a.type = 'Fund'",
+            ),
+        ),
+        IncrementalSource(
+            name="ft_holdings",
+            table="ft_holdings",
+            watermark_col="created_at",
+            key="ticker",
+            merge="replace",
+            sql=_snapshot_sql(
+                "ft_holdings",
+                "ticker",
+                "date_scraper",
+                "created_at",
+                """a.ticker,
+                a.holding_name,
+                a.holding_ticker,
+                a.holding_type,
+                a.portfolio_weight_pct,
+                a.date_scraper""",
+                join_filter="\n             AND a.allocation_type = 'top_10_holdings'",
+            ),
+        ),
+        IncrementalSource(
+            name="ft_sector",
+            table="ft_sector_allocation",
+            watermark_col="created_at",
+            key="ticker",
+            merge="replace",
+            sql=_snapshot_sql(
+                "ft_sector_allocation",
+                "ticker",
+                "date_scraper",
+                "created_at",
+                f"""a.ticker,
+                a.{ft_cols.sector_category} AS category_name,
+                a.{ft_cols.sector_weight} AS weight_pct,
+                a.date_scraper""",
+            ),
+        ),
+        IncrementalSource(
+            name="ft_region",
+            table="ft_region_allocation",
+            watermark_col="created_at",
+            key="ticker",
+            merge="replace",
+            sql=_snapshot_sql(
+                "ft_region_allocation",
+                "ticker",
+                "date_scraper",
+                "created_at",
+                f"""a.ticker,
+                a.{ft_cols.region_category} AS category_name,
+                a.{ft_cols.region_weight} AS weight_pct,
+                a.date_scraper""",
+            ),
+        ),
+        IncrementalSource(
+            name="ft_return",
+            table="ft_avg_fund_return",
+            watermark_col=ft_cols.return_created,
+            key="ft_ticker",
+            merge="rerank",
+            order_by=("date_scraper", "created_at"),
+            state_only_cols=("created_at",),
+            sql=f"""
+            WITH ranked AS (
+                SELECT
+                    {ft_cols.return_key} AS key_ticker,
+                    ticker,
+                    {ft_cols.return_1y} AS avg_fund_return_1y,
+                    {ft_cols.return_3y} AS avg_fund_return_3y,
+                    {ft_cols.return_date} AS date_scraper,
+                    {ft_cols.return_created} AS created_at,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY {ft_cols.return_key}
+                        ORDER BY {ft_cols.return_date} DESC, {ft_cols.return_created} DESC
+                    ) AS rn,
+                    MAX({ft_cols.return_created}) OVER (PARTITION BY {ft_cols.return_key}) AS changed_at
+                FROM ft_avg_fund_return
+                {{since}}
+            )
+            SELECT
+                key_ticker AS ft_ticker,
+                ticker,
+                avg_fund_return_1y,
+                avg_fund_return_3y,
+                date_scraper,
+                created_at,
+                changed_at
+            FROM ranked
+            WHERE rn = 1
+            """,
+        ),
+    ]
+
+
+def read_watermarks(mart_engine: Engine, sources: list[IncrementalSource]) -> dict[str, str]:
+    """Stored marks by source name; a mark kept on another column than ``watermark_col`` is dropped."""
+    if not inspect(mart_engine).has_table(WATERMARK_TABLE):
+        return {}
+    wm = load_df(mart_engine, f"SELECT source_name, watermark_col, high_water FROM {WATERMARK_TABLE}")
+    columns = {src.name: src.watermark_col for src in sources}
+    return {
+        str(r.source_name): str(r.high_water)
+        for r in wm.itertuples(index=False)
+        if pd.notna(r.high_water) and columns.get(str(r.source_name)) == r.watermark_col
+    }
+
+
+def _high_water(series: pd.Series) -> str | None:
+    values = pd.to_datetime(series, errors="coerce").dropna()
+    if values.empty:
+        return None
+    top = values.max()
+    if top == top.normalize():
+        return top.date().isoformat()
+    return top.isoformat(sep=" ")
+
+
+def _sort_key(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_datetime(series, errors="coerce")
+
+
+def touched_keys(src: IncrementalSource, delta: pd.DataFrame) -> list:
+    column = "snapshot_key" if src.merge == "replace" else src.key
+    return delta[column].dropna().unique().tolist()
+
+
+def merge_delta(src: IncrementalSource, state: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    delta = delta.drop(columns=["changed_at"], errors="ignore")
+    if src.merge == "replace":
+        fresh = delta[delta[src.key].notna()].drop(columns=["snapshot_key"])
+        kept = state[~state[src.key].isin(touched_keys(src, delta))]
+        return pd.concat([kept, fresh], ignore_index=True)
+
+    combined = pd.concat([state, delta], ignore_index=True)
+    if combined.empty:
+        return combined
+    ranking = combined.assign(**{col: _sort_key(combined[col]) for col in src.order_by})
+    order = list(src.order_by)
+    ranking = ranking.sort_values([src.key, *order], ascending=[True] + [False] * len(order), kind="mergesort")
+    keep = ranking.drop_duplicates([src.key], keep="first").index
+    return combined.loc[sorted(keep)].reset_index(drop=True)
+
+
+def _write_state(conn: Connection, src: IncrementalSource, merged: pd.DataFrame, keys: list | None) -> None:
+    """Store ``merged`` in full (``keys`` is None) or replace only the rows of ``keys``."""
+    table = STATE_TABLE_PREFIX + src.name
+    if keys is None:
+        merged.to_sql(table, conn, if_exists="replace", index=False, chunksize=WRITE_CHUNK, dtype=_sql_dtypes(merged))
+        return
+    stmt = text(f"DELETE FROM {table} WHERE {src.key} IN :keys").bindparams(bindparam("keys", expanding=True))
+    for start in range(0, len(keys), DELETE_CHUNK):
+        conn.execute(stmt, {"keys": keys[start : start + DELETE_CHUNK]})
+    rows = merged[merged[src.key].isin(keys)]
+    if not rows.empty:
+        rows.to_sql(table, conn, if_exists="append", index=False, chunksize=WRITE_CHUNK, dtype=_sql_dtypes(rows))
+
+
+def _write_watermarks(conn: Connection, wm: pd.DataFrame) -> None:
+    if inspect(conn).has_table(WATERMARK_TABLE):
+        stmt = text(f"DELETE FROM {WATERMARK_TABLE} WHERE source_name IN :names")
+        conn.execute(stmt.bindparams(bindparam("names", expanding=True)), {"names": wm["source_name"].tolist()})
+    wm.to_sql(WATERMARK_TABLE, conn, if_exists="append", index=False)
+
+
+def load_incremental(
+    queries: list[SourceQuery],
+    sources: list[IncrementalSource],
+    mart_engine: Engine,
+    parallel: bool = LOAD_PARALLEL,
+    workers_per_engine: int = LOAD_WORKERS_PER_ENGINE,
+    cache: SnapshotCache | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Replace the incremental entries of ``queries`` with delta reads and merge into stored state.
+
+    A source without stored state (or without a watermark) is read in full through the same
+    delta query with no ``since`` filter, which also seeds its state table. Otherwise only the
+    state rows of touched keys are replaced, in the transaction that moves the watermarks.
+    """
+    watermarks = read_watermarks(mart_engine, sources)
+    mart_inspector = inspect(mart_engine)
+    by_name = {src.name: src for src in sources}
+
+    plan: list[SourceQuery] = []
+    states: dict[str, pd.DataFrame] = {}
+    for q in queries:
+        src = by_name.get(q.name)
+        if src is None:
+            plan.append(q)
+            continue
+        since = watermarks.get(src.name)
+        state_table = STATE_TABLE_PREFIX + src.name
+        if since is not None and mart_inspector.has_table(state_table):
+            # The build needs every key, so the stored state is read back in full.
+            states[src.name] = load_df(mart_engine, f"SELECT * FROM {state_table}")
+            # ">=" re-reads the rows inserted in the mark's own second; only their keys are rewritten.
+            sql = src.sql.format(since=f"WHERE {src.watermark_col} >= :since")
+            plan.append(SourceQuery(src.name, q.engine, sql, {"since": since}))
+        else:
+            plan.append(SourceQuery(src.name, q.engine, src.sql.format(since="")))
+
+    frames = run_queries(plan, parallel=parallel, workers_per_engine=workers_per_engine, cache=cache)
+
+    new_watermarks: list[dict] = []
+    with mart_engine.begin() as conn:
+        for src in sources:
+            if src.name not in frames:
+                continue
+            delta = frames[src.name]
+            state = states.get(src.name)
+            if state is None:
+                empty = delta.iloc[0:0].drop(columns=["snapshot_key", "changed_at"], errors="ignore")
+                merged = merge_delta(src, empty, delta)
+                _write_state(conn, src, merged, None)
+            else:
+                merged = merge_delta(src, state, delta)
+                _write_state(conn, src, merged, touched_keys(src, delta))
+            print(
+                f"- {src.name}: {len(delta)} delta rows since {watermarks.get(src.name, 'start')}, "
+                f"{len(merged)} rows in state"
+            )
+            new_watermarks.append(
+                {
+                    "source_name": src.name,
+                    "source_table": src.table,
+                    "watermark_col": src.watermark_col,
+                    "high_water": _high_water(delta["changed_at"]) or watermarks.get(src.name),
+                    "state_rows": len(merged),
+                }
+            )
+            frames[src.name] = merged.drop(columns=list(src.state_only_cols), errors="ignore")
+
+        if new_watermarks:
+            wm = pd.DataFrame(new_watermarks)
+            wm["updated_at"] = pd.Timestamp.now(tz="UTC").tz_localize(None)
+            _write_watermarks(conn, wm)
+
+    return frames
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import re
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .config import RUN_REPORT_DIR
+from .utils import RssPeak
+
+
+def row_counts(frames) -> dict[str, int]:
+    """Row count per named frame, from a mapping or a dataclass of frames (ints pass through)."""
+    if is_dataclass(frames):
+        frames = {f.name: getattr(frames, f.name) for f in fields(frames)}
+    return {name: value if isinstance(value, int) else len(value) for name, value in frames.items()}
+
+
+def _children_cpu() -> float:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - non-POSIX platforms (Windows) have no getrusage
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@dataclass
+class StageStats:
+    """Measurements of one stage; ``rows_in`` / ``rows_out`` are filled by the stage body."""
+
+    name: str
+    status: str = "ok"
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    # CPU of child processes (shards, backfill workers) that finished during the stage.
+    child_cpu_s: float = 0.0
+    rss_start_bytes: int = 0
+    rss_peak_bytes: int = 0
+    rss_peak_delta_bytes: int = 0
+    rows_in: dict[str, int] = field(default_factory=dict)
+    rows_out: dict[str, int] = field(default_factory=dict)
+    profile: str | None = None
+    error: str | None = None
+
+    def count_in(self, frames) -> None:
+        self.rows_in.update(row_counts(frames))
+
+    def count_out(self, frames) -> None:
+        self.rows_out.update(row_counts(frames))
+
+
+class RunReport:
+    """Per-stage wall time, CPU time, peak RSS and row counts of one job run, saved as JSON.
+
+    The report goes to ``<directory>/<job>-<UTC timestamp>.json``. With ``profile`` each stage
+    also runs under cProfile and its stats are dumped next to the report as
+    ``<job>-<timestamp>-<stage>.pstats`` (load with ``pstats.Stats`` or snakeviz).
+    """
+
+    def __init__(self, job: str, profile: bool = False, directory: Path = RUN_REPORT_DIR, **meta) -> None:
+        self.job = job
+        self.profile = profile
+        self.directory = Path(directory)
+        self.meta = meta
+        self.stages: list[StageStats] = []
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self.stem = f"{job}-{self.started_at:%Y%m%dT%H%M%SZ}"
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """Measure the ``with`` block as stage ``name``; a raised error marks it failed and propagates."""
+        stats = StageStats(name)
+        self.stages.append(stats)
+        profiler = cProfile.Profile() if self.profile else None
+        rss = RssPeak()
+        wall, cpu, child_cpu = time.perf_counter(), time.process_time(), _children_cpu()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield stats
+        except BaseException as exc:
+            stats.status = "failed"
+            stats.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            stats.wall_s = time.perf_counter() - wall
+            stats.cpu_s = time.process_time() - cpu
+            stats.child_cpu_s = _children_cpu() - child_cpu
+            stats.rss_start_bytes = rss.start
+            stats.rss_peak_bytes = rss.finish()
+            stats.rss_peak_delta_bytes = stats.rss_peak_bytes - rss.start
+            if profiler is not None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self.directory / f"{self.stem}-{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.pstats"
+                profiler.dump_stats(path)
+                stats.profile = str(path)
+
+    def to_dict(self) -> dict:
+        failed = any(s.status != "ok" for s in self.stages)
+        return {
+            "job": self.job,
+            "status": "failed" if failed else "ok",
+            "started_at": self.started_at.isoformat(),
+            "wall_s": time.perf_counter() - self._started,
+            "meta": self.meta,
+            "stages": [asdict(s) for s in self.stages],
+        }
+
+    def write(self) -> Path:
+        """Save the JSON report and print one line per stage."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self.stem}.json"
+        path.write_text(json.dumps(self.to_dict(), indent=2, default=str), encoding="utf-8")
+        mb = 1024 * 1024
+        for s in self.stages:
+            rows = sum(s.rows_out.values())
+            print(
+                f"  stage {s.name:<10} {s.wall_s:8.2f}s wall {s.cpu_s + s.child_cpu_s:8.2f}s cpu "
+                f"{s.rss_peak_delta_bytes / mb:+9.1f} MB peak rss {rows:>12,} rows out{'' if s.status == 'ok' else '  FAILED'}"
+            )
+        print(f"Run report: {path}")
+        return path
+
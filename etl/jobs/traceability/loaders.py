@@ -1,296 +1,848 @@
 from __future__ import annotations
 
+import hashlib
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 import pymysql
+from pymysql.constants import FIELD_TYPE
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.engine.url import make_url
 
-from .config import FX_TABLE
+from etl.common.db import raw_connection
+
+from .config import (
+    FX_TABLE,
+    LOAD_CHUNK_ROWS,
+    LOAD_COMPACT_DTYPES,
+    LOAD_FETCH_MODE,
+    LOAD_INCREMENTAL,
+    LOAD_PARALLEL,
+    LOAD_TICKER_PUSHDOWN,
+    LOAD_WORKERS_PER_ENGINE,
+    LOOKTHROUGH_MAX_DEPTH,
+)
+from .dtypes import align_key_dtypes, compact_frames
+from .mapping import build_bridge
 from .models import Dataset
+from .schema import SchemaCatalog, source_catalog
+from .utils import RssPeak
+
+if TYPE_CHECKING:
+    from .cache import SnapshotCache
+
+
+@dataclass
+class SourceQuery:
+    name: str
+    engine: Engine
+    sql: str
+    params: dict = field(default_factory=dict)
+    # (source table, change column) used to fingerprint the result for the snapshot cache.
+    fingerprint: tuple[str, str] | None = None
+    # Run once per connection before the query, e.g. to fill a session temp table it joins.
+    session_setup: Callable[[Connection], None] | None = None
+
+
+@dataclass
+class QueryStats:
+    seconds: float
+    rss_start: int
+    rss_peak: int
+
+
+@dataclass
+class FtColumns:
+    """Column aliases for the FT schema variants the loaders support."""
+
+    sector_category: str
+    sector_weight: str
+    region_category: str
+    region_weight: str
+    return_key: str
+    return_date: str
+    return_1y: str
+    return_3y: str
+    return_created: str
+
+
+def resolve_ft_columns(sector_cols: set[str], region_cols: set[str], return_cols: set[str]) -> FtColumns:
+    return_date_col = "date_scraper" if "date_scraper" in return_cols else "as_of_date"
+    return FtColumns(
+        sector_category="category_name" if "category_name" in sector_cols else "sector_name",
+        sector_weight="weight_pct" if "weight_pct" in sector_cols else "sector_weight_pct",
+        region_category="category_name" if "category_name" in region_cols else "region_name",
+        region_weight="weight_pct" if "weight_pct" in region_cols else "region_weight_pct",
+        return_key="ft_ticker" if "ft_ticker" in return_cols else "ticker",
+        return_date=return_date_col,
+        return_1y="avg_fund_return_1y" if "avg_fund_return_1y" in return_cols else "avg_return_1y_pct",
+        return_3y="avg_fund_return_3y" if "avg_fund_return_3y" in return_cols else "NULL",
+        return_created="created_at" if "created_at" in return_cols else return_date_col,
+    )
 
 
 def create_db_if_needed(db_uri: str) -> None:
     url = make_url(db_uri)
+    if url.get_backend_name() == "sqlite":
+        # A SQLite database is its file, created on first connect; only the directory may be missing.
+        if url.database and url.database != ":memory:":
+            Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+        return
     db_name = url.database
-    conn = pymysql.connect(
-        host=url.host or "127.0.0.1",
-        port=int(url.port or 3306),
-        user=url.username or "root",
-        password=url.password or "",
-        autocommit=True,
-        charset="utf8mb4",
-    )
+    conn = raw_connection(url.set(database=None))
     try:
         with conn.cursor() as cur:
             cur.execute(
                 f"CREATE DATABASE IF NOT EXISTS `{db_name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci"
             )
+        conn.commit()
     finally:
         conn.close()
 
 
-def load_df(engine: Engine, sql: str) -> pd.DataFrame:
-    with engine.connect() as conn:
-        return pd.read_sql(text(sql), conn)
+def read_df(
+    conn: Connection,
+    sql: str,
+    params: dict | None = None,
+    fetch_mode: str = LOAD_FETCH_MODE,
+    rss: RssPeak | None = None,
+) -> pd.DataFrame:
+    if fetch_mode == "stream":
+        return _read_df_streaming(conn, sql, params, LOAD_CHUNK_ROWS, rss)
+    if fetch_mode == "columnar":
+        return _read_df_columnar(conn, sql, params)
+    return pd.read_sql(text(sql), conn, params=params or None)
 
 
-def table_exists(engine: Engine, table_name: str) -> bool:
-    with engine.connect() as conn:
-        row = conn.execute(
-            text(
-                """
-                SELECT COUNT(*) AS c
-                FROM information_schema.tables
-                WHERE table_schema = DATABASE()
-                  AND table_name = :table_name
-                """
-            ),
-            {"table_name": table_name},
-        ).fetchone()
-    return bool(row and int(row[0]) > 0)
-
-
-def table_columns(engine: Engine, table_name: str) -> set[str]:
+# pymysql field types decoded column-wise by the columnar fetch path instead of per value.
+_FLOAT_FIELDS = {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL, FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE}
+_INT_FIELDS = {
+    FIELD_TYPE.TINY,
+    FIELD_TYPE.SHORT,
+    FIELD_TYPE.LONG,
+    FIELD_TYPE.LONGLONG,
+    FIELD_TYPE.INT24,
+    FIELD_TYPE.YEAR,
+}
+_DATE_FIELDS = {FIELD_TYPE.DATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP}
+_RAW_FIELDS = _FLOAT_FIELDS | _INT_FIELDS | _DATE_FIELDS
+
+
+def _driver_statement(conn: Connection, sql: str, params: dict | None) -> tuple[str, dict | tuple]:
+    compiled = text(sql).compile(dialect=conn.dialect)
+    values = compiled.construct_params(params or {})
+    if compiled.positional:
+        return compiled.string, tuple(values[name] for name in compiled.positiontup)
+    return compiled.string, values
+
+
+def _typed_column(values: tuple, field_type: int | None) -> object:
+    if field_type in _FLOAT_FIELDS:
+        return np.array(values, dtype=np.float64)
+    if field_type in _INT_FIELDS:
+        return np.array(values, dtype=np.float64 if None in values else np.int64)
+    if field_type in _DATE_FIELDS:
+        return pd.to_datetime(np.array(values, dtype=object), format="ISO8601", errors="coerce")
+    return pd.Series(values)
+
+
+def _read_df_columnar(conn: Connection, sql: str, params: dict | None) -> pd.DataFrame:
+    """Fetch on the raw DBAPI cursor and build each column in one typed array.
+
+    Skips SQLAlchemy row objects and ``from_records`` inference. On pymysql, numeric and date
+    fields are left as the ASCII text of the wire protocol and parsed per column (no ``Decimal``
+    or ``datetime.date`` objects); the cursor runs on the same connection, so it stays inside
+    the snapshot transaction. Other drivers get the same transpose with pandas inference.
+    """
+    dbapi_conn = conn.connection.dbapi_connection
+    is_pymysql = isinstance(dbapi_conn, pymysql.connections.Connection)
+    decoders = dbapi_conn.decoders if is_pymysql else None
+    if decoders is not None:
+        dbapi_conn.decoders = {k: v for k, v in decoders.items() if k not in _RAW_FIELDS}
+    statement, values = _driver_statement(conn, sql, params)
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute(statement, values)
+        description = cur.description or ()
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        if decoders is not None:
+            dbapi_conn.decoders = decoders
+
+    columns = [d[0] for d in description]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    data = {}
+    for d, values in zip(description, zip(*rows)):
+        data[d[0]] = _typed_column(values, d[1] if is_pymysql else None)
+    del rows
+    return pd.DataFrame(data)
+
+
+def _read_df_streaming(
+    conn: Connection, sql: str, params: dict | None, chunk_rows: int, rss: RssPeak | None
+) -> pd.DataFrame:
+    """Read through an unbuffered server-side cursor (pymysql ``SSCursor``) in ``chunk_rows`` pieces.
+
+    Each chunk is converted to typed columns (``Decimal`` -> float) right away and its raw rows
+    are dropped, so the driver never holds the full result set. Columns are then assembled one
+    at a time, releasing the chunk buffers of a column as soon as it is concatenated.
+    """
+    result = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows).execute(
+        text(sql), params or {}
+    )
+    columns = list(result.keys())
+    parts: dict[str, list[pd.Series]] = {c: [] for c in columns}
+    for rows in result.partitions(chunk_rows):
+        chunk = pd.DataFrame.from_records([tuple(r) for r in rows], columns=columns, coerce_float=True)
+        del rows
+        for col in columns:
+            parts[col].append(chunk[col])
+        del chunk
+        if rss is not None:
+            rss.sample()
+    result.close()
+
+    if not parts or not parts[columns[0]]:
+        return pd.DataFrame(columns=columns)
+
+    data: dict[str, pd.Series] = {}
+    for col in columns:
+        pieces = parts.pop(col)
+        # An all-NULL chunk comes back as object; give it the dtype the column has elsewhere.
+        typed = next((p.dtype for p in pieces if p.notna().any()), None)
+        if typed is not None and typed != object:
+            pieces = [p.astype(typed) if p.dtype == object else p for p in pieces]
+        data[col] = pd.concat(pieces, ignore_index=True)
+        del pieces
+    return pd.DataFrame(data)
+
+
+def load_df(engine: Engine, sql: str, params: dict | None = None, rss: RssPeak | None = None) -> pd.DataFrame:
     with engine.connect() as conn:
-        rows = conn.execute(
-            text(
-                """
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_schema = DATABASE()
-                  AND table_name = :table_name
-                """
-            ),
-            {"table_name": table_name},
-        ).fetchall()
-    return {str(r[0]).lower() for r in rows}
-
-
-def load_source_data(thai_engine: Engine, global_engine: Engine, fx_engine: Engine) -> Dataset:
-    thai_funds = load_df(
-        thai_engine,
-        """
-        SELECT fund_code, full_name_th, full_name_en, amc, category, currency, country
-        FROM funds_master_info
-        """,
+        return read_df(conn, sql, params, rss=rss)
+
+
+def _begin_snapshot(conn: Connection) -> None:
+    # InnoDB consistent read view: every query on this connection sees the same point in time.
+    if conn.dialect.name == "mysql":
+        conn.exec_driver_sql("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+
+
+def _apply_session_setup(conn: Connection, q: SourceQuery, applied: set[int]) -> None:
+    if q.session_setup is not None and id(q.session_setup) not in applied:
+        q.session_setup(conn)
+        applied.add(id(q.session_setup))
+
+
+@contextmanager
+def snapshot_connections(engines: list[Engine]) -> Iterator[dict[int, Connection]]:
+    """One open connection per engine (keyed by ``id(engine)``), each inside its consistent snapshot.
+
+    Pass it to ``run_queries`` so several calls read from the same point in time.
+    """
+    with ExitStack() as stack:
+        connections: dict[int, Connection] = {}
+        for engine in engines:
+            if id(engine) not in connections:
+                conn = stack.enter_context(engine.connect())
+                _begin_snapshot(conn)
+                connections[id(engine)] = conn
+        yield connections
+        for conn in connections.values():
+            conn.rollback()
+
+
+def _run_sequential(
+    queries: list[SourceQuery], connections: dict[int, Connection] | None = None
+) -> tuple[dict[str, pd.DataFrame], dict[str, QueryStats]]:
+    """Run queries one at a time, reusing one connection (and snapshot) per engine.
+
+    Engines in ``connections`` run on that open connection instead of a new one.
+    """
+    by_engine: dict[int, list[SourceQuery]] = {}
+    for q in queries:
+        by_engine.setdefault(id(q.engine), []).append(q)
+
+    frames: dict[str, pd.DataFrame] = {}
+    stats: dict[str, QueryStats] = {}
+
+    def run_group(conn: Connection, group: list[SourceQuery]) -> None:
+        applied: set[int] = set()
+        for q in group:
+            _apply_session_setup(conn, q, applied)
+            started = time.perf_counter()
+            rss = RssPeak()
+            frames[q.name] = read_df(conn, q.sql, q.params, rss=rss)
+            stats[q.name] = QueryStats(time.perf_counter() - started, rss.start, rss.finish())
+
+    for key, group in by_engine.items():
+        if connections is not None and key in connections:
+            run_group(connections[key], group)
+            continue
+        with group[0].engine.connect() as conn:
+            _begin_snapshot(conn)
+            run_group(conn, group)
+            conn.rollback()
+    return frames, stats
+
+
+def _run_parallel(
+    queries: list[SourceQuery], workers_per_engine: int, connections: dict[int, Connection] | None = None
+) -> tuple[dict[str, pd.DataFrame], dict[str, QueryStats]]:
+    """Run queries on a bounded pool: up to ``workers_per_engine`` connections per engine.
+
+    Each connection opens its snapshot before any query is dispatched. With one worker per
+    engine all queries against that database share a single snapshot; with more workers the
+    snapshots are opened back-to-back behind a barrier, so they are close but not identical.
+    Engines in ``connections`` get a single worker on that open connection.
+    """
+    by_engine: dict[int, list[SourceQuery]] = {}
+    for q in queries:
+        by_engine.setdefault(id(q.engine), []).append(q)
+
+    frames: dict[str, pd.DataFrame] = {}
+    stats: dict[str, QueryStats] = {}
+    lock = threading.Lock()
+
+    def drain(conn: Connection, pending: queue.Queue) -> None:
+        applied: set[int] = set()
+        while True:
+            try:
+                q = pending.get_nowait()
+            except queue.Empty:
+                break
+            _apply_session_setup(conn, q, applied)
+            started = time.perf_counter()
+            rss = RssPeak()
+            df = read_df(conn, q.sql, q.params, rss=rss)
+            with lock:
+                frames[q.name] = df
+                stats[q.name] = QueryStats(time.perf_counter() - started, rss.start, rss.finish())
+
+    def worker(engine: Engine, pending: queue.Queue, barrier: threading.Barrier) -> None:
+        if connections is not None and id(engine) in connections:
+            drain(connections[id(engine)], pending)
+            return
+        try:
+            with engine.connect() as conn:
+                _begin_snapshot(conn)
+                barrier.wait()
+                drain(conn, pending)
+                conn.rollback()
+        except BaseException:
+            barrier.abort()
+            raise
+
+    jobs = []
+    for group in by_engine.values():
+        pending: queue.Queue = queue.Queue()
+        for q in group:
+            pending.put(q)
+        shared = connections is not None and id(group[0].engine) in connections
+        n_workers = 1 if shared else min(workers_per_engine, len(group))
+        barrier = threading.Barrier(n_workers)
+        jobs.extend((group[0].engine, pending, barrier) for _ in range(n_workers))
+
+    with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="load") as pool:
+        futures = [pool.submit(worker, *job) for job in jobs]
+        for fut in futures:
+            fut.result()
+
+    return frames, stats
+
+
+def run_queries(
+    queries: list[SourceQuery],
+    parallel: bool = LOAD_PARALLEL,
+    workers_per_engine: int = LOAD_WORKERS_PER_ENGINE,
+    cache: SnapshotCache | None = None,
+    connections: dict[int, Connection] | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Frames of ``queries`` by name.
+
+    ``connections`` (from ``snapshot_connections``) runs the queries of those engines on their open connection.
+    """
+    started = time.perf_counter()
+    frames: dict[str, pd.DataFrame] = {}
+    stats: dict[str, QueryStats] = {}
+    keys = cache.keys_for(queries) if cache is not None else {}
+    for q in queries:
+        if q.name in keys:
+            hit_started = time.perf_counter()
+            rss = RssPeak()
+            cached = cache.get(q.name, keys[q.name])
+            if cached is not None:
+                frames[q.name] = cached
+                stats[q.name] = QueryStats(time.perf_counter() - hit_started, rss.start, rss.finish())
+    pending = [q for q in queries if q.name not in frames]
+
+    if parallel and pending:
+        loaded, loaded_stats = _run_parallel(pending, workers_per_engine, connections)
+    else:
+        loaded, loaded_stats = _run_sequential(pending, connections)
+    for q in pending:
+        if q.name in keys:
+            cache.put(q.name, keys[q.name], loaded[q.name])
+    frames.update(loaded)
+    stats.update(loaded_stats)
+    elapsed = time.perf_counter() - started
+
+    mode = f"parallel x{workers_per_engine}/engine" if parallel else "sequential"
+    print(
+        f"Loaded {len(queries)} queries in {elapsed:.2f}s "
+        f"({mode}, fetch={LOAD_FETCH_MODE}, {len(queries) - len(pending)} from cache)"
     )
+    pending_names = {q.name for q in pending}
+    mb = 1024 * 1024
+    for q in queries:
+        source = "query" if q.name in pending_names else "cache"
+        st = stats[q.name]
+        print(
+            f"- {q.name}: {len(frames[q.name])} rows in {st.seconds:.2f}s ({source}), "
+            f"peak RSS {st.rss_peak / mb:.1f} MB (+{(st.rss_peak - st.rss_start) / mb:.1f} MB)"
+        )
+    return frames
+
 
-    thai_isin = load_df(
-        thai_engine,
-        """
-        SELECT fund_code, UPPER(TRIM(code)) AS isin_code
-        FROM funds_codes
-        WHERE type = 'ISIN' AND code IS NOT NULL AND TRIM(code) <> ''
-        """,
+def load_source_data(
+    thai_engine: Engine,
+    global_engine: Engine,
+    fx_engine: Engine,
+    parallel: bool = LOAD_PARALLEL,
+    workers_per_engine: int = LOAD_WORKERS_PER_ENGINE,
+    incremental: bool = LOAD_INCREMENTAL,
+    mart_engine: Engine | None = None,
+    cache: SnapshotCache | None = None,
+    catalog: SchemaCatalog | None = None,
+    ticker_pushdown: bool = LOAD_TICKER_PUSHDOWN,
+    compact_dtypes: bool = LOAD_COMPACT_DTYPES,
+    bridge_builder: Callable[[Dataset], pd.DataFrame] = build_bridge,
+) -> tuple[Dataset, pd.DataFrame | None]:
+    """Source ``Dataset``, plus the bridge when the ticker pushdown already built it with ``bridge_builder``."""
+    if catalog is None:
+        catalog = source_catalog(global_engine, fx_engine)
+    ft_cols = resolve_ft_columns(
+        catalog.columns(global_engine, "ft_sector_allocation"),
+        catalog.columns(global_engine, "ft_region_allocation"),
+        catalog.columns(global_engine, "ft_avg_fund_return"),
     )
+    has_fx_table = catalog.has_table(fx_engine, FX_TABLE)
 
-    thai_nav_aum = load_df(
-        thai_engine,
-        """
-        WITH ranked AS (
-            SELECT
-                fund_code,
-                nav_date,
-                aum,
-                ROW_NUMBER() OVER (
-                    PARTITION BY fund_code
-                    ORDER BY (aum IS NOT NULL) DESC, nav_date DESC
-                ) AS rn
-            FROM funds_daily
+    bridge = None
+    queries = source_queries(thai_engine, global_engine, fx_engine, ft_cols, has_fx_table)
+    if incremental:
+        if mart_engine is None:
+            raise ValueError("incremental loading needs mart_engine to keep watermarks and state")
+        # Imported here: incremental builds on SourceQuery/run_queries from this module.
+        from .incremental import incremental_sources, load_incremental
+
+        frames = load_incremental(
+            queries,
+            incremental_sources(ft_cols),
+            mart_engine,
+            parallel=parallel,
+            workers_per_engine=workers_per_engine,
+            cache=cache,
         )
-        SELECT fund_code, nav_date AS nav_as_of_date, aum
-        FROM ranked
-        WHERE rn = 1
-        """,
-    )
+    elif ticker_pushdown and LOOKTHROUGH_MAX_DEPTH <= 1:
+        # Nested look-through needs holdings of masters that are not bridged themselves.
+        frames, bridge = _load_two_phase(
+            thai_engine,
+            global_engine,
+            fx_engine,
+            ft_cols,
+            has_fx_table,
+            parallel=parallel,
+            workers_per_engine=workers_per_engine,
+            cache=cache,
+            bridge_builder=bridge_builder,
+            compact_dtypes=compact_dtypes,
+        )
+    else:
+        frames = run_queries(queries, parallel=parallel, workers_per_engine=workers_per_engine, cache=cache)
+
+    frames = _with_fx_placeholder(frames)
+    if compact_dtypes:
+        frames = compact_frames(frames)
+        if bridge is not None:
+            # Phase-2 rows widen the key categories; match them so later merges stay on codes.
+            bridge = align_key_dtypes(bridge, frames)
+    return Dataset(**frames), bridge
+
+
+def _with_fx_placeholder(frames: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    if "fx_rates" not in frames:
+        frames["fx_rates"] = pd.DataFrame(
+            columns=["date_rate", "from_ccy", "to_ccy", "rate_to_thb", "source_system"]
+        )
+    return frames
+
+
+FT_DETAIL_FRAMES = ("ft_holdings", "ft_sector", "ft_region", "ft_return")
+BRIDGE_TICKER_TABLE = "tmp_bridge_tickers"
+BRIDGE_TICKER_FILTER = f"ticker IN (SELECT ticker FROM {BRIDGE_TICKER_TABLE})"
 
-    thai_feeder = load_df(
-        thai_engine,
-        """
-        WITH latest AS (
-            SELECT fund_code, MAX(as_of_date) AS as_of_date
-            FROM funds_holding
-            GROUP BY fund_code
+
+def _create_bridge_ticker_table(conn: Connection, tickers: list[str]) -> None:
+    # Copy the column definition from ft_holdings so the IN comparison uses the same collation.
+    if conn.dialect.name == "mysql":
+        conn.exec_driver_sql(f"DROP TEMPORARY TABLE IF EXISTS {BRIDGE_TICKER_TABLE}")
+        conn.exec_driver_sql(
+            f"CREATE TEMPORARY TABLE {BRIDGE_TICKER_TABLE} (INDEX (ticker)) SELECT ticker FROM ft_holdings LIMIT 0"
+        )
+    else:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS temp.{BRIDGE_TICKER_TABLE}")
+        conn.exec_driver_sql(f"CREATE TEMP TABLE {BRIDGE_TICKER_TABLE} AS SELECT ticker FROM ft_holdings WHERE 1 = 0")
+    if tickers:
+        conn.execute(
+            text(f"INSERT INTO {BRIDGE_TICKER_TABLE} (ticker) VALUES (:ticker)"),
+            [{"ticker": t} for t in tickers],
         )
-        SELECT
-            h.fund_code,
-            h.name AS feeder_name,
-            h.percent AS feeder_weight_pct,
-            h.as_of_date,
-            h.source_url
-        FROM funds_holding h
-        JOIN latest l
-          ON l.fund_code = h.fund_code
-         AND l.as_of_date = h.as_of_date
-        WHERE h.type = 'Fund'
-        """,
+
+
+def _load_two_phase(
+    thai_engine: Engine,
+    global_engine: Engine,
+    fx_engine: Engine,
+    ft_cols: FtColumns,
+    has_fx_table: bool,
+    parallel: bool,
+    workers_per_engine: int,
+    cache: SnapshotCache | None,
+    bridge_builder: Callable[[Dataset], pd.DataFrame],
+    compact_dtypes: bool,
+) -> tuple[dict[str, pd.DataFrame], pd.DataFrame]:
+    """Load the Thai side and ``ft_static`` first, then only FT detail rows of bridged tickers.
+
+    The bridge ticker set is pushed to the FT server through a session temp table, so
+    ``ft_holdings``/``ft_sector``/``ft_region``/``ft_return`` transfer only mapped masters. Both
+    phases run on the same connection and snapshot per engine. Returns the frames and the bridge.
+    """
+    queries = source_queries(thai_engine, global_engine, fx_engine, ft_cols, has_fx_table)
+    with snapshot_connections([q.engine for q in queries]) as connections:
+        phase1 = [q for q in queries if q.name not in FT_DETAIL_FRAMES]
+        frames = _with_fx_placeholder(
+            run_queries(
+                phase1, parallel=parallel, workers_per_engine=workers_per_engine, cache=cache, connections=connections
+            )
+        )
+        bridge = _phase_one_bridge(frames, bridge_builder, compact_dtypes)
+        frames.update(
+            run_queries(
+                _detail_queries(thai_engine, global_engine, fx_engine, ft_cols, has_fx_table, bridge),
+                parallel=parallel,
+                workers_per_engine=workers_per_engine,
+                cache=cache,
+                connections=connections,
+            )
+        )
+    return frames, bridge
+
+
+def _phase_one_bridge(
+    frames: dict[str, pd.DataFrame], bridge_builder: Callable[[Dataset], pd.DataFrame], compact_dtypes: bool
+) -> pd.DataFrame:
+    # The bridge reads only phase-1 frames; the FT detail frames are still empty.
+    phase1 = {**frames, **{name: pd.DataFrame() for name in FT_DETAIL_FRAMES}}
+    return bridge_builder(Dataset(**(compact_frames(phase1) if compact_dtypes else phase1)))
+
+
+def _detail_queries(
+    thai_engine: Engine,
+    global_engine: Engine,
+    fx_engine: Engine,
+    ft_cols: FtColumns,
+    has_fx_table: bool,
+    bridge: pd.DataFrame,
+) -> list[SourceQuery]:
+    """FT detail queries restricted to the bridge tickers (pushed through ``BRIDGE_TICKER_TABLE``)."""
+    tickers = sorted(set(bridge["ticker"].dropna().astype(str)))
+    digest = hashlib.sha1("\n".join(tickers).encode("utf-8")).hexdigest()
+    print(f"Bridge resolved {len(tickers)} FT tickers; loading their detail rows only")
+
+    setup = partial(_create_bridge_ticker_table, tickers=tickers)
+    filtered = source_queries(
+        thai_engine, global_engine, fx_engine, ft_cols, has_fx_table, ticker_filter=BRIDGE_TICKER_FILTER
     )
+    phase2 = []
+    for q in filtered:
+        if q.name in FT_DETAIL_FRAMES:
+            # The digest is part of the SQL text so cached snapshots are keyed by the ticker set.
+            q.sql = f"/* bridge tickers: {len(tickers)} sha1:{digest} */\n{q.sql}"
+            q.session_setup = setup
+            phase2.append(q)
+    return phase2
+
+
+def _where(*conditions: str) -> str:
+    conditions = tuple(c for c in conditions if c)
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
 
-    ft_static = load_df(
-        global_engine,
-        """
-        WITH ranked AS (
+def source_queries(
+    thai_engine: Engine,
+    global_engine: Engine,
+    fx_engine: Engine,
+    ft_cols: FtColumns,
+    has_fx_table: bool,
+    ticker_filter: str = "",
+    as_of_date: date | None = None,
+) -> list[SourceQuery]:
+    """Source queries in load order.
+
+    ``ticker_filter`` (an SQL condition) restricts the FT detail tables by ticker. With ``as_of_date``
+    the snapshot sources (NAV, feeder, FT holdings/allocations/returns) pick their latest rows on or
+    before that date instead of the latest overall; master data, ``ft_static`` and FX are unaffected.
+    """
+    params: dict = {}
+    as_of = ""
+    if as_of_date is not None:
+        # Exclusive upper bound, so DATETIME scrape columns keep rows from later that day.
+        params = {"as_of_end": as_of_date + timedelta(days=1)}
+        as_of = "{col} < :as_of_end"
+    queries = [
+        SourceQuery(
+            "thai_funds",
+            thai_engine,
+            """
+            SELECT fund_code, full_name_th, full_name_en, amc, category, currency, country
+            FROM funds_master_info
+            """,
+        ),
+        SourceQuery(
+            "thai_isin",
+            thai_engine,
+            """
+            SELECT fund_code, UPPER(TRIM(code)) AS isin_code
+            FROM funds_codes
+            WHERE type = 'ISIN' AND code IS NOT NULL AND TRIM(code) <> ''
+            """,
+        ),
+        SourceQuery(
+            "thai_nav_aum",
+            thai_engine,
+            f"""
+            WITH ranked AS (
+                SELECT
+                    fund_code,
+                    nav_date,
+                    aum,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY fund_code
+                        ORDER BY (aum IS NOT NULL) DESC, nav_date DESC
+                    ) AS rn
+                FROM funds_daily
+                {_where(as_of.format(col="nav_date"))}
+            )
+            SELECT fund_code, nav_date AS nav_as_of_date, aum
+            FROM ranked
+            WHERE rn = 1
+            """,
+            params=params,
+            fingerprint=("funds_daily", "nav_date"),
+        ),
+        SourceQuery(
+            "thai_feeder",
+            thai_engine,
+            f"""
+            WITH latest AS (
+                SELECT fund_code, MAX(as_of_date) AS as_of_date
+                FROM funds_holding
+                {_where(as_of.format(col="as_of_date"))}
+                GROUP BY fund_code
+            )
+            SELECT
+                h.fund_code,
+                h.name AS feeder_name,
+                h.percent AS feeder_weight_pct,
+                h.as_of_date,
+                h.source_url
+            FROM funds_holding h
+            JOIN latest l
+              ON l.fund_code = h.fund_code
+             AND l.as_of_date = h.as_of_date
+            WHERE h.type = 'Fund'
+            """,
+            params=params,
+            fingerprint=("funds_holding", "as_of_date"),
+        ),
+        SourceQuery(
+            "ft_static",
+            global_engine,
+            """
+            WITH ranked AS (
+                SELECT
+                    ft_ticker,
+                    ticker,
+                    name,
+                    ticker_type,
+                    UPPER(TRIM(isin_number)) AS isin_number,
+                    date_scraper,
+                    assets_aum_full_value,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY ft_ticker
+                        ORDER BY date_scraper DESC, created_at DESC
+                    ) AS rn
+                FROM ft_static_detail
+                WHERE ft_ticker IS NOT NULL
+            )
             SELECT
                 ft_ticker,
                 ticker,
                 name,
                 ticker_type,
-                UPPER(TRIM(isin_number)) AS isin_number,
+                isin_number,
                 date_scraper,
-                assets_aum_full_value,
-                ROW_NUMBER() OVER (
-                    PARTITION BY ft_ticker
-                    ORDER BY date_scraper DESC, created_at DESC
-                ) AS rn
-            FROM ft_static_detail
-            WHERE ft_ticker IS NOT NULL
-        )
-        SELECT
-            ft_ticker,
-            ticker,
-            name,
-            ticker_type,
-            isin_number,
-            date_scraper,
-            assets_aum_full_value
-        FROM ranked
-        WHERE rn = 1
-        """,
-    )
-
-    ft_holdings = load_df(
-        global_engine,
-        """
-        WITH latest AS (
-            SELECT ticker, MAX(date_scraper) AS date_scraper
-            FROM ft_holdings
-            GROUP BY ticker
-        )
-        SELECT
-            h.ticker,
-            h.holding_name,
-            h.holding_ticker,
-            h.holding_type,
-            h.portfolio_weight_pct,
-            h.date_scraper
-        FROM ft_holdings h
-        JOIN latest l
-          ON l.ticker = h.ticker
-         AND l.date_scraper = h.date_scraper
-        WHERE h.allocation_type = 'top_10_holdings'
-        """,
-    )
-
-    sector_cols = table_columns(global_engine, "ft_sector_allocation")
-    sector_category_col = "category_name" if "category_name" in sector_cols else "sector_name"
-    sector_weight_col = "weight_pct" if "weight_pct" in sector_cols else "sector_weight_pct"
-    ft_sector = load_df(
-        global_engine,
-        f"""
-        WITH latest AS (
-            SELECT ticker, MAX(date_scraper) AS date_scraper
-            FROM ft_sector_allocation
-            GROUP BY ticker
-        )
-        SELECT
-            a.ticker,
-            a.{sector_category_col} AS category_name,
-            a.{sector_weight_col} AS weight_pct,
-            a.date_scraper
-        FROM ft_sector_allocation a
-        JOIN latest l
-          ON l.ticker = a.ticker
-         AND l.date_scraper = a.date_scraper
-        """,
-    )
+                assets_aum_full_value
+            FROM ranked
+            WHERE rn = 1
+            """,
+            fingerprint=("ft_static_detail", "created_at"),
+        ),
+        SourceQuery(
+            "ft_holdings",
+            global_engine,
+            f"""
+            WITH latest AS (
+                SELECT ticker, MAX(date_scraper) AS date_scraper
+                FROM ft_holdings
+                {_where(ticker_filter, as_of.format(col="date_scraper"))}
+                GROUP BY ticker
+            )
+            SELECT
+                h.ticker,
+                h.holding_name,
+                h.holding_ticker,
+                h.holding_type,
+                h.portfolio_weight_pct,
+                h.date_scraper
+            FROM ft_holdings h
+            JOIN latest l
+              ON l.ticker = h.ticker
+             AND l.date_scraper = h.date_scraper
+            WHERE h.allocation_type = 'top_10_holdings'
+            """,
+            params=params,
+            fingerprint=("ft_holdings", "date_scraper"),
+        ),
+    ]
 
-    region_cols = table_columns(global_engine, "ft_region_allocation")
-    region_category_col = "category_name" if "category_name" in region_cols else "region_name"
-    region_weight_col = "weight_pct" if "weight_pct" in region_cols else "region_weight_pct"
-    ft_region = load_df(
-        global_engine,
-        f"""
-        WITH latest AS (
-            SELECT ticker, MAX(date_scraper) AS date_scraper
-            FROM ft_region_allocation
-            GROUP BY ticker
+    queries.append(
+        SourceQuery(
+            "ft_sector",
+            global_engine,
+            f"""
+            WITH latest AS (
+                SELECT ticker, MAX(date_scraper) AS date_scraper
+                FROM ft_sector_allocation
+                {_where(ticker_filter, as_of.format(col="date_scraper"))}
+                GROUP BY ticker
+            )
+            SELECT
+                a.ticker,
+                a.{ft_cols.sector_category} AS category_name,
+                a.{ft_cols.sector_weight} AS weight_pct,
+                a.date_scraper
+            FROM ft_sector_allocation a
+            JOIN latest l
+              ON l.ticker = a.ticker
+             AND l.date_scraper = a.date_scraper
+            """,
+            params=params,
+            fingerprint=("ft_sector_allocation", "date_scraper"),
         )
-        SELECT
-            a.ticker,
-            a.{region_category_col} AS category_name,
-            a.{region_weight_col} AS weight_pct,
-            a.date_scraper
-        FROM ft_region_allocation a
-        JOIN latest l
-          ON l.ticker = a.ticker
-         AND l.date_scraper = a.date_scraper
-        """,
     )
 
-    return_cols = table_columns(global_engine, "ft_avg_fund_return")
-    has_ft_ticker = "ft_ticker" in return_cols
-    return_key = "ft_ticker" if has_ft_ticker else "ticker"
-    return_date_col = "date_scraper" if "date_scraper" in return_cols else "as_of_date"
-    return_1y_col = "avg_fund_return_1y" if "avg_fund_return_1y" in return_cols else "avg_return_1y_pct"
-    return_3y_col = "avg_fund_return_3y" if "avg_fund_return_3y" in return_cols else "NULL"
-    return_created_col = "created_at" if "created_at" in return_cols else return_date_col
-
-    ft_return = load_df(
-        global_engine,
-        f"""
-        WITH ranked AS (
+    queries.append(
+        SourceQuery(
+            "ft_region",
+            global_engine,
+            f"""
+            WITH latest AS (
+                SELECT ticker, MAX(date_scraper) AS date_scraper
+                FROM ft_region_allocation
+                {_where(ticker_filter, as_of.format(col="date_scraper"))}
+                GROUP BY ticker
+            )
             SELECT
-                {return_key} AS key_ticker,
-                ticker,
-                {return_1y_col} AS avg_fund_return_1y,
-                {return_3y_col} AS avg_fund_return_3y,
-                {return_date_col} AS date_scraper,
-                ROW_NUMBER() OVER (
-                    PARTITION BY {return_key}
-                    ORDER BY {return_date_col} DESC, {return_created_col} DESC
-                ) AS rn
-            FROM ft_avg_fund_return
+                a.ticker,
+                a.{ft_cols.region_category} AS category_name,
+                a.{ft_cols.region_weight} AS weight_pct,
+                a.date_scraper
+            FROM ft_region_allocation a
+            JOIN latest l
+              ON l.ticker = a.ticker
+             AND l.date_scraper = a.date_scraper
+            """,
+            params=params,
+            fingerprint=("ft_region_allocation", "date_scraper"),
         )
-        SELECT
-            key_ticker AS ft_ticker,
-            ticker,
-            avg_fund_return_1y,
-            avg_fund_return_3y,
-            date_scraper
-        FROM ranked
-        WHERE rn = 1
-        """,
     )
 
-    if table_exists(fx_engine, FX_TABLE):
-        fx_rates = load_df(
-            fx_engine,
+    queries.append(
+        SourceQuery(
+            "ft_return",
+            global_engine,
             f"""
+            WITH ranked AS (
+                SELECT
+                    {ft_cols.return_key} AS key_ticker,
+                    ticker,
+                    {ft_cols.return_1y} AS avg_fund_return_1y,
+                    {ft_cols.return_3y} AS avg_fund_return_3y,
+                    {ft_cols.return_date} AS date_scraper,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY {ft_cols.return_key}
+                        ORDER BY {ft_cols.return_date} DESC, {ft_cols.return_created} DESC
+                    ) AS rn
+                FROM ft_avg_fund_return
+                {_where(ticker_filter, as_of.format(col=ft_cols.return_date))}
+            )
             SELECT
-                date_rate,
-                UPPER(TRIM(from_ccy)) AS from_ccy,
-                UPPER(TRIM(to_ccy)) AS to_ccy,
-                rate_to_thb,
-                source_system
-            FROM {FX_TABLE}
-            WHERE to_ccy = 'THB'
+                key_ticker AS ft_ticker,
+                ticker,
+                avg_fund_return_1y,
+                avg_fund_return_3y,
+                date_scraper
+            FROM ranked
+            WHERE rn = 1
             """,
+            params=params,
+            fingerprint=("ft_avg_fund_return", ft_cols.return_created),
         )
-    else:
-        fx_rates = pd.DataFrame(
-            columns=["date_rate", "from_ccy", "to_ccy", "rate_to_thb", "source_system"]
+    )
+
+    if has_fx_table:
+        queries.append(
+            SourceQuery(
+                "fx_rates",
+                fx_engine,
+                f"""
+                SELECT
+                    date_rate,
+                    UPPER(TRIM(from_ccy)) AS from_ccy,
+                    UPPER(TRIM(to_ccy)) AS to_ccy,
+                    rate_to_thb,
+                    source_system
+                FROM {FX_TABLE}
+                WHERE to_ccy = 'THB'
+                """,
+                fingerprint=(FX_TABLE, "updated_at"),
+            )
         )
 
-    return Dataset(
-        thai_funds=thai_funds,
-        thai_isin=thai_isin,
-        thai_nav_aum=thai_nav_aum,
-        thai_feeder=thai_feeder,
-        ft_static=ft_static,
-        ft_holdings=ft_holdings,
-        ft_sector=ft_sector,
-        ft_region=ft_region,
-        ft_return=ft_return,
-        fx_rates=fx_rates,
-    )
+    return queries
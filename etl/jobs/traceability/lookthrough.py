@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from .config import LOOKTHROUGH_FUND_TYPES
+from .exposure import ExposureKernel, join_positions
+from .utils import clean_upper, to_float
+
+STATIC_KEY_COLUMNS = ("ticker", "ft_ticker", "isin_number")
+
+
+def _resolve_fund_holdings(
+    holdings: pd.DataFrame, static: pd.DataFrame, masters: pd.Index, fund_types: frozenset[str]
+) -> np.ndarray:
+    """Master code each fund-type holding resolves to (``-1`` for other or unresolved holdings).
+
+    The holding ticker, and its part before ``:`` (``LU1234567890:USD``), is looked up against
+    the master tickers and the ``ticker`` / ``ft_ticker`` / ``isin_number`` of ``ft_static``.
+    """
+    keys = [pd.Series(masters.astype(str).str.strip().str.upper())]
+    codes = [np.arange(len(masters))]
+    if "ticker" in static:
+        static_codes = masters.get_indexer(static["ticker"])
+        for col in STATIC_KEY_COLUMNS:
+            if col in static:
+                keys.append(clean_upper(static[col]).astype(str).reset_index(drop=True))
+                codes.append(static_codes)
+    lookup = pd.DataFrame({"key": pd.concat(keys, ignore_index=True), "code": np.concatenate(codes)})
+    lookup = lookup[(lookup["key"] != "") & (lookup["code"] >= 0)].drop_duplicates("key", keep="first")
+    index = pd.Index(lookup["key"])
+    target_codes = lookup["code"].to_numpy()
+
+    ticker = clean_upper(holdings["holding_ticker"]).astype(str)
+    pos = index.get_indexer(ticker)
+    pos = np.where(pos >= 0, pos, index.get_indexer(ticker.str.split(":").str[0]))
+    is_fund = clean_upper(holdings["holding_type"]).astype(str).isin(fund_types).to_numpy()
+    return np.where(is_fund & (pos >= 0), target_codes[pos], -1)
+
+
+def expand_fund_holdings(
+    holdings: pd.DataFrame,
+    static: pd.DataFrame,
+    roots: pd.Index,
+    max_depth: int,
+    min_weight_pct: float = 0.0,
+    fund_types: frozenset[str] = LOOKTHROUGH_FUND_TYPES,
+    master_key: str = "ticker",
+    weight_col: str = "portfolio_weight_pct",
+) -> pd.DataFrame:
+    """Holdings of the ``roots`` masters with fund-type holdings replaced by their own holdings.
+
+    Expansion runs one level at a time over the whole frontier of (root, master, weight) rows.
+    A fund holding stays a terminal row when it does not resolve to a master with holdings, when
+    ``max_depth`` is reached, when its weight in the root is below ``min_weight_pct``, or when it
+    points inside its own strongly connected component of the holding graph (a cycle). Returned
+    rows carry the root master as ``master_key``, the effective weight in the root as
+    ``weight_col`` and the hop count as ``lookthrough_depth`` (1 = the root's own holdings).
+    """
+    holdings = holdings.reset_index(drop=True)
+    if max_depth <= 1:
+        return holdings.assign(lookthrough_depth=1)
+
+    item_master, masters = pd.factorize(holdings[master_key])
+    n = len(masters)
+    weights = to_float(holdings[weight_col]).fillna(0.0).to_numpy(dtype=float)
+    targets = _resolve_fund_holdings(holdings, static, masters, fund_types)
+
+    edges = (targets >= 0) & (item_master >= 0)
+    graph = sparse.csr_matrix((np.ones(edges.sum()), (item_master[edges], targets[edges])), shape=(n, n))
+    _, component = csgraph.connected_components(graph, directed=True, connection="strong")
+    cyclic = edges & (component[np.where(edges, item_master, 0)] == component[np.where(edges, targets, 0)])
+    if cyclic.any():
+        print(f"Look-through: {int(cyclic.sum())} fund holdings close a cycle and are kept as terminal rows")
+    expandable = edges & ~cyclic
+
+    root_codes = np.unique(masters.get_indexer(roots))
+    f_root = f_master = root_codes[root_codes >= 0]
+    f_weight = np.ones(len(f_root))
+    rows, root_of, pct_of, depth_of = [], [], [], []
+    depth = 1
+    while len(f_root):
+        f_idx, i_idx = join_positions(f_master, item_master, n)
+        pct = f_weight[f_idx] * weights[i_idx]
+        expand = expandable[i_idx] & (pct >= min_weight_pct) & (depth < max_depth)
+        rows.append(i_idx[~expand])
+        root_of.append(f_root[f_idx][~expand])
+        pct_of.append(pct[~expand])
+        depth_of.append(np.full(int((~expand).sum()), depth))
+
+        # Paths reaching the same master from the same root merge into one frontier row.
+        key = f_root[f_idx][expand] * n + targets[i_idx][expand]
+        frontier, inverse = np.unique(key, return_inverse=True)
+        f_weight = np.bincount(inverse, weights=pct[expand] / 100.0, minlength=len(frontier))
+        f_root, f_master = frontier // n, frontier % n
+        depth += 1
+
+    rows = np.concatenate(rows)
+    # The first holding row of each master carries its key value in the original dtype.
+    codes, first_row = np.unique(item_master, return_index=True)
+    first_row = first_row[codes >= 0]
+    out = holdings.take(rows).reset_index(drop=True)
+    out[master_key] = holdings[master_key].array.take(first_row[np.concatenate(root_of)])
+    out[weight_col] = np.concatenate(pct_of)
+    out["lookthrough_depth"] = np.concatenate(depth_of)
+    return out
+
+
+class LookThrough:
+    """Fund x master x item look-through as sparse matrix products.
+
+    ``W`` (funds x masters) holds the normalized feeder weights of the kernel's bridge; an item
+    table becomes ``H`` (masters x item groups) and ``W @ H`` gives the effective fund x item
+    weights. Master keys and per-fund AUM come from the ``ExposureKernel`` so both paths agree.
+    """
+
+    def __init__(self, kernel: ExposureKernel) -> None:
+        self.kernel = kernel
+        fund_codes, self.funds = pd.factorize(kernel.bridge["fund_code"], use_na_sentinel=False)
+        shape = (len(self.funds), len(kernel.masters))
+        matched = kernel.master_codes >= 0
+        self.W = sparse.csr_matrix(
+            (kernel.weight_norm[matched], (fund_codes[matched], kernel.master_codes[matched])), shape=shape
+        )
+        # Every bridge row of a fund carries the same NAV row, so any of them gives the fund's AUM.
+        self.aum = np.zeros(len(self.funds))
+        self.aum[fund_codes] = kernel.aum
+
+    def item_matrix(self, master_codes: np.ndarray, group_codes: np.ndarray, weights: np.ndarray, n_groups: int):
+        """Masters x groups CSR matrix of item weights as fractions; rows with a ``-1`` code are dropped."""
+        keep = (master_codes >= 0) & (group_codes >= 0)
+        return sparse.csr_matrix(
+            (weights[keep] / 100.0, (master_codes[keep], group_codes[keep])),
+            shape=(len(self.kernel.masters), n_groups),
+        )
+
+    def effective(self, H) -> tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """Effective fund x group weights (pct) and THB values for an item matrix from ``item_matrix``."""
+        weights = (self.W @ H).tocsr()
+        values = sparse.diags(self.aum) @ weights / 100.0
+        return weights, values.tocsr()
+
+    def group_totals(
+        self, items: pd.DataFrame, weight_col: str, keys: list[str], first: tuple[str, ...] = ()
+    ) -> pd.DataFrame:
+        """``total_true_weight_pct`` / ``total_true_value_thb`` per ``keys`` group of ``items``.
+
+        Same rows, key order and ``first`` values as grouping the exploded exposure rows with
+        ``groupby(keys, observed=True)``: only groups reached by a bridged master, missing keys
+        dropped, ``first`` being the first non-missing value in exposure-row order.
+        """
+        items = items.reset_index(drop=True)
+        master_codes = self.kernel.masters.get_indexer(items[self.kernel.master_key])
+        group_codes = items.groupby(keys, observed=True, sort=True).ngroup().to_numpy()
+        reached = (master_codes >= 0) & (group_codes >= 0)
+
+        # Renumber the reached groups densely, keeping the sorted-key order of ngroup.
+        present, dense = np.unique(group_codes[reached], return_inverse=True)
+        codes = np.full(len(items), -1)
+        codes[reached] = dense
+        weights = to_float(items[weight_col]).fillna(0.0).to_numpy(dtype=float)
+
+        H = self.item_matrix(master_codes, codes, weights, len(present))
+        eff_weights, eff_values = self.effective(H)
+
+        # Exposure rows run over bridge rows and then item rows; master codes follow the first
+        # bridge row of each master, so (master code, item position) orders rows the same way.
+        order = np.lexsort((np.arange(len(items)), master_codes))
+        order = order[reached[order]]
+        first_row = order[np.unique(codes[order], return_index=True)[1]]
+
+        data = {key: items[key].take(first_row).reset_index(drop=True) for key in keys}
+        data["total_true_weight_pct"] = np.asarray(eff_weights.sum(axis=0)).ravel()
+        data["total_true_value_thb"] = np.asarray(eff_values.sum(axis=0)).ravel()
+        for col in first:
+            named = order[items[col].notna().to_numpy()[order]]
+            pos = np.full(len(present), -1)
+            found, idx = np.unique(codes[named], return_index=True)
+            pos[found] = named[idx]
+            data[col] = pd.Series(items[col].array.take(pos, allow_fill=True), name=col)
+        return pd.DataFrame(data)
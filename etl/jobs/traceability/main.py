@@ -1,36 +1,157 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+import argparse
+
+import pandas as pd
 from sqlalchemy.engine.url import make_url
 
-from .calculations import build_exposure_tables
-from .config import FX_DB_URI, GLOBAL_DB_URI, MART_DB_URI, THAI_DB_URI
+from etl.common.db import get_engine
+
+from .cache import SnapshotCache
+from .calculations import FACT_TABLES, build_exposure_tables
+from .config import (
+    BUILD_CUBE,
+    BUILD_DELTA,
+    BUILD_ENGINE,
+    BUILD_SHARDS,
+    FX_DB_URI,
+    GLOBAL_DB_URI,
+    MART_DB_URI,
+    SNAPSHOT_CACHE,
+    SNAPSHOT_CACHE_DIR,
+    SNAPSHOT_CACHE_MAX_MB,
+    THAI_DB_URI,
+)
+from .delta import build_delta
+from .duckdb_engine import build_bridge_duckdb, build_exposure_tables_duckdb
+from .instrumentation import RunReport
 from .loaders import create_db_if_needed, load_source_data
 from .mapping import build_bridge
+from .polars_engine import build_bridge_polars, build_exposure_tables_polars
+from .rollup import CUBE_SQL_DTYPES, build_rollup_tables, create_cube_indexes, load_cube_facts
+from .schema import source_catalog
+from .securities import SECURITY_TABLE, SecurityMaster
+from .sharded import build_exposure_tables_sharded
 from .writer import create_views, print_summary, write_tables
 
+# BUILD_ENGINE -> (bridge builder, full exposure build); delta and sharded builds always run on pandas.
+ENGINES = {
+    "pandas": (build_bridge, build_exposure_tables),
+    "duckdb": (build_bridge_duckdb, build_exposure_tables_duckdb),
+    "polars": (build_bridge_polars, build_exposure_tables_polars),
+}
+
 
-def main() -> int:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build traceability mart for Thai funds effective exposure.")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write local source snapshots")
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="query every source, overwrite local snapshots and re-read source schemas",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="with BUILD_DELTA, recompute every fund and reset the stored fingerprints",
+    )
+    parser.add_argument("--profile", action="store_true", help="write a cProfile stats file per stage next to the run report")
+    return parser.parse_args(argv)
+
+
+def _build(args: argparse.Namespace, report: RunReport, bridge_builder, exposure_builder) -> dict[str, pd.DataFrame]:
     print("Creating mart database if needed...")
     create_db_if_needed(MART_DB_URI)
 
-    thai_engine = create_engine(THAI_DB_URI)
-    global_engine = create_engine(GLOBAL_DB_URI)
-    mart_engine = create_engine(MART_DB_URI)
-    fx_engine = create_engine(FX_DB_URI)
+    thai_engine = get_engine(THAI_DB_URI)
+    global_engine = get_engine(GLOBAL_DB_URI)
+    mart_engine = get_engine(MART_DB_URI)
+    fx_engine = get_engine(FX_DB_URI)
+
+    cache = None
+    if SNAPSHOT_CACHE and not args.no_cache:
+        cache = SnapshotCache(SNAPSHOT_CACHE_DIR, SNAPSHOT_CACHE_MAX_MB * 1024 * 1024, refresh=args.refresh)
+
+    with report.stage("load") as stage:
+        print("Loading raw datasets...")
+        catalog = source_catalog(global_engine, fx_engine, refresh=args.refresh)
+        ds, bridge = load_source_data(
+            thai_engine,
+            global_engine,
+            fx_engine,
+            mart_engine=mart_engine,
+            cache=cache,
+            catalog=catalog,
+            bridge_builder=bridge_builder,
+        )
+        stage.count_out(ds)
+
+    with report.stage("bridge") as stage:
+        print("Building bridge and exposure tables...")
+        stage.count_in({name: getattr(ds, name) for name in ("thai_feeder", "ft_static", "thai_isin")})
+        if bridge is None:
+            bridge = bridge_builder(ds)
+        stage.count_out({"bridge_thai_master": bridge})
+
+    with report.stage("calculate") as stage:
+        stage.count_in(ds)
+        stage.count_in({"bridge_thai_master": bridge})
+        securities = SecurityMaster.load(mart_engine)
+        if BUILD_DELTA:
+            # The delta build writes its own fact rows and aggregates.
+            tables = build_delta(ds, bridge, mart_engine, rebuild=args.rebuild, securities=securities)
+        elif BUILD_SHARDS > 1:
+            tables = build_exposure_tables_sharded(ds, bridge, BUILD_SHARDS, securities=securities)
+        else:
+            tables = exposure_builder(ds, bridge, securities)
+        stage.count_out(tables)
+
+    with report.stage("write") as stage:
+        if not BUILD_DELTA:
+            print("Writing materialized tables...")
+            stage.count_in(tables)
+            write_tables(mart_engine, tables)
+            stage.count_out(tables)
+        if securities.added:
+            print(f"Security master: {len(securities.table)} securities ({securities.added} new)")
+            securities.write(mart_engine)
+            stage.count_out({SECURITY_TABLE: securities.table})
+
+    if BUILD_CUBE:
+        with report.stage("cube") as stage:
+            print("Building rollup cube...")
+            # A delta build holds only the recomputed funds' facts; the cube needs all of them.
+            cube_facts = load_cube_facts(mart_engine) if BUILD_DELTA else tables
+            stage.count_in({name: cube_facts[name] for name in FACT_TABLES.values()})
+            cube = build_rollup_tables(ds.thai_funds, cube_facts)
+            write_tables(mart_engine, cube, column_types=CUBE_SQL_DTYPES)
+            create_cube_indexes(mart_engine)
+            stage.count_out(cube)
 
-    print("Loading raw datasets...")
-    ds = load_source_data(thai_engine, global_engine, fx_engine)
+    with report.stage("views"):
+        print("Creating dashboard views...")
+        create_views(mart_engine)
+    return tables
 
-    print("Building bridge and exposure tables...")
-    bridge = build_bridge(ds)
-    tables = build_exposure_tables(ds, bridge)
 
-    print("Writing materialized tables...")
-    write_tables(mart_engine, tables)
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if BUILD_ENGINE not in ENGINES:
+        raise ValueError(f"unknown BUILD_ENGINE {BUILD_ENGINE!r}; expected one of {', '.join(ENGINES)}")
+    bridge_builder, exposure_builder = ENGINES[BUILD_ENGINE]
 
-    print("Creating dashboard views...")
-    create_views(mart_engine)
+    report = RunReport(
+        "build_traceability_mart",
+        profile=args.profile,
+        engine=BUILD_ENGINE,
+        delta=BUILD_DELTA,
+        shards=BUILD_SHARDS,
+        cube=BUILD_CUBE,
+    )
+    try:
+        tables = _build(args, report, bridge_builder, exposure_builder)
+    finally:
+        report.write()
 
     print_summary(tables)
     print("Mart database:", make_url(MART_DB_URI).database)
@@ -1,10 +1,45 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
+from .config import MAP_FUZZY_MIN_SCORE, MAP_FUZZY_NAMES
 from .models import Dataset
+from .names import NameIndex
 from .utils import extract_token, to_float
 
+BRIDGE_COLUMNS = [
+    "fund_code",
+    "feeder_name",
+    "feeder_weight_pct",
+    "as_of_date",
+    "token",
+    "token_isin",
+    "ft_ticker",
+    "ticker",
+    "name",
+    "ticker_type",
+    "map_method",
+]
+MAP_METHOD_PRIORITY = {"feeder_holding_isin": 1, "thai_fund_isin_fallback": 2, "feeder_name_fuzzy": 3}
+STATIC_MATCH_COLUMNS = ["ft_ticker", "ticker", "name", "ticker_type"]
+
+
+def match_feeder_names(feeder_names: pd.Series, static: pd.DataFrame, min_score: float = MAP_FUZZY_MIN_SCORE) -> np.ndarray:
+    """Position in ``static`` of the FT row whose name best matches each feeder name (``-1``: none).
+
+    Rows without ``ft_ticker`` are not candidates. Among equally good names the preferred row wins
+    as in the Thai fund ISIN fallback: Fund, then ETF, then the larger ``assets_aum_full_value``.
+    """
+    pref = static["ticker_type"].map({"Fund": 1, "ETF": 2}).astype(float).fillna(9).to_numpy()
+    aum = to_float(static["assets_aum_full_value"]).fillna(0.0).to_numpy()
+    order = np.lexsort((np.arange(len(static)), -aum, pref))
+    order = order[static["ft_ticker"].notna().to_numpy()[order]]
+    if not len(order):
+        return np.full(len(feeder_names), -1, dtype=np.int64)
+    pos, _ = NameIndex(static["name"].iloc[order]).match(feeder_names, min_score)
+    return np.where(pos >= 0, order[np.maximum(pos, 0)], -1)
+
 
 def build_bridge(ds: Dataset) -> pd.DataFrame:
     feeder = ds.thai_feeder.copy()
@@ -37,7 +72,7 @@ def build_bridge(ds: Dataset) -> pd.DataFrame:
     thai_isin_map = thai_isin_map[~thai_isin_map["fund_code"].isin(feeder_mapped_funds)].copy()
     thai_isin_map["map_method"] = "thai_fund_isin_fallback"
     thai_isin_map["assets_aum_full_value"] = to_float(thai_isin_map["assets_aum_full_value"]).fillna(0.0)
-    thai_isin_map["ticker_pref"] = thai_isin_map["ticker_type"].map({"Fund": 1, "ETF": 2}).fillna(9)
+    thai_isin_map["ticker_pref"] = thai_isin_map["ticker_type"].map({"Fund": 1, "ETF": 2}).astype(float).fillna(9)
     thai_isin_map = (
         thai_isin_map.sort_values(["fund_code", "ticker_pref", "assets_aum_full_value"], ascending=[True, True, False])
         .drop_duplicates(["fund_code"], keep="first")
@@ -47,30 +82,26 @@ def build_bridge(ds: Dataset) -> pd.DataFrame:
     thai_isin_map["feeder_weight_pct"] = 100.0
     thai_isin_map["as_of_date"] = pd.NaT
 
-    bridge_cols = [
-        "fund_code",
-        "feeder_name",
-        "feeder_weight_pct",
-        "as_of_date",
-        "token",
-        "token_isin",
-        "ft_ticker",
-        "ticker",
-        "name",
-        "ticker_type",
-        "map_method",
-    ]
-
-    bridge_feeder = bridge_feeder.reindex(columns=bridge_cols)
+    # Name matching for feeders still unmapped, outside the funds the Thai fund ISIN fallback maps.
+    unmapped = bridge_feeder["ft_ticker"].isna() & ~bridge_feeder["fund_code"].isin(thai_isin_map["fund_code"])
+    if MAP_FUZZY_NAMES and unmapped.any():
+        rows = np.flatnonzero(unmapped.to_numpy())
+        pos = match_feeder_names(bridge_feeder["feeder_name"].iloc[rows], static)
+        hit = bridge_feeder.index[rows[pos >= 0]]
+        for col in STATIC_MATCH_COLUMNS:
+            bridge_feeder.loc[hit, col] = static[col].to_numpy()[pos[pos >= 0]]
+        bridge_feeder.loc[hit, "map_method"] = "feeder_name_fuzzy"
+
+    bridge_feeder = bridge_feeder.reindex(columns=BRIDGE_COLUMNS)
 
     thai_isin_map = thai_isin_map.assign(token=None, token_isin=thai_isin_map["isin_code"])
-    thai_isin_map = thai_isin_map.reindex(columns=bridge_cols)
+    thai_isin_map = thai_isin_map.reindex(columns=BRIDGE_COLUMNS)
 
     bridge = pd.concat([bridge_feeder, thai_isin_map], ignore_index=True)
     bridge["feeder_weight_pct"] = to_float(bridge["feeder_weight_pct"]).fillna(0.0)
 
-    # Prefer feeder_holding_isin over thai_fund_isin when both map to same fund/master pair.
-    bridge["priority"] = bridge["map_method"].map({"feeder_holding_isin": 1, "thai_fund_isin_fallback": 2}).fillna(9)
+    # Prefer feeder_holding_isin over thai_fund_isin (and name matches) when both map to same fund/master pair.
+    bridge["priority"] = bridge["map_method"].map(MAP_METHOD_PRIORITY).fillna(9)
     bridge = bridge.sort_values(["fund_code", "ft_ticker", "priority"]).drop_duplicates(["fund_code", "ft_ticker"], keep="first")
     bridge = bridge.drop(columns=["priority"])
 
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy import sparse
+
+# Word tokens are runs of letters (with their combining marks, e.g. Thai vowels) and digits. ISIN-shaped
+# tokens identify rather than name a fund and are dropped.
+_SEPARATOR_RE = r"[^\p{L}\p{M}\p{N}]+"
+_ISIN_RE = r"^[A-Z]{2}[A-Z0-9]{9}[0-9]$"
+
+
+def _tokens(names) -> tuple[np.ndarray, pa.Array]:
+    """Row position and token of every upper-case word token of the names."""
+    text = pa.array(np.asarray(names, dtype=object), type=pa.string(), from_pandas=True).fill_null("")
+    lists = pc.split_pattern_regex(pc.utf8_upper(text), _SEPARATOR_RE)
+    tokens, rows = pc.list_flatten(lists), pc.list_parent_indices(lists)
+    keep = pc.and_(pc.not_equal(tokens, ""), pc.invert(pc.match_substring_regex(tokens, _ISIN_RE)))
+    return pc.filter(rows, keep).to_numpy().astype(np.int64), pc.filter(tokens, keep)
+
+
+def _tfidf(rows: np.ndarray, codes: np.ndarray, idf: np.ndarray, n_rows: int) -> sparse.csr_matrix:
+    """L2-normalized rows of the binary token matrix weighted by ``idf`` (repeated tokens count once)."""
+    matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, codes)), shape=(n_rows, len(idf)))
+    matrix.data[:] = 1.0
+    matrix = matrix @ sparse.diags(idf)
+    sq_norm = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+    scale = np.divide(1.0, np.sqrt(sq_norm), out=np.zeros(n_rows), where=sq_norm > 0)
+    return (sparse.diags(scale) @ matrix).tocsr()
+
+
+class NameIndex:
+    """Inverted TF-IDF token index over a list of names for batched best-match lookups.
+
+    Names are compared as sets of upper-case word tokens weighted by inverse document frequency;
+    the score is their cosine similarity (1.0 = same tokens). Candidates come from a sparse
+    product over the tokens found in at most ``max_postings`` names, so a query never scans the
+    long posting lists of words like "FUND"; those words still count in the score of every
+    candidate. A query sharing only such common tokens with the indexed names finds no match.
+    Query tokens no indexed name has lower the score like a word the two names do not share.
+    """
+
+    def __init__(self, names: pd.Series, max_postings: int = 1000) -> None:
+        self.size = len(names)
+        rows, tokens = _tokens(names)
+        encoded = tokens.dictionary_encode()
+        self.vocab = encoded.dictionary
+        codes = encoded.indices.to_numpy().astype(np.int64)
+        matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, codes)), shape=(self.size, len(self.vocab)))
+        doc_freq = np.diff(matrix.tocsc().indptr)
+        self.idf = np.log((1.0 + self.size) / (1.0 + doc_freq)) + 1.0
+        self.rare = doc_freq <= max_postings
+
+        matrix = _tfidf(rows, codes, self.idf, self.size)
+        self._rare_t = (matrix @ sparse.diags(self.rare.astype(float))).T.tocsr()
+        self._rare_t.eliminate_zeros()
+        self._common = (matrix @ sparse.diags((~self.rare).astype(float))).tocsr()
+        self._common.eliminate_zeros()
+        self._common_norm = np.sqrt(np.asarray(self._common.multiply(self._common).sum(axis=1)).ravel())
+
+    def _vectors(self, names) -> sparse.csr_matrix:
+        """Query rows over the vocabulary, normalized over all their tokens.
+
+        A token no indexed name has gets the idf of a document frequency of 0. It cannot match,
+        but it still lowers the score, so a name with extra words never matches a shorter one at 1.0.
+        """
+        rows, tokens = _tokens(names)
+        codes = pc.index_in(tokens, value_set=self.vocab).fill_null(-1).to_numpy().astype(np.int64)
+        unknown = codes < 0
+        unknown_codes = pc.filter(tokens, pa.array(unknown)).dictionary_encode().indices.to_numpy().astype(np.int64)
+        codes[unknown] = len(self.vocab) + unknown_codes
+        n_unknown = int(unknown_codes.max()) + 1 if len(unknown_codes) else 0
+        idf = np.append(self.idf, np.full(n_unknown, np.log(1.0 + self.size) + 1.0))
+        return _tfidf(rows, codes, idf, len(names))[:, : len(self.vocab)].tocsr()
+
+    def match(self, names: pd.Series, min_score: float, chunk_rows: int = 2048) -> tuple[np.ndarray, np.ndarray]:
+        """Best indexed position per name and its score; ``-1`` / ``0.0`` when nothing reaches ``min_score``.
+
+        Each distinct name is scored once. Equal scores go to the lowest indexed position.
+        """
+        codes, uniques = pd.factorize(pd.Series(np.asarray(names, dtype=object)))
+        best = np.full(len(uniques) + 1, -1, dtype=np.int64)
+        best_score = np.zeros(len(uniques) + 1)
+        searchable = self.size and len(self.vocab) and len(uniques)
+        queries = self._vectors(uniques) if searchable else sparse.csr_matrix((0, 0))
+        rare = sparse.diags(self.rare.astype(float))
+        common = sparse.diags((~self.rare).astype(float))
+        for start in range(0, queries.shape[0], chunk_rows):
+            chunk = queries[start : start + chunk_rows]
+            candidates = ((chunk @ rare) @ self._rare_t).tocoo()
+            chunk_common = (chunk @ common).tocsr()
+            chunk_norm = np.sqrt(np.asarray(chunk_common.multiply(chunk_common).sum(axis=1)).ravel())
+            q, pos, score = candidates.row, candidates.col, candidates.data
+            # Cauchy-Schwarz bound on the common-token part drops hopeless candidates before exact scoring.
+            ok = score + chunk_norm[q] * self._common_norm[pos] >= min_score
+            q, pos, score = q[ok], pos[ok], score[ok]
+            score = score + np.asarray(chunk_common[q].multiply(self._common[pos]).sum(axis=1)).ravel()
+            ok = score >= min_score
+            q, pos, score = q[ok], pos[ok], score[ok]
+            order = np.lexsort((pos, -score, q))
+            first = order[np.r_[True, q[order][1:] != q[order][:-1]]] if len(order) else order
+            best[start + q[first]] = pos[first]
+            best_score[start + q[first]] = score[first]
+
+        # Code -1 (missing name) picks the trailing no-match entry.
+        return best[codes], best_score[codes]
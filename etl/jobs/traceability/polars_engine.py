@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .calculations import (
+    ALLOCATION_FACT_COLUMNS,
+    FACT_GROUP_KEYS,
+    FACT_TABLES,
+    HOLDING_FIRST_COLUMNS,
+    ITEM_TABLES,
+    STOCK_FACT_COLUMNS,
+    build_aggregate_tables,
+    finish_items,
+    stg_nav_native,
+)
+from .config import FX_ASOF_MAX_DAYS, FX_BASE_CCY, MAP_FUZZY_NAMES
+from .mapping import BRIDGE_COLUMNS, STATIC_MATCH_COLUMNS, match_feeder_names
+from .models import Dataset
+from .securities import SecurityMaster
+
+
+def _require_polars():
+    try:
+        import polars
+    except ImportError as exc:  # pragma: no cover - depends on environment
+        raise RuntimeError("BUILD_ENGINE=polars needs polars (pip install polars)") from exc
+    return polars
+
+
+def _lazy(df: pd.DataFrame, columns: list[str], row_col: str):
+    """Only ``columns`` of ``df`` as a lazy frame plus its row position ``row_col``; categoricals become text.
+
+    The row position drives every tie-break, so results come out in the pandas row order.
+    """
+    pl = _require_polars()
+    import polars.selectors as cs
+
+    frame = pl.from_pandas(df[columns]).lazy()
+    return frame.with_columns((cs.categorical() | cs.by_dtype(pl.Null)).cast(pl.String)).with_row_index(row_col)
+
+
+def _float(col: str):
+    pl = _require_polars()
+    return pl.col(col).cast(pl.Float64, strict=False).fill_nan(None)
+
+
+def _clean_upper(col: str, fill: str = ""):
+    """``utils.clean_upper`` as an expression."""
+    pl = _require_polars()
+    return pl.col(col).cast(pl.String).fill_null(fill).str.strip_chars().str.to_uppercase()
+
+
+def _datetime(col: str, dtype):
+    """``pd.to_datetime(errors="coerce")`` as an expression for a column of ``dtype``."""
+    pl = _require_polars()
+    if isinstance(dtype, pl.Datetime):
+        return pl.col(col)
+    if dtype == pl.Date:
+        return pl.col(col).cast(pl.Datetime("us"))
+    return pl.col(col).cast(pl.String).str.to_datetime(strict=False)
+
+
+def bridge_plan(ds: Dataset):
+    """``mapping.build_bridge`` as a lazy plan over the ``Dataset`` columns it reads."""
+    pl = _require_polars()
+    static = _lazy(ds.ft_static, ["ft_ticker", "ticker", "isin_number", "name", "ticker_type", "assets_aum_full_value"], "_srow")
+    static = static.with_columns(isin_number=pl.col("isin_number").cast(pl.String).fill_null("").str.to_uppercase().str.strip_chars())
+
+    feeder = _lazy(ds.thai_feeder, ["fund_code", "feeder_name", "feeder_weight_pct", "as_of_date"], "_row")
+    token = pl.col("feeder_name").str.strip_chars().str.extract(r"\(([^()]*)\)\s*$", 1).str.strip_chars().str.to_uppercase()
+    token_clean = pl.col("token").str.replace_all(" ", "", literal=True)
+    feeder = feeder.with_columns(token=pl.when(token != "").then(token)).with_columns(
+        token_isin=pl.when(token_clean.str.contains(r"^[A-Z0-9]{12}$")).then(token_clean)
+    )
+    by_isin = feeder.join(static, left_on="token_isin", right_on="isin_number", how="left", coalesce=False).select(
+        "fund_code",
+        "feeder_name",
+        "feeder_weight_pct",
+        "as_of_date",
+        "token",
+        "token_isin",
+        "ft_ticker",
+        "ticker",
+        "name",
+        "ticker_type",
+        map_method=pl.lit("feeder_holding_isin"),
+        priority=pl.lit(1),
+        part=pl.lit(0),
+        row_a="_row",
+        row_b="_srow",
+    )
+
+    # Fallback mapping: use Thai fund ISIN only when feeder-holding mapping is absent.
+    mapped_funds = by_isin.filter(pl.col("ft_ticker").is_not_null()).select("fund_code").unique()
+    thai_isin = _lazy(ds.thai_isin, ["fund_code", "isin_code"], "_irow").with_columns(pl.col("isin_code").cast(pl.String))
+    by_fund_isin = (
+        thai_isin.join(static, left_on="isin_code", right_on="isin_number", how="inner")
+        .join(mapped_funds, on="fund_code", how="anti", nulls_equal=True)
+        .with_columns(
+            ticker_pref=pl.col("ticker_type").replace_strict({"Fund": 1, "ETF": 2}, default=9, return_dtype=pl.Int32),
+            aum_full=_float("assets_aum_full_value").fill_null(0.0),
+        )
+        .sort(["fund_code", "ticker_pref", "aum_full", "_irow", "_srow"], descending=[False, False, True, False, False], nulls_last=True)
+        .unique(subset=["fund_code"], keep="first", maintain_order=True)
+        .select(
+            "fund_code",
+            feeder_name="name",
+            feeder_weight_pct=pl.lit(100.0),
+            as_of_date=pl.lit(None, dtype=feeder.collect_schema()["as_of_date"]),
+            token=pl.lit(None, dtype=pl.String),
+            token_isin="isin_code",
+            ft_ticker="ft_ticker",
+            ticker="ticker",
+            name="name",
+            ticker_type="ticker_type",
+            map_method=pl.lit("thai_fund_isin_fallback"),
+            priority=pl.lit(2),
+            part=pl.lit(1),
+            row_a="_irow",
+            row_b="_srow",
+        )
+    )
+
+    by_feeder = _fuzzy_feeder_plan(ds, static, by_isin, by_fund_isin) if MAP_FUZZY_NAMES else by_isin
+
+    # Prefer feeder_holding_isin over thai_fund_isin (and name matches) when both map to same fund/master pair.
+    return (
+        pl.concat([by_feeder, by_fund_isin], how="vertical_relaxed")
+        .with_columns(feeder_weight_pct=_float("feeder_weight_pct").fill_null(0.0))
+        .sort(["fund_code", "ft_ticker", "priority", "part", "row_a", "row_b"], nulls_last=True)
+        .unique(subset=["fund_code", "ft_ticker"], keep="first", maintain_order=True)
+        .select(BRIDGE_COLUMNS)
+    )
+
+
+def _fuzzy_feeder_plan(ds: Dataset, static, by_isin, by_fund_isin):
+    """``by_isin`` with the feeders ``mapping.build_bridge`` name-matches replaced by their FT rows.
+
+    The unmapped feeders are collected here so ``match_feeder_names`` can score them.
+    """
+    pl = _require_polars()
+    unmapped = (
+        by_isin.filter(pl.col("ft_ticker").is_null())
+        .join(by_fund_isin.select("fund_code"), on="fund_code", how="anti", nulls_equal=True)
+        .select("row_a", "feeder_name")
+        .sort("row_a")
+        .collect()
+    )
+    pos = match_feeder_names(unmapped["feeder_name"].to_pandas(), ds.ft_static) if unmapped.height else np.array([], dtype=np.int64)
+    row_dtype = by_isin.collect_schema()["row_a"]
+    fuzzy = pl.LazyFrame(
+        {"row_a": unmapped["row_a"].to_numpy()[pos >= 0], "_fz_srow": pos[pos >= 0]},
+        schema={"row_a": row_dtype, "_fz_srow": static.collect_schema()["_srow"]},
+    ).join(
+        static.select(_fz_srow="_srow", **{f"_fz_{c}": c for c in STATIC_MATCH_COLUMNS}), on="_fz_srow", how="left"
+    )
+    hit = pl.col("_fz_srow").is_not_null()
+    return (
+        by_isin.join(fuzzy, on="row_a", how="left")
+        .with_columns(
+            **{c: pl.when(hit).then(pl.col(f"_fz_{c}")).otherwise(pl.col(c)) for c in STATIC_MATCH_COLUMNS},
+            map_method=pl.when(hit).then(pl.lit("feeder_name_fuzzy")).otherwise(pl.col("map_method")),
+            priority=pl.when(hit).then(pl.lit(3)).otherwise(pl.col("priority")),
+            row_b=pl.when(hit).then(pl.col("_fz_srow")).otherwise(pl.col("row_b")),
+        )
+        .select(by_isin.collect_schema().names())
+    )
+
+
+def build_bridge_polars(ds: Dataset) -> pd.DataFrame:
+    """``mapping.build_bridge`` run as one Polars lazy query; same rows in the same order."""
+    bridge = bridge_plan(ds).collect().to_pandas()
+    bridge["as_of_date"] = pd.to_datetime(bridge["as_of_date"])
+    return bridge
+
+
+def _normalize_bridge_plan(bridge):
+    """``calculations.normalize_bridge`` over a lazy bridge."""
+    pl = _require_polars()
+    weight = pl.col("feeder_weight_pct")
+    fund_weight = pl.when(pl.col("fund_code").is_not_null()).then(weight.sum().over("fund_code"))
+    return (
+        bridge.filter(pl.col("ft_ticker").is_not_null())
+        .with_columns(feeder_weight_pct=_float("feeder_weight_pct").fill_null(0.0))
+        .filter(weight > 0)
+        .with_columns(
+            feeder_weight_pct_norm=(
+                weight / pl.when(fund_weight != 0).then(fund_weight) * fund_weight.clip(upper_bound=100.0)
+            ).fill_null(0.0)
+        )
+    )
+
+
+def nav_plan(ds: Dataset):
+    """``calculations._prepare_nav_with_fx`` as a lazy plan, with the FX as-of lookup as an as-of join."""
+    pl = _require_polars()
+    nav = _lazy(ds.thai_nav_aum, ["fund_code", "nav_as_of_date", "aum"], "_nrow")
+    nav_date = _datetime("nav_as_of_date", nav.collect_schema()["nav_as_of_date"])
+    nav = nav.with_columns(aum_native=_float("aum").fill_null(0.0), nav_as_of_date=nav_date)
+
+    fund_ccy = (
+        _lazy(ds.thai_funds, ["fund_code", "currency"], "_crow")
+        .unique(subset=["fund_code"], keep="first", maintain_order=True)
+        .select("fund_code", fund_currency=_clean_upper("currency", FX_BASE_CCY))
+    )
+    nav = nav.join(fund_ccy, on="fund_code", how="left", nulls_equal=True).with_columns(
+        pl.col("fund_currency").fill_null(FX_BASE_CCY)
+    )
+
+    if ds.fx_rates.empty:
+        nav = nav.with_columns(
+            fx_rate_to_thb=pl.lit(1.0), fx_rate_date="nav_as_of_date", fx_rate_status=pl.lit("default_1_no_fx_table")
+        )
+    else:
+        # Point-in-time: the latest rate dated on or before the NAV date; the last row wins per currency and day.
+        fx = _lazy(ds.fx_rates, ["date_rate", "from_ccy", "rate_to_thb"], "_xrow")
+        rates = (
+            fx.select(
+                fund_currency=_clean_upper("from_ccy"),
+                rate_day=_datetime("date_rate", fx.collect_schema()["date_rate"]).dt.date(),
+                rate=_float("rate_to_thb"),
+            )
+            .filter(pl.col("rate_day").is_not_null() & (pl.col("fund_currency") != "") & pl.col("rate").is_not_null())
+            .unique(subset=["fund_currency", "rate_day"], keep="last", maintain_order=True)
+            .sort(["fund_currency", "rate_day"])
+            .with_columns(_day="rate_day")
+        )
+        # A missing NAV date takes the currency's latest rate.
+        nav_day = pl.col("nav_as_of_date").dt.date()
+        nav = (
+            nav.with_columns(_day=nav_day.fill_null(pl.date(9999, 12, 31)))
+            .sort("_day")
+            .join_asof(rates, on="_day", by="fund_currency", check_sortedness=False)
+        )
+        found = pl.col("rate").is_not_null()
+        if FX_ASOF_MAX_DAYS is not None:
+            found = found & (nav_day.is_null() | ((nav_day - pl.col("rate_day")).dt.total_days() <= FX_ASOF_MAX_DAYS))
+        rate_date = pl.col("rate_day").cast(nav.collect_schema()["nav_as_of_date"])
+        nav = nav.with_columns(rate=pl.when(found).then("rate"), rate_date=pl.when(found).then(rate_date)).with_columns(
+            fx_rate_to_thb=pl.col("rate").fill_null(1.0),
+            fx_rate_date=pl.col("rate_date").fill_null(pl.col("nav_as_of_date")),
+            fx_rate_status=pl.when(pl.col("fund_currency") == FX_BASE_CCY)
+            .then(pl.lit("base_currency"))
+            .when(pl.col("rate").is_null())
+            .then(pl.lit("default_1_missing_fx"))
+            .when(pl.col("rate_date") == pl.col("nav_as_of_date"))
+            .then(pl.lit("exact"))
+            .otherwise(pl.lit("asof")),
+        )
+
+    fx_rate = pl.when(pl.col("fund_currency") == FX_BASE_CCY).then(1.0).otherwise(pl.col("fx_rate_to_thb"))
+    return (
+        nav.with_columns(fx_rate_to_thb=fx_rate)
+        .with_columns(aum=(pl.col("aum_native") * pl.col("fx_rate_to_thb")).fill_null(0.0))
+        .sort("_nrow")
+        .select(
+            "fund_code",
+            "nav_as_of_date",
+            "aum",
+            "aum_native",
+            "fund_currency",
+            "fx_rate_to_thb",
+            "fx_rate_date",
+            "fx_rate_status",
+        )
+    )
+
+
+def prepare_nav_with_fx_polars(ds: Dataset) -> pd.DataFrame:
+    """``calculations._prepare_nav_with_fx`` run as a Polars lazy query."""
+    return nav_plan(ds).collect().to_pandas()
+
+
+def _dedup_plan(df: pd.DataFrame, keys: list[str], weight_col: str):
+    """``exposure.dedup_item_weights``: rows with a missing key are dropped, groups in key order."""
+    return (
+        _lazy(df, [*keys, weight_col], "_row")
+        .drop_nulls(keys)
+        .group_by(keys)
+        .agg(_float(weight_col).fill_null(0.0).max())
+        .sort(keys)
+    )
+
+
+def _fact_plan(bridge_ok, nav, items, weight_col: str, columns: list[str], renames: dict[str, str]):
+    """``ExposureKernel.propagate`` as a lazy join; keeps the ordering columns ``_row`` / ``_irow``.
+
+    Columns resolve like the kernel: computed, then bridge, then item, then NAV columns.
+    """
+    pl = _require_polars()
+    sources = {"b": bridge_ok.collect_schema().names(), "i": items.collect_schema().names(), "n": nav.collect_schema().names()}
+    picked = {"b": [], "i": [], "n": []}
+    for col in columns:
+        if col in ("true_weight_pct", "aum", "true_value_thb"):
+            continue
+        side = next((s for s in ("b", "i", "n") if col in sources[s]), None)
+        if side is None:
+            raise KeyError(f"exposure column not found in bridge, items or nav: {col}")
+        picked[side].append(col)
+
+    left = bridge_ok.select("_row", *picked["b"], _ticker="ticker", _fund="fund_code", _weight_norm="feeder_weight_pct_norm")
+    right = items.select("_irow", *picked["i"], _ticker="ticker", _item_weight=_float(weight_col))
+    # nav carries one row per fund; keep the first if a source ever repeats one.
+    nav = nav.unique(subset=["fund_code"], keep="first", maintain_order=True).select(
+        *picked["n"], _fund="fund_code", _nav_aum="aum"
+    )
+    true_weight = pl.col("_weight_norm") * pl.col("_item_weight") / 100.0
+    aum = pl.col("_nav_aum").fill_null(0.0)
+    computed = {
+        "true_weight_pct": true_weight,
+        "aum": aum,
+        "true_value_thb": (aum * true_weight / 100.0).fill_nan(None).fill_null(0.0),
+    }
+    return (
+        left.join(right, on="_ticker", how="inner")
+        .join(nav, on="_fund", how="left", nulls_equal=True)
+        .select(*[computed[c].alias(c) if c in computed else pl.col(c) for c in columns], "_row", "_irow")
+        .rename(renames)
+    )
+
+
+def _totals_plan(fact, keys: list[str], first: tuple[str, ...] = ()):
+    """``LookThrough.group_totals`` over a fact plan: sorted groups, missing keys dropped, ``first`` by row."""
+    pl = _require_polars()
+    return (
+        fact.drop_nulls(keys)
+        .group_by(keys)
+        .agg(
+            pl.col("true_weight_pct").sum().alias("total_true_weight_pct"),
+            pl.col("true_value_thb").sum().alias("total_true_value_thb"),
+            *[pl.col(c).sort_by("_row", "_irow").drop_nulls().first() for c in first],
+        )
+        .sort(keys)
+    )
+
+
+def build_exposure_tables_polars(
+    ds: Dataset, bridge: pd.DataFrame, securities: SecurityMaster | None = None
+) -> dict[str, pd.DataFrame]:
+    """``build_exposure_tables`` as Polars lazy plans, collected together on all cores.
+
+    Bridge normalization, NAV/FX, item dedup, the three fact joins and the group totals run in
+    Polars over only the columns they read. Per-master item columns (look-through expansion,
+    holding keys, security ids) and the small dashboard tables reuse the pandas code. Rows and
+    row order match the pandas path; sums may differ in the last floating-point digits.
+    """
+    pl = _require_polars()
+    plans = [_normalize_bridge_plan(_lazy(bridge, list(bridge.columns), "_row")), nav_plan(ds)]
+    plans += [_dedup_plan(getattr(ds, frame), keys, weight_col) for frame, keys, weight_col in ITEM_TABLES.values()]
+    bridge_ok, nav, *deduped = pl.collect_all(plans)
+
+    roots = pd.Index(bridge_ok["ticker"].drop_nulls().unique(maintain_order=True).to_list())
+    items = finish_items(ds, dict(zip(ITEM_TABLES, (df.to_pandas() for df in deduped))), roots, securities)
+
+    region_columns = list(ALLOCATION_FACT_COLUMNS)
+    region_columns.insert(region_columns.index("true_value_thb") + 1, "is_country_like")
+    fact_specs = {
+        "stock": ("portfolio_weight_pct", STOCK_FACT_COLUMNS, {}),
+        "sector": ("weight_pct", ALLOCATION_FACT_COLUMNS, {"category_name": "sector_name", "weight_pct": "sector_weight_pct"}),
+        "region": ("weight_pct", region_columns, {"category_name": "region_name", "weight_pct": "region_weight_pct"}),
+    }
+    fact_plans, total_plans = [], []
+    for name, (weight_col, columns, renames) in fact_specs.items():
+        item_plan = pl.from_pandas(items[name]).lazy().with_row_index("_irow")
+        fact = _fact_plan(bridge_ok.lazy(), nav.lazy(), item_plan, weight_col, columns, renames)
+        fact_plans.append(fact.sort("_row", "_irow").drop("_row", "_irow"))
+        total_plans.append(_totals_plan(fact, FACT_GROUP_KEYS[name], HOLDING_FIRST_COLUMNS if name == "stock" else ()))
+    # Collected together so the fact joins shared by facts and totals run once.
+    results = [df.to_pandas() for df in pl.collect_all(fact_plans + total_plans)]
+    facts = dict(zip(fact_specs, results[:3]))
+    totals = dict(zip(fact_specs, results[3:]))
+    for df in (facts["stock"], totals["stock"]):
+        df["security_id"] = df["security_id"].astype("Int64")
+
+    nav = nav.to_pandas()
+    aggregates = build_aggregate_tables(
+        ds,
+        bridge_ok.drop("_row").to_pandas(),
+        nav,
+        totals["stock"],
+        totals["sector"].rename(columns={"sector_name": "category_name"}),
+        totals["region"].rename(columns={"region_name": "category_name"}),
+        float(facts["stock"]["true_value_thb"].sum()),
+    )
+    fact_tables = {FACT_TABLES[name]: df for name, df in facts.items()}
+    return {"stg_nav_aum_native": stg_nav_native(nav), "bridge_thai_master": bridge, **fact_tables, **aggregates}
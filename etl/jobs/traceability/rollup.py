@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import String
+
+from .calculations import FACT_TABLES, HOLDING_GROUP_KEYS
+from .config import CUBE_HOLDINGS_TOP_N
+from .loaders import load_df
+from .utils import clean_upper
+
+# Cube dimensions, most significant grouping_id bit first (bit set = dimension rolled up).
+CUBE_DIMENSIONS = ["amc", "category", "fund_currency", "map_method"]
+CUBE_MEASURES = ["total_true_value_thb", "total_true_weight_pct"]
+# Item table -> (fact table, cube table, item keys as named in the fact table).
+CUBE_ITEMS = {
+    "stock": (FACT_TABLES["stock"], "agg_cube_holdings", HOLDING_GROUP_KEYS),
+    "sector": (FACT_TABLES["sector"], "agg_cube_sector", ["sector_name"]),
+    "region": (FACT_TABLES["region"], "agg_cube_country", ["region_name"]),
+}
+# VARCHAR widths of the indexed columns; they stay within InnoDB's 3072-byte key limit on utf8mb4.
+CUBE_SQL_DTYPES = {
+    "amc": String(128),
+    "category": String(128),
+    "fund_currency": String(16),
+    "map_method": String(32),
+}
+
+
+def _labels(values) -> np.ndarray:
+    # Missing labels become "" so a NULL in the cube always means "rolled up".
+    return pd.Series(values, dtype=object).fillna("").astype(str).str.strip().to_numpy()
+
+
+def cube_base(fact: pd.DataFrame, funds: pd.DataFrame, item: str) -> pd.DataFrame:
+    """Value/weight sums at the finest cube grain: every dimension plus the item keys."""
+    keys = CUBE_ITEMS[item][2]
+    if item == "region":
+        fact = fact[fact["is_country_like"].astype(bool).to_numpy()]
+    funds = funds.drop_duplicates(["fund_code"], keep="first").reindex(columns=["fund_code", "amc", "category"])
+    # Position -1 (fund not in funds_master_info) picks the appended missing label.
+    pos = pd.Index(funds["fund_code"]).get_indexer(fact["fund_code"])
+    base = pd.DataFrame(
+        {
+            "amc": _labels(np.append(funds["amc"].astype(object).to_numpy(), None)[pos]),
+            "category": _labels(np.append(funds["category"].astype(object).to_numpy(), None)[pos]),
+            "fund_currency": clean_upper(fact["fund_currency"]).to_numpy(),
+            "map_method": _labels(fact["map_method"].astype(object).to_numpy()),
+            **{key: fact[key].to_numpy() for key in keys},
+            "total_true_value_thb": pd.to_numeric(fact["true_value_thb"], errors="coerce").fillna(0.0).to_numpy(),
+            "total_true_weight_pct": pd.to_numeric(fact["true_weight_pct"], errors="coerce").fillna(0.0).to_numpy(),
+        }
+    )
+    return base.groupby(CUBE_DIMENSIONS + keys, as_index=False, observed=True, sort=False)[CUBE_MEASURES].sum()
+
+
+def rollup_cube(base: pd.DataFrame, keys: list[str], top_n: int = 0) -> pd.DataFrame:
+    """All 16 grouping sets of ``CUBE_DIMENSIONS`` from the finest-grain ``base``.
+
+    Rolled-up dimensions are NULL and flagged in ``grouping_id`` (``GROUPING()`` bit order). Each
+    slice carries ``allocation_share_pct`` (share of the slice value) and ``rank_no`` by value;
+    ``top_n`` > 0 keeps only that many rows per slice (shares still use the whole slice).
+    """
+    n = len(CUBE_DIMENSIONS)
+    sets = []
+    for grouping_id in range(2**n):
+        kept = [dim for bit, dim in enumerate(CUBE_DIMENSIONS) if not grouping_id >> (n - 1 - bit) & 1]
+        grouped = base.groupby(kept + keys, as_index=False, observed=True, sort=False)[CUBE_MEASURES].sum()
+        sets.append(grouped.assign(grouping_id=grouping_id))
+    cube = pd.concat(sets, ignore_index=True).reindex(columns=["grouping_id", *CUBE_DIMENSIONS, *keys, *CUBE_MEASURES])
+
+    slice_id = cube.groupby(["grouping_id", *CUBE_DIMENSIONS], dropna=False, sort=False).ngroup()
+    slice_value = cube["total_true_value_thb"].groupby(slice_id).transform("sum")
+    cube["allocation_share_pct"] = (cube["total_true_value_thb"] / slice_value.where(slice_value != 0) * 100.0).fillna(0.0)
+    order = np.lexsort((-cube["total_true_weight_pct"].to_numpy(), -cube["total_true_value_thb"].to_numpy(), slice_id.to_numpy()))
+    cube = cube.take(order).reset_index(drop=True)
+    cube["rank_no"] = cube.groupby(slice_id.take(order).to_numpy(), sort=False).cumcount() + 1
+    if top_n > 0:
+        cube = cube[cube["rank_no"] <= top_n].reset_index(drop=True)
+    return cube
+
+
+def build_rollup_tables(funds: pd.DataFrame, facts: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """``agg_cube_*`` tables from the fact tables (or fact rows pre-summed per fund and dimension)."""
+    return {
+        cube_table: rollup_cube(
+            cube_base(facts[fact_table], funds, item), keys, top_n=CUBE_HOLDINGS_TOP_N if item == "stock" else 0
+        )
+        for item, (fact_table, cube_table, keys) in CUBE_ITEMS.items()
+    }
+
+
+def load_cube_facts(mart_engine: Engine) -> dict[str, pd.DataFrame]:
+    """Fact rows summed per fund, currency, map method and item key, read from the mart.
+
+    Used after a delta build, where only the recomputed funds' fact rows are in memory.
+    """
+    facts = {}
+    for item, (fact_table, _, keys) in CUBE_ITEMS.items():
+        group_cols = ["fund_code", "fund_currency", "map_method", *keys]
+        if item == "region":
+            group_cols.append("is_country_like")
+        cols = ", ".join(group_cols)
+        facts[fact_table] = load_df(
+            mart_engine,
+            f"""
+            SELECT {cols}, SUM(true_value_thb) AS true_value_thb, SUM(true_weight_pct) AS true_weight_pct
+            FROM {fact_table}
+            GROUP BY {cols}
+            """,
+        )
+    return facts
+
+
+def create_cube_indexes(mart_engine: Engine) -> None:
+    """Slice index on every cube table; the tables are replaced on each run, so this runs after each write."""
+    cols = ", ".join(["grouping_id", *CUBE_DIMENSIONS])
+    with mart_engine.begin() as conn:
+        for _, cube_table, _ in CUBE_ITEMS.values():
+            conn.exec_driver_sql(f"CREATE INDEX idx_{cube_table}_slice ON {cube_table} ({cols}, rank_no)")
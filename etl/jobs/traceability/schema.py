@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Engine
+
+from .config import FX_TABLE, SCHEMA_CACHE_PATH, SCHEMA_CACHE_TTL_SECONDS
+
+# Tables whose column sets decide which schema variant the loaders query.
+GLOBAL_PROBE_TABLES = ("ft_sector_allocation", "ft_region_allocation", "ft_avg_fund_return")
+FX_PROBE_TABLES = (FX_TABLE,)
+
+_MEMORY: dict[str, dict] = {}
+
+
+def _server_key(engine: Engine) -> str:
+    return engine.url.set(database=None).render_as_string(hide_password=True)
+
+
+def _checksum(tables: dict[str, list[str]]) -> str:
+    return hashlib.sha1(json.dumps(tables, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SchemaCatalog:
+    """Column sets of the probed source tables, keyed by ``schema.table`` (lower-case)."""
+
+    def __init__(self, tables: dict[str, list[str]]) -> None:
+        self.tables = {name: set(cols) for name, cols in tables.items()}
+
+    @staticmethod
+    def _name(engine: Engine, table_name: str) -> str:
+        return f"{engine.url.database}.{table_name}".lower()
+
+    def has_table(self, engine: Engine, table_name: str) -> bool:
+        return self._name(engine, table_name) in self.tables
+
+    def columns(self, engine: Engine, table_name: str) -> set[str]:
+        return self.tables.get(self._name(engine, table_name), set())
+
+
+def _fetch_mysql(engine: Engine, probes: list[tuple[str, str]]) -> dict[str, list[str]]:
+    """One information_schema round trip for every (schema, table) probed on this server."""
+    sql = text(
+        """
+        SELECT table_schema, table_name, column_name
+        FROM information_schema.columns
+        WHERE table_schema IN :schemas
+          AND table_name IN :tables
+        ORDER BY table_schema, table_name, ordinal_position
+        """
+    ).bindparams(bindparam("schemas", expanding=True), bindparam("tables", expanding=True))
+    wanted = {f"{schema}.{table}".lower() for schema, table in probes}
+    with engine.connect() as conn:
+        rows = conn.execute(
+            sql,
+            {"schemas": sorted({s for s, _ in probes}), "tables": sorted({t for _, t in probes})},
+        ).fetchall()
+
+    tables: dict[str, list[str]] = {}
+    for schema, table, column in rows:
+        name = f"{schema}.{table}".lower()
+        if name in wanted:
+            tables.setdefault(name, []).append(str(column).lower())
+    return tables
+
+
+def _fetch_generic(engine: Engine, probes: list[tuple[str, str]]) -> dict[str, list[str]]:
+    inspector = inspect(engine)
+    tables: dict[str, list[str]] = {}
+    for schema, table in probes:
+        if inspector.has_table(table):
+            tables[f"{schema}.{table}".lower()] = [str(c["name"]).lower() for c in inspector.get_columns(table)]
+    return tables
+
+
+def _version(engine: Engine, probes: list[tuple[str, str]]) -> str | None:
+    """Cheap fingerprint of the probed tables' columns, checked before a cached entry is reused.
+
+    MySQL: column count and CRC32 sum over ``information_schema.columns`` (one row back). SQLite:
+    ``PRAGMA schema_version``, bumped by every schema change. Other dialects are not cached (``None``).
+    """
+    if engine.dialect.name == "mysql":
+        sql = text(
+            """
+            SELECT COUNT(*), COALESCE(SUM(CRC32(CONCAT_WS('.', table_schema, table_name, column_name, ordinal_position))), 0)
+            FROM information_schema.columns
+            WHERE table_schema IN :schemas
+              AND table_name IN :tables
+            """
+        ).bindparams(bindparam("schemas", expanding=True), bindparam("tables", expanding=True))
+        params = {"schemas": sorted({s for s, _ in probes}), "tables": sorted({t for _, t in probes})}
+    elif engine.dialect.name == "sqlite":
+        sql, params = text("PRAGMA schema_version"), {}
+    else:
+        return None
+    with engine.connect() as conn:
+        return ":".join(str(v) for v in conn.execute(sql, params).one())
+
+
+def _read_disk(path: Path) -> dict[str, dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def introspect(
+    probes: list[tuple[Engine, tuple[str, ...]]],
+    cache_path: Path = SCHEMA_CACHE_PATH,
+    ttl_seconds: int = SCHEMA_CACHE_TTL_SECONDS,
+    refresh: bool = False,
+) -> SchemaCatalog:
+    """Build a catalog with at most one introspection query per database server.
+
+    Results are cached in memory and in ``cache_path`` for at most ``ttl_seconds``. Every run
+    checks a cached entry against the server's ``_version`` probe, and an entry that lacks any
+    probed table is never reused, so a created or altered table is seen on the next run. A
+    cached entry also stores a checksum of its column sets so a refetch can report schema drift.
+    """
+    by_server: dict[str, tuple[Engine, list[tuple[str, str]]]] = {}
+    for engine, table_names in probes:
+        entry = by_server.setdefault(_server_key(engine), (engine, []))
+        entry[1].extend((str(engine.url.database), t) for t in table_names)
+
+    disk = _read_disk(cache_path)
+    now = time.time()
+    tables: dict[str, list[str]] = {}
+    dirty = False
+    for key, (engine, server_probes) in by_server.items():
+        wanted = sorted({f"{s}.{t}".lower() for s, t in server_probes})
+        cached = _MEMORY.get(key) or disk.get(key)
+        version = None if refresh else _version(engine, server_probes)
+        fresh = (
+            version is not None
+            and cached is not None
+            and now - float(cached.get("fetched_at", 0)) <= ttl_seconds
+            and cached.get("probes") == wanted
+            and cached.get("version") == version
+            # A missing table is not cached: it may be created before the next run.
+            and set(cached.get("tables", {})) == set(wanted)
+        )
+        if not fresh:
+            fetch = _fetch_mysql if engine.dialect.name == "mysql" else _fetch_generic
+            fetched = fetch(engine, server_probes)
+            checksum = _checksum(fetched)
+            if cached is not None and cached.get("checksum") not in (None, checksum):
+                print(f"Schema change detected on {key}; column aliases re-resolved")
+            if version is None:
+                version = _version(engine, server_probes)
+            cached = {"fetched_at": now, "probes": wanted, "version": version, "checksum": checksum, "tables": fetched}
+            disk[key] = cached
+            dirty = True
+        _MEMORY[key] = cached
+        tables.update(cached["tables"])
+
+    if dirty:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(disk, indent=2, sort_keys=True), encoding="utf-8")
+    return SchemaCatalog(tables)
+
+
+def source_catalog(global_engine: Engine, fx_engine: Engine, refresh: bool = False) -> SchemaCatalog:
+    return introspect([(global_engine, GLOBAL_PROBE_TABLES), (fx_engine, FX_PROBE_TABLES)], refresh=refresh)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .loaders import load_df
+from .utils import clean_upper
+from .writer import _sql_dtypes
+
+SECURITY_TABLE = "dim_security"
+SECURITY_COLUMNS = ["security_id", "holding_key", "holding_ticker_norm", "holding_name_norm", "holding_name"]
+
+
+class SecurityMaster:
+    """Stable integer ``security_id`` per security, persisted in ``SECURITY_TABLE``.
+
+    A security is identified by its normalized ticker, or by its normalized name when it has no
+    ticker; that identity is stored as its ``holding_key``. Lookups go through two hash indexes (ticker -> id and, for
+    ticker-less securities, name -> id). Unknown securities get the next ids in first-seen order;
+    a ``read_only`` master resolves them to ``<NA>`` instead. Blank ticker and name is ``<NA>``.
+    """
+
+    def __init__(self, table: pd.DataFrame | None = None, read_only: bool = False) -> None:
+        table = pd.DataFrame(columns=SECURITY_COLUMNS) if table is None else table.reindex(columns=SECURITY_COLUMNS)
+        table = table.astype({"security_id": "int64"})
+        for col in ("holding_key", "holding_ticker_norm", "holding_name_norm"):
+            table[col] = table[col].fillna("").astype(object)
+        self.table = table.reset_index(drop=True)
+        self.read_only = read_only
+        self.added = 0
+        self._reindex()
+
+    @classmethod
+    def load(cls, mart_engine: Engine, read_only: bool = False) -> SecurityMaster:
+        if not inspect(mart_engine).has_table(SECURITY_TABLE):
+            return cls(read_only=read_only)
+        cols = ", ".join(SECURITY_COLUMNS)
+        return cls(load_df(mart_engine, f"SELECT {cols} FROM {SECURITY_TABLE} ORDER BY security_id"), read_only)
+
+    def _reindex(self) -> None:
+        by_ticker = (self.table["holding_ticker_norm"] != "").to_numpy()
+        ids = self.table["security_id"].to_numpy()
+        self._indexes = {
+            True: (pd.Index(self.table["holding_ticker_norm"].to_numpy()[by_ticker]), ids[by_ticker]),
+            False: (pd.Index(self.table["holding_name_norm"].to_numpy()[~by_ticker]), ids[~by_ticker]),
+        }
+
+    def _lookup(self, by_ticker: bool, keys: np.ndarray, name_norm: np.ndarray, holding_name: np.ndarray) -> np.ndarray:
+        """Ids of ``keys``, hashing each distinct key once; unknown keys are appended unless read-only."""
+        index, index_ids = self._indexes[by_ticker]
+        codes, uniques = pd.factorize(keys)
+        pos = index.get_indexer(uniques)
+        # Position -1 (unknown key) picks the appended -1.
+        ids = np.append(index_ids, -1)[pos]
+        new = np.flatnonzero(pos < 0)
+        if len(new) and not self.read_only:
+            start = int(self.table["security_id"].max()) + 1 if len(self.table) else 1
+            ids[new] = np.arange(start, start + len(new))
+            first_row = np.unique(codes, return_index=True)[1][new]
+            added = pd.DataFrame(
+                {
+                    "security_id": ids[new],
+                    "holding_key": keys[first_row],
+                    "holding_ticker_norm": keys[first_row] if by_ticker else "",
+                    "holding_name_norm": name_norm[first_row],
+                    "holding_name": holding_name[first_row],
+                }
+            )
+            self.table = pd.concat([self.table, added], ignore_index=True)
+            self.added += len(new)
+            self._reindex()
+        return ids[codes]
+
+    def resolve(self, ticker_norm: pd.Series, name_norm: pd.Series, holding_name: pd.Series | None = None) -> pd.Series:
+        """Nullable ``Int64`` ``security_id`` of normalized (``clean_upper``) ticker / name pairs.
+
+        ``holding_name`` is the display name stored for new securities (default: ``name_norm``).
+        """
+        ticker = ticker_norm.astype(object).to_numpy()
+        name = name_norm.astype(object).to_numpy()
+        display = name if holding_name is None else holding_name.astype(object).to_numpy()
+        ids = np.full(len(ticker), -1, dtype=np.int64)
+        for by_ticker, mask in ((True, ticker != ""), (False, (ticker == "") & (name != ""))):
+            if mask.any():
+                keys = ticker[mask] if by_ticker else name[mask]
+                ids[mask] = self._lookup(by_ticker, keys, name[mask], display[mask])
+        out = pd.array(np.maximum(ids, 0), dtype="Int64")
+        out[ids < 0] = pd.NA
+        return pd.Series(out, index=ticker_norm.index, name="security_id")
+
+    def holding_keys(self, security_ids: pd.Series) -> pd.Series:
+        """``holding_key`` of each ``security_id``; ``""`` for ``<NA>``."""
+        pos = pd.Index(self.table["security_id"]).get_indexer(security_ids.astype("Int64"))
+        keys = np.append(self.table["holding_key"].to_numpy(dtype=object), "")[pos]
+        return pd.Series(keys, index=security_ids.index, name="holding_key")
+
+    def resolve_raw(self, tickers: pd.Series, names: pd.Series) -> pd.Series:
+        """``resolve`` for raw ticker / name text."""
+        return self.resolve(clean_upper(tickers), clean_upper(names), names)
+
+    def write(self, mart_engine: Engine) -> None:
+        """Append the securities added since loading in one transaction.
+
+        Rows already stored are never rewritten. If another writer appended securities after this
+        master was loaded, the new ids would collide with theirs and the write fails instead.
+        """
+        new = self.table.iloc[len(self.table) - self.added :]
+        if new.empty:
+            return
+        with mart_engine.begin() as conn:
+            if inspect(conn).has_table(SECURITY_TABLE):
+                lock = " FOR UPDATE" if conn.dialect.name == "mysql" else ""
+                stored = conn.execute(text(f"SELECT MAX(security_id) FROM {SECURITY_TABLE}{lock}")).scalar()
+                if stored is not None and int(stored) >= int(new["security_id"].min()):
+                    raise RuntimeError(f"{SECURITY_TABLE} changed since it was loaded; rerun to pick up the new ids")
+            new.to_sql(SECURITY_TABLE, conn, if_exists="append", index=False, dtype=_sql_dtypes(new))
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import read_arrow, write_arrow
+from .calculations import (
+    FACT_TABLES,
+    HOLDING_FIRST_COLUMNS,
+    _prepare_nav_with_fx,
+    build_aggregate_tables,
+    build_fact_tables,
+    combine_partials,
+    fund_partials,
+    normalize_bridge,
+    prepare_items,
+    stg_nav_native,
+)
+from .config import BUILD_SHARDS
+from .exposure import ExposureKernel, _text_as_category
+from .models import Dataset
+from .securities import SecurityMaster
+
+# Inputs each shard reads from its own Arrow files instead of receiving them pickled.
+SHARD_INPUTS = ("bridge_ok", "nav", "stock", "sector", "region")
+
+
+def shard_ids(fund_codes: pd.Series, shards: int) -> np.ndarray:
+    """Shard of each row from a hash of its ``fund_code`` text (stable across processes and runs)."""
+    hashes = pd.util.hash_array(fund_codes.astype(str).to_numpy(dtype=object))
+    return (hashes % np.uint64(shards)).astype(np.int64)
+
+
+def shard_inputs(
+    bridge_ok: pd.DataFrame, nav: pd.DataFrame, items: dict[str, pd.DataFrame], rows: np.ndarray
+) -> dict[str, pd.DataFrame]:
+    """Bridge ``rows`` with the NAV rows of their funds and the item rows of their master tickers."""
+    bridge = bridge_ok.take(rows)
+    masters = bridge["ticker"].unique()
+    return {
+        "bridge_ok": bridge,
+        "nav": nav[nav["fund_code"].isin(bridge["fund_code"].unique())],
+        **{name: df[df["ticker"].isin(masters)] for name, df in items.items()},
+    }
+
+
+def _build_shard(shared_dir: str, shard: int) -> tuple[int, dict[str, pd.DataFrame], float]:
+    """Worker: fact tables of one shard's inputs written next to them; returns the per-fund partials."""
+    started = time.perf_counter()
+    inputs = {name: read_arrow(Path(shared_dir) / f"{name}-{shard}.arrow") for name in SHARD_INPUTS}
+    kernel = ExposureKernel(inputs["bridge_ok"], inputs["nav"])
+    facts = build_fact_tables(kernel, {name: inputs[name] for name in FACT_TABLES})
+    for table, df in facts.items():
+        write_arrow(Path(shared_dir) / f"{table}-{shard}.arrow", df)
+    return shard, fund_partials(facts), time.perf_counter() - started
+
+
+def build_exposure_tables_sharded(
+    ds: Dataset,
+    bridge: pd.DataFrame,
+    shards: int = BUILD_SHARDS,
+    workers: int | None = None,
+    securities: SecurityMaster | None = None,
+) -> dict[str, pd.DataFrame]:
+    """``build_exposure_tables`` with the fact computation split into ``fund_code`` hash shards.
+
+    Bridge, NAV and item tables are prepared once, split per shard (a shard's NAV and item rows
+    are those of its funds and master tickers) and handed to spawned worker processes as Arrow
+    files; each worker returns its fact tables the same way plus its per-fund partial totals.
+    Facts are put back in bridge fund order and the ``agg_*`` tables are built from the merged
+    partials, so rows, ``rank_no`` and allocation shares match the single-process path (totals
+    up to floating-point summation order).
+    """
+    bridge_ok = normalize_bridge(bridge)
+    nav = _prepare_nav_with_fx(ds)
+    items = prepare_items(ds, ExposureKernel(bridge_ok, nav).masters, securities)
+    # Categorize once here so every shard's fact columns share the same categories.
+    bridge_ok = _text_as_category(bridge_ok.reset_index(drop=True))
+    shard_of_row = shard_ids(bridge_ok["fund_code"], shards)
+    workers = workers or min(shards, os.cpu_count() or 1)
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="traceability_shards_") as shared_dir:
+        nav_cat = _text_as_category(nav)
+        for shard in range(shards):
+            inputs = shard_inputs(bridge_ok, nav_cat, items, np.flatnonzero(shard_of_row == shard))
+            for name, df in inputs.items():
+                write_arrow(Path(shared_dir) / f"{name}-{shard}.arrow", df)
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_build_shard, shared_dir, shard) for shard in range(shards)]
+            results = sorted(future.result() for future in futures)
+        print(
+            f"Sharded build: {shards} shards on {workers} workers in {time.perf_counter() - started:.2f}s "
+            f"(slowest shard {max(r[2] for r in results):.2f}s)"
+        )
+
+        # Bridge rows of a fund are contiguous, so a stable sort by fund restores single-process row order.
+        fund_order = pd.Index(pd.unique(bridge_ok["fund_code"]))
+        facts = {}
+        for table in FACT_TABLES.values():
+            merged = pd.concat(
+                [read_arrow(Path(shared_dir) / f"{table}-{shard}.arrow") for shard in range(shards)],
+                ignore_index=True,
+            )
+            order = np.argsort(fund_order.get_indexer(merged["fund_code"]), kind="stable")
+            facts[table] = merged.take(order).reset_index(drop=True)
+
+    partials = {name: pd.concat([r[1][name] for r in results], ignore_index=True) for name in FACT_TABLES}
+    aggregates = build_aggregate_tables(
+        ds,
+        bridge_ok,
+        nav,
+        combine_partials(partials["stock"], "stock", fund_order, first=HOLDING_FIRST_COLUMNS),
+        combine_partials(partials["sector"], "sector", fund_order),
+        combine_partials(partials["region"], "region", fund_order),
+        float(pd.to_numeric(facts[FACT_TABLES["stock"]]["true_value_thb"], errors="coerce").fillna(0.0).sum()),
+    )
+    return {"stg_nav_aum_native": stg_nav_native(nav), "bridge_thai_master": bridge, **facts, **aggregates}
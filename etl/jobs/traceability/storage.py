@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import Column, Date, DateTime, Index, Integer, MetaData, Numeric, String, Table, Text, func
+from sqlalchemy.engine import Engine
+
+from etl.common.db import get_engine
+
+from .config import FX_TABLE
+
+THAI_DB = "raw_thai_funds"
+FT_DB = "raw_ft"
+MART_DB = "fund_traceability"
+
+# FT schema variants ``resolve_ft_columns`` supports. "legacy" renames the allocation columns and has
+# a ticker-keyed return table without ft_ticker, 3y return and created_at.
+FT_SCHEMA_VARIANTS = ("current", "legacy")
+LEGACY_FT_RENAMES = {
+    "ft_sector_allocation": {"category_name": "sector_name", "weight_pct": "sector_weight_pct"},
+    "ft_region_allocation": {"category_name": "region_name", "weight_pct": "region_weight_pct"},
+    "ft_avg_fund_return": {"avg_fund_return_1y": "avg_return_1y_pct", "date_scraper": "as_of_date"},
+}
+
+
+def thai_metadata() -> MetaData:
+    """``raw_thai_funds`` tables read by the loaders and ``build_funds_api_sql``."""
+    md = MetaData()
+    Table(
+        "funds_master_info",
+        md,
+        Column("fund_code", String(50), primary_key=True),
+        Column("full_name_th", Text),
+        Column("full_name_en", Text),
+        Column("amc", String(100)),
+        Column("category", String(100)),
+        Column("risk_level", Integer),
+        Column("currency", String(10)),
+        Column("country", String(50)),
+        Column("isin", String(20)),
+        Column("source_url", Text),
+        Column("scraped_at", DateTime, server_default=func.current_timestamp()),
+    )
+    Table(
+        "funds_codes",
+        md,
+        Column("fund_code", String(50), nullable=False, index=True),
+        Column("type", String(50)),
+        Column("code", String(50), nullable=False),
+        Column("factsheet_url", Text),
+        Column("scraped_at", DateTime, server_default=func.current_timestamp()),
+    )
+    Table(
+        "funds_daily",
+        md,
+        Column("fund_code", String(50), primary_key=True),
+        Column("nav_date", Date, primary_key=True),
+        Column("nav_value", Numeric(18, 4)),
+        Column("aum", Numeric(25, 2)),
+        Column("source", String(20)),
+        Column("scraped_at", DateTime, server_default=func.current_timestamp()),
+    )
+    Table(
+        "funds_holding",
+        md,
+        Column("fund_code", String(50)),
+        Column("symbol", String(50)),
+        Column("name", String(255)),
+        Column("type", String(50)),
+        Column("sector", String(50)),
+        Column("percent", Numeric(10, 4)),
+        Column("as_of_date", Date),
+        Column("source_url", Text),
+        Column("scraped_at", DateTime, server_default=func.current_timestamp()),
+        Index("idx_funds_holding_fund_date", "fund_code", "as_of_date"),
+    )
+    Table(
+        "funds_performance",
+        md,
+        Column("fund_code", String(50), primary_key=True),
+        Column("total_return_1y", Numeric(10, 4)),
+    )
+    Table(
+        "funds_allocations",
+        md,
+        Column("fund_code", String(50)),
+        Column("name", String(255)),
+        Column("type", String(50)),
+        Column("percent", Numeric(10, 4)),
+        Column("as_of_date", Date),
+        Column("scraped_at", DateTime, server_default=func.current_timestamp()),
+        Index("idx_funds_allocations_fund_type_date", "fund_code", "type", "as_of_date"),
+    )
+    return md
+
+
+def ft_metadata(variant: str = "current") -> MetaData:
+    """``raw_ft`` tables in one of ``FT_SCHEMA_VARIANTS``."""
+    if variant not in FT_SCHEMA_VARIANTS:
+        raise ValueError(f"unknown FT schema variant {variant!r}; expected one of {', '.join(FT_SCHEMA_VARIANTS)}")
+    legacy = variant == "legacy"
+    md = MetaData()
+    Table(
+        "ft_static_detail",
+        md,
+        Column("id", Integer, primary_key=True),
+        Column("ft_ticker", String(64), nullable=False),
+        Column("ticker", String(64)),
+        Column("name", String(512)),
+        Column("ticker_type", String(32)),
+        Column("isin_number", String(32)),
+        Column("assets_aum_full_value", Numeric(24, 2)),
+        Column("date_scraper", Date),
+        Column("created_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+        Index("idx_ft_static_detail_ft_ticker", "ft_ticker", "date_scraper"),
+    )
+    Table(
+        "ft_holdings",
+        md,
+        Column("id", Integer, primary_key=True),
+        Column("ticker", String(64), nullable=False),
+        Column("allocation_type", String(64)),
+        Column("holding_name", String(512)),
+        Column("holding_ticker", String(128)),
+        Column("holding_type", String(64)),
+        Column("portfolio_weight_pct", Numeric(12, 6)),
+        Column("date_scraper", Date),
+        Column("created_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+        Index("idx_ft_holdings_ticker_date", "ticker", "date_scraper"),
+    )
+    for item in ("sector", "region"):
+        name = f"ft_{item}_allocation"
+        renames = LEGACY_FT_RENAMES[name] if legacy else {}
+        Table(
+            name,
+            md,
+            Column("id", Integer, primary_key=True),
+            Column("ft_ticker", String(64), nullable=False),
+            Column("ticker", String(64)),
+            Column(renames.get("category_name", "category_name"), String(255)),
+            Column(renames.get("weight_pct", "weight_pct"), Numeric(12, 6)),
+            Column("date_scraper", Date),
+            Column("created_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+            Index(f"idx_{name}_ticker_date", "ticker", "date_scraper"),
+        )
+    if legacy:
+        Table(
+            "ft_avg_fund_return",
+            md,
+            Column("id", Integer, primary_key=True),
+            Column("ticker", String(64), nullable=False),
+            Column("avg_return_1y_pct", Numeric(12, 4)),
+            Column("as_of_date", Date),
+            Index("idx_ft_avg_fund_return_ticker_date", "ticker", "as_of_date"),
+        )
+    else:
+        Table(
+            "ft_avg_fund_return",
+            md,
+            Column("id", Integer, primary_key=True),
+            Column("ft_ticker", String(64), nullable=False),
+            Column("ticker", String(64)),
+            Column("avg_fund_return_1y", Numeric(12, 4)),
+            Column("avg_fund_return_3y", Numeric(12, 4)),
+            Column("date_scraper", Date),
+            Column("created_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+            Index("idx_ft_avg_fund_return_ft_ticker_date", "ft_ticker", "date_scraper"),
+        )
+    return md
+
+
+def fx_rates_table(md: MetaData) -> Table:
+    """``FX_TABLE`` without the MySQL-only options of its DDL in ``create_views``."""
+    return Table(
+        FX_TABLE,
+        md,
+        Column("date_rate", Date, primary_key=True),
+        Column("from_ccy", String(10), primary_key=True),
+        Column("to_ccy", String(10), primary_key=True, server_default="THB"),
+        Column("rate_to_thb", Numeric(20, 8), nullable=False),
+        Column("source_system", String(100)),
+        Column("updated_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+        Index("idx_fx_from_to_date", "from_ccy", "to_ccy", "date_rate"),
+    )
+
+
+def source_metadata(ft_variant: str = "current") -> dict[str, MetaData]:
+    """Tables per database; the mart starts with only ``FX_TABLE``, the build creates the rest."""
+    mart = MetaData()
+    fx_rates_table(mart)
+    return {THAI_DB: thai_metadata(), FT_DB: ft_metadata(ft_variant), MART_DB: mart}
+
+
+def file_uris(directory: Path) -> dict[str, str]:
+    """``*_DB_URI`` settings that point the jobs and tools at the SQLite files in ``directory``."""
+    def uri(name: str) -> str:
+        return f"sqlite:///{(Path(directory) / f'{name}.db').resolve()}"
+
+    return {"THAI_DB_URI": uri(THAI_DB), "GLOBAL_DB_URI": uri(FT_DB), "MART_DB_URI": uri(MART_DB), "FX_DB_URI": uri(MART_DB)}
+
+
+def _engines(directory: Path) -> dict[str, Engine]:
+    uris = file_uris(directory)
+    return {THAI_DB: get_engine(uris["THAI_DB_URI"]), FT_DB: get_engine(uris["GLOBAL_DB_URI"]), MART_DB: get_engine(uris["MART_DB_URI"])}
+
+
+def create_file_databases(directory: Path, ft_variant: str = "current") -> dict[str, str]:
+    """Fresh SQLite files with the empty source schemas (existing files are replaced); returns ``file_uris``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    engines = _engines(directory)
+    for db, md in source_metadata(ft_variant).items():
+        engines[db].dispose()
+        (directory / f"{db}.db").unlink(missing_ok=True)
+        md.create_all(engines[db])
+    return file_uris(directory)
+
+
+def write_source_tables(directory: Path, tables: dict[str, dict[str, pd.DataFrame]], chunk_rows: int = 50_000) -> dict[str, int]:
+    """Append frames (``{database: {table: frame}}``) to the SQLite source tables in ``directory``.
+
+    Frames use the "current" column names; they are renamed for a legacy FT schema, and columns the
+    table does not have are dropped. Returns the row count written per ``database.table``.
+    """
+    engines = _engines(directory)
+    counts = {}
+    for db, frames in tables.items():
+        engine = engines[db]
+        md = MetaData()
+        md.reflect(engine)
+        for name, df in frames.items():
+            table = md.tables[name]
+            df = df.rename(columns={k: v for k, v in LEGACY_FT_RENAMES.get(name, {}).items() if v in table.columns})
+            df = df[[c for c in df.columns if c in table.columns]]
+            df.to_sql(
+                name,
+                engine,
+                if_exists="append",
+                index=False,
+                chunksize=chunk_rows,
+                dtype={c: table.columns[c].type for c in df.columns},
+            )
+            counts[f"{db}.{name}"] = len(df)
+    return counts
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from .config import FX_TABLE
+from .models import Dataset
+from .storage import FT_DB, MART_DB, THAI_DB
+
+AS_OF = pd.Timestamp("2026-06-30")
+SECTORS = [
+    "Information Technology",
+    "Financials",
+    "Health Care",
+    "Consumer Discretionary",
+    "Industrials",
+    "Communication Services",
+    "Consumer Staples",
+    "Energy",
+    "Materials",
+    "Utilities",
+    "Real Estate",
+]
+REGIONS = [
+    "United States",
+    "Japan",
+    "China",
+    "United Kingdom",
+    "France",
+    "Germany",
+    "India",
+    "Taiwan",
+    "Korea",
+    "Switzerland",
+    "Canada",
+    "Australia",
+    "Thailand",
+    "Singapore",
+    "Brazil",
+]
+CURRENCIES = ["USD", "EUR", "JPY", "CNY", "SGD", "HKD", "GBP"]
+HOLDING_TYPES = ["Equity", "Equity", "Equity", "Bond", "Cash", "Fund"]
+
+
+@dataclass(frozen=True)
+class SyntheticScale:
+    """Sizes of a synthetic source snapshot; the defaults approximate today's data (factor 1)."""
+
+    funds: int = 2000
+    # Mean feeder holdings per Thai fund (Poisson, so about a third of the funds hold none).
+    feeders_per_fund: float = 1.0
+    masters: int = 1500
+    holdings_per_master: int = 10
+    sectors: int = 11
+    regions: int = 12
+    fx_days: int = 730
+    # Direct (non-fund) holdings per Thai fund, read by the funds API dump.
+    direct_holdings_per_fund: int = 10
+    # Daily NAV rows per fund in the raw funds_daily table (synthetic_sources only).
+    nav_days: int = 30
+
+    def scaled(self, factor: float) -> SyntheticScale:
+        """Entity counts times ``factor``; per-entity fan-outs, label sets and FX history stay the same."""
+        return replace(self, funds=max(1, round(self.funds * factor)), masters=max(1, round(self.masters * factor)))
+
+
+def _labels(base: list[str], n: int, prefix: str) -> list[str]:
+    return base[:n] + [f"{prefix} {i}" for i in range(len(base), n)]
+
+
+def _popular(rng: np.random.Generator, n: int, size: int) -> np.ndarray:
+    """Indexes in ``range(n)`` skewed towards the low end, like fund flows into popular masters."""
+    return np.minimum((n * rng.random(size) ** 2).astype(np.int64), n - 1)
+
+
+def _weights(rng: np.random.Generator, groups: int, per_group: int, total: float = 100.0) -> np.ndarray:
+    """``groups`` x ``per_group`` weights, each group summing to about ``total`` and sorted descending."""
+    w = rng.dirichlet(np.ones(per_group), size=groups) * total
+    return -np.sort(-w, axis=1).round(4).ravel()
+
+
+def _fx_rates(rng: np.random.Generator, days: int) -> pd.DataFrame:
+    dates = pd.bdate_range(end=AS_OF, periods=days)
+    start = {"USD": 35.0, "EUR": 38.0, "JPY": 0.24, "CNY": 4.9, "SGD": 26.0, "HKD": 4.5, "GBP": 44.0}
+    frames = []
+    for ccy in CURRENCIES:
+        walk = np.exp(np.cumsum(rng.normal(0.0, 0.004, len(dates))))
+        frames.append(
+            pd.DataFrame(
+                {
+                    "date_rate": dates,
+                    "from_ccy": ccy,
+                    "to_ccy": "THB",
+                    "rate_to_thb": (start[ccy] * walk).round(6),
+                    "source_system": "synthetic",
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_dataset(scale: SyntheticScale = SyntheticScale(), seed: int = 0) -> Dataset:
+    """Deterministic ``Dataset`` shaped like ``load_source_data`` output (before ``compact_frames``).
+
+    Feeder names carry the master ISIN in trailing parentheses for most feeders, so the bridge
+    maps them through ``ft_static``; the rest are only the master name and map by name matching,
+    and some funds without feeders map through the Thai fund ISIN fallback. The same ``scale`` and ``seed``
+    always give the same frames.
+    """
+    rng = np.random.default_rng(seed)
+    n_funds, n_masters = scale.funds, scale.masters
+    fund_codes = np.array([f"SYN{i:07d}" for i in range(n_funds)], dtype=object)
+    fund_ccy = np.where(rng.random(n_funds) < 0.8, "THB", rng.choice(CURRENCIES, n_funds)).astype(object)
+    thai_funds = pd.DataFrame(
+        {
+            "fund_code": fund_codes,
+            "full_name_th": [f"กองทุนสังเคราะห์ {i}" for i in range(n_funds)],
+            "full_name_en": [f"Synthetic Fund {i}" for i in range(n_funds)],
+            "amc": rng.choice([f"AMC {i:02d}" for i in range(25)], n_funds),
+            "category": rng.choice(["Global Equity", "Foreign Investment Allocation", "Fixed Income", "Mixed"], n_funds),
+            "currency": fund_ccy,
+            "country": "Thailand",
+        }
+    )
+
+    master_isin = np.array([f"LU{i:010d}" for i in range(n_masters)], dtype=object)
+    master_ccy = rng.choice(CURRENCIES, n_masters)
+    master_ticker = np.array([f"{isin}:{ccy}" for isin, ccy in zip(master_isin, master_ccy)], dtype=object)
+    master_name = np.array([f"Global Master Fund {i} {ccy} Acc" for i, ccy in enumerate(master_ccy)], dtype=object)
+    ft_static = pd.DataFrame(
+        {
+            "ft_ticker": master_ticker,
+            "ticker": master_ticker,
+            "name": master_name,
+            "ticker_type": rng.choice(["Fund", "Fund", "Fund", "ETF"], n_masters),
+            "isin_number": master_isin,
+            "date_scraper": AS_OF - pd.to_timedelta(rng.integers(0, 30, n_masters), unit="D"),
+            "assets_aum_full_value": rng.lognormal(20.0, 1.5, n_masters).round(2),
+        }
+    )
+
+    feeders = rng.poisson(scale.feeders_per_fund, n_funds)
+    feeder_fund = np.repeat(np.arange(n_funds), feeders)
+    feeder_master = _popular(rng, n_masters, len(feeder_fund))
+    with_token = rng.random(len(feeder_fund)) < 0.9
+    feeder_name = np.where(
+        with_token,
+        [f"{name} ({isin})" for name, isin in zip(master_name[feeder_master], master_isin[feeder_master])],
+        master_name[feeder_master],
+    )
+    share = rng.dirichlet(np.ones(max(1, feeders.max(initial=1))), size=n_funds)
+    slot = np.arange(len(feeder_fund)) - np.repeat(np.cumsum(feeders) - feeders, feeders)
+    feeder_date = AS_OF - pd.to_timedelta(rng.integers(0, 3, n_funds) * 30, unit="D")
+    thai_feeder = pd.DataFrame(
+        {
+            "fund_code": fund_codes[feeder_fund],
+            "feeder_name": feeder_name,
+            "feeder_weight_pct": (share[feeder_fund, slot] * rng.uniform(90.0, 99.5, len(feeder_fund))).round(4),
+            "as_of_date": feeder_date[feeder_fund],
+            "source_url": [f"https://example.invalid/funds/{code}" for code in fund_codes[feeder_fund]],
+        }
+    )
+
+    # Own Thai ISINs never match FT; a share of funds without feeders also lists its master's ISIN.
+    fallback = np.flatnonzero((feeders == 0) & (rng.random(n_funds) < 0.3))
+    thai_isin = pd.DataFrame(
+        {
+            "fund_code": np.concatenate([fund_codes, fund_codes[fallback]]),
+            "isin_code": np.concatenate(
+                [[f"TH{i:010d}" for i in range(n_funds)], master_isin[_popular(rng, n_masters, len(fallback))]]
+            ),
+        }
+    )
+
+    has_nav = rng.random(n_funds) < 0.98
+    thai_nav_aum = pd.DataFrame(
+        {
+            "fund_code": fund_codes[has_nav],
+            "nav_as_of_date": AS_OF - pd.to_timedelta(rng.integers(0, 5, has_nav.sum()), unit="D"),
+            "aum": np.where(rng.random(has_nav.sum()) < 0.02, np.nan, rng.lognormal(20.0, 1.8, has_nav.sum()).round(2)),
+        }
+    )
+
+    per_master = scale.holdings_per_master
+    n_stocks = max(100, n_masters * per_master // 5)
+    stock = _popular(rng, n_stocks, n_masters * per_master)
+    stock_ticker = np.array([f"STK{i:07d}" for i in range(n_stocks)], dtype=object)[stock]
+    stock_ticker[rng.random(len(stock)) < 0.05] = ""
+    ft_holdings = pd.DataFrame(
+        {
+            "ticker": np.repeat(master_ticker, per_master),
+            "holding_name": [f"Synthetic Holding {i} Corp" for i in stock],
+            "holding_ticker": stock_ticker,
+            "holding_type": rng.choice(HOLDING_TYPES, len(stock)),
+            "portfolio_weight_pct": _weights(rng, n_masters, per_master, 60.0),
+            "date_scraper": np.repeat(ft_static["date_scraper"].to_numpy(), per_master),
+        }
+    )
+
+    def allocation(labels: list[str]) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "ticker": np.repeat(master_ticker, len(labels)),
+                "category_name": np.tile(np.array(labels, dtype=object), n_masters),
+                "weight_pct": _weights(rng, n_masters, len(labels)),
+                "date_scraper": np.repeat(ft_static["date_scraper"].to_numpy(), len(labels)),
+            }
+        )
+
+    ft_sector = allocation(_labels(SECTORS, scale.sectors, "Sector"))
+    ft_region = allocation(_labels(REGIONS, scale.regions, "Region"))
+    ft_return = pd.DataFrame(
+        {
+            "ft_ticker": master_ticker,
+            "ticker": master_ticker,
+            "avg_fund_return_1y": rng.normal(6.0, 8.0, n_masters).round(4),
+            "avg_fund_return_3y": rng.normal(4.0, 5.0, n_masters).round(4),
+            "date_scraper": ft_static["date_scraper"],
+        }
+    )
+
+    return Dataset(
+        thai_funds=thai_funds,
+        thai_isin=thai_isin,
+        thai_nav_aum=thai_nav_aum,
+        thai_feeder=thai_feeder,
+        ft_static=ft_static,
+        ft_holdings=ft_holdings,
+        ft_sector=ft_sector,
+        ft_region=ft_region,
+        ft_return=ft_return,
+        fx_rates=_fx_rates(rng, scale.fx_days),
+    )
+
+
+def synthetic_api_sources(ds: Dataset, scale: SyntheticScale = SyntheticScale(), seed: int = 0) -> dict[str, pd.DataFrame]:
+    """``raw_thai_funds`` tables read by ``build_funds_api_sql``, consistent with ``ds`` (a synthetic dataset)."""
+    rng = np.random.default_rng(seed + 1)
+    funds = ds.thai_funds
+    codes = funds["fund_code"].astype(object).to_numpy()
+    n_funds = len(codes)
+
+    per_fund = scale.direct_holdings_per_fund
+    n_stocks = max(50, n_funds // 4)
+    stock = _popular(rng, n_stocks, n_funds * per_fund)
+    holding_date = AS_OF - pd.to_timedelta(rng.integers(0, 3, n_funds) * 30, unit="D")
+    direct = pd.DataFrame(
+        {
+            "fund_code": np.repeat(codes, per_fund),
+            "symbol": [f"TH{i:05d}" for i in stock],
+            "name": [f"Thai Listed Company {i} PCL TH{i:05d}" for i in stock],
+            "sector": rng.choice(SECTORS, len(stock)),
+            "percent": _weights(rng, n_funds, per_fund, 40.0),
+            "type": "Stock",
+            "as_of_date": np.repeat(holding_date, per_fund),
+        }
+    )
+    feeder = ds.thai_feeder
+    feeder_rows = pd.DataFrame(
+        {
+            "fund_code": feeder["fund_code"].astype(object).to_numpy(),
+            "symbol": None,
+            "name": feeder["feeder_name"].to_numpy(),
+            "sector": None,
+            "percent": feeder["feeder_weight_pct"].to_numpy(),
+            "type": "Fund",
+            "as_of_date": feeder["as_of_date"].to_numpy(),
+        }
+    )
+    funds_holding = pd.concat([direct, feeder_rows], ignore_index=True)
+    # Feeder funds report the holding date of their feeder rows for every holding.
+    feeder_date = feeder.drop_duplicates("fund_code").set_index("fund_code")["as_of_date"]
+    funds_holding["as_of_date"] = funds_holding["fund_code"].map(feeder_date).fillna(funds_holding["as_of_date"])
+    funds_holding["source_url"] = "https://example.invalid/funds/" + funds_holding["fund_code"]
+
+    def allocation(kind: str, labels: list[str]) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "fund_code": np.repeat(codes, len(labels)),
+                "type": kind,
+                "name": np.tile(np.array(labels, dtype=object), n_funds),
+                "percent": _weights(rng, n_funds, len(labels)),
+                "as_of_date": AS_OF,
+            }
+        )
+
+    nav = ds.thai_nav_aum
+    return {
+        "funds_master_info": funds.assign(risk_level=rng.integers(1, 9, n_funds)),
+        "funds_performance": pd.DataFrame(
+            {"fund_code": codes, "total_return_1y": rng.normal(4.0, 9.0, n_funds).round(2)}
+        ),
+        "funds_daily": pd.DataFrame(
+            {
+                "fund_code": nav["fund_code"].astype(object).to_numpy(),
+                "nav_date": pd.to_datetime(nav["nav_as_of_date"]).dt.date,
+                "aum": nav["aum"].to_numpy(),
+            }
+        ),
+        "funds_holding": funds_holding,
+        "funds_allocations": pd.concat(
+            [
+                allocation("sector_alloc", _labels(SECTORS, scale.sectors, "Sector")),
+                allocation("country_alloc", _labels(REGIONS, scale.regions, "Region")),
+            ],
+            ignore_index=True,
+        ),
+    }
+
+
+def synthetic_sources(scale: SyntheticScale = SyntheticScale(), seed: int = 0) -> dict[str, dict[str, pd.DataFrame]]:
+    """Raw source tables behind ``synthetic_dataset(scale, seed)``, keyed by database and table.
+
+    The column names are those of the current FT schema (see ``storage.write_source_tables``).
+    ``funds_daily`` holds ``scale.nav_days`` days of history per fund up to the dataset's NAV date.
+    """
+    ds = synthetic_dataset(scale, seed)
+    thai = synthetic_api_sources(ds, scale, seed)
+    rng = np.random.default_rng(seed + 2)
+
+    latest = thai["funds_daily"]
+    days = max(1, scale.nav_days)
+    back = np.tile(np.arange(days), len(latest))
+    aum = np.repeat(latest["aum"].to_numpy(dtype=float), days)
+    drift = rng.normal(0.0, 0.01, len(aum))
+    # Day 0 is the latest NAV row of the dataset; earlier days move around it.
+    aum = np.where(back == 0, aum, (np.nan_to_num(aum, nan=1e8) * (1 + drift)).round(2))
+    funds_daily = pd.DataFrame(
+        {
+            "fund_code": np.repeat(latest["fund_code"].to_numpy(), days),
+            "nav_date": pd.to_datetime(np.repeat(latest["nav_date"].to_numpy(), days)) - pd.to_timedelta(back, unit="D"),
+            "nav_value": (10.0 * (1 + drift)).round(4),
+            "aum": aum,
+            "source": "synthetic",
+        }
+    )
+
+    created = pd.Timedelta(hours=10)
+    return {
+        THAI_DB: {
+            "funds_master_info": thai["funds_master_info"],
+            "funds_codes": ds.thai_isin.rename(columns={"isin_code": "code"}).assign(type="ISIN"),
+            "funds_daily": funds_daily,
+            "funds_holding": thai["funds_holding"],
+            "funds_performance": thai["funds_performance"],
+            "funds_allocations": thai["funds_allocations"],
+        },
+        FT_DB: {
+            "ft_static_detail": ds.ft_static.assign(created_at=ds.ft_static["date_scraper"] + created),
+            "ft_holdings": ds.ft_holdings.assign(
+                allocation_type="top_10_holdings", created_at=ds.ft_holdings["date_scraper"] + created
+            ),
+            "ft_sector_allocation": ds.ft_sector.assign(ft_ticker=ds.ft_sector["ticker"], created_at=ds.ft_sector["date_scraper"] + created),
+            "ft_region_allocation": ds.ft_region.assign(ft_ticker=ds.ft_region["ticker"], created_at=ds.ft_region["date_scraper"] + created),
+            "ft_avg_fund_return": ds.ft_return.assign(created_at=ds.ft_return["date_scraper"] + created),
+        },
+        MART_DB: {FX_TABLE: ds.fx_rates},
+    }
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import os
 import re
+import sys
 
+import numpy as np
 import pandas as pd
 
 from .config import REGION_LIKE_VALUES
@@ -21,6 +24,21 @@ def to_float(series: pd.Series) -> pd.Series:
     return pd.to_numeric(series, errors="coerce")
 
 
+def clean_upper(series: pd.Series, fill: str = "") -> pd.Series:
+    """Trimmed upper-case text with missing values as ``fill``.
+
+    Categorical input is cleaned once per category and stays categorical (sorted categories).
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.fillna(fill).astype(str).str.strip().str.upper()
+    cleaned = series.cat.categories.astype(str).str.strip().str.upper()
+    categories = cleaned.append(pd.Index([fill])).unique().sort_values()
+    # Code -1 (missing) picks the appended last entry, the code of ``fill``.
+    remap = np.append(categories.get_indexer(cleaned), categories.get_loc(fill))
+    codes = remap[series.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=series.index, name=series.name)
+
+
 def is_country_label(label: str | None) -> bool:
     if not isinstance(label, str) or not label.strip():
         return False
@@ -42,3 +60,44 @@ def is_country_label(label: str | None) -> bool:
         "Other",
     ]
     return not any(tok in val for tok in bad_tokens)
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return max_rss_bytes()
+
+
+def max_rss_bytes() -> int:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - non-POSIX platforms (Windows) have no getrusage
+        return 0
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+class RssPeak:
+    """Peak resident memory over a block: sampled RSS plus growth of the process high-water mark.
+
+    The high-water mark only moves when a new process-wide peak is reached, so it catches spikes
+    between samples when queries run one at a time. With concurrent queries it is shared.
+    """
+
+    def __init__(self) -> None:
+        self.start = current_rss_bytes()
+        self.peak = self.start
+        self._max_at_start = max_rss_bytes()
+
+    def sample(self) -> None:
+        self.peak = max(self.peak, current_rss_bytes())
+
+    def finish(self) -> int:
+        self.sample()
+        high_water = max_rss_bytes()
+        if high_water > self._max_at_start:
+            self.peak = max(self.peak, high_water)
+        return self.peak
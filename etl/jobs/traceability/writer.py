@@ -1,21 +1,36 @@
 from __future__ import annotations
 
 import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import MetaData, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.types import Date
 
 from .config import FX_TABLE
+from .storage import fx_rates_table
 
+# Calendar-date columns; they are datetime64 in memory and stay DATE in the mart.
+DATE_COLUMNS = ("as_of_date", "nav_as_of_date", "fx_rate_date", "date_scraper", "snapshot_date")
 
-def write_tables(mart_engine: Engine, tables: dict[str, pd.DataFrame]) -> None:
+
+def _sql_dtypes(df: pd.DataFrame, column_types: dict | None = None) -> dict:
+    dtypes = {
+        col: Date()
+        for col in DATE_COLUMNS
+        if col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col])
+    }
+    dtypes.update({col: sql_type for col, sql_type in (column_types or {}).items() if col in df.columns})
+    return dtypes
+
+
+def write_tables(mart_engine: Engine, tables: dict[str, pd.DataFrame], column_types: dict | None = None) -> None:
+    """Replace each mart table; ``column_types`` overrides SQL types by column name (e.g. indexable VARCHARs)."""
     with mart_engine.begin() as conn:
         for name, df in tables.items():
-            df.to_sql(name, conn, if_exists="replace", index=False)
+            df.to_sql(name, conn, if_exists="replace", index=False, dtype=_sql_dtypes(df, column_types))
 
 
 def create_views(mart_engine: Engine) -> None:
-    view_sql = [
-        f"""
+    fx_ddl = f"""
         CREATE TABLE IF NOT EXISTS {FX_TABLE} (
           date_rate DATE NOT NULL,
           from_ccy VARCHAR(10) NOT NULL,
@@ -26,7 +41,8 @@ def create_views(mart_engine: Engine) -> None:
           PRIMARY KEY (date_rate, from_ccy, to_ccy),
           KEY idx_fx_from_to_date (from_ccy, to_ccy, date_rate)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """,
+        """
+    view_sql = [
         "DROP VIEW IF EXISTS vw_dashboard_cards",
         "DROP VIEW IF EXISTS vw_top_holdings",
         "DROP VIEW IF EXISTS vw_sector_allocation",
@@ -60,25 +76,27 @@ def create_views(mart_engine: Engine) -> None:
         CREATE VIEW vw_search_by_fund AS
         SELECT
             fund_code,
+            security_id,
             MIN(holding_name) AS holding_name,
-            NULLIF(holding_ticker_norm, '') AS holding_ticker,
+            NULLIF(MIN(holding_ticker_norm), '') AS holding_ticker,
             holding_type,
             SUM(true_weight_pct) AS total_true_weight_pct,
             SUM(true_value_thb) AS total_true_value_thb
         FROM fact_effective_exposure_stock
-        GROUP BY fund_code, holding_key, holding_ticker_norm, holding_type
+        GROUP BY fund_code, security_id, holding_type
         """,
         """
         CREATE VIEW vw_search_by_asset AS
         SELECT
+            security_id,
             MIN(holding_name) AS holding_name,
-            NULLIF(holding_ticker_norm, '') AS holding_ticker,
+            NULLIF(MIN(holding_ticker_norm), '') AS holding_ticker,
             holding_type,
             fund_code,
             SUM(true_weight_pct) AS total_true_weight_pct,
             SUM(true_value_thb) AS total_true_value_thb
         FROM fact_effective_exposure_stock
-        GROUP BY holding_key, holding_ticker_norm, holding_type, fund_code
+        GROUP BY security_id, holding_type, fund_code
         """,
         f"""
         CREATE VIEW vw_nav_aum_thb AS
@@ -121,6 +139,10 @@ def create_views(mart_engine: Engine) -> None:
         """,
     ]
     with mart_engine.begin() as conn:
+        if conn.dialect.name == "mysql":
+            conn.execute(text(fx_ddl))
+        else:
+            fx_rates_table(MetaData()).create(conn, checkfirst=True)
         for sql in view_sql:
             conn.execute(text(sql))
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Compare source fetch modes (buffered / stream / columnar) on one query.
+
+Usage:
+  python etl/tools/benchmark_fetch.py --uri "$GLOBAL_DB_URI" --table ft_holdings
+  python etl/tools/benchmark_fetch.py --uri "$THAI_DB_URI" --sql "SELECT * FROM funds_daily" --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.common.db import get_engine
+from etl.jobs.traceability.loaders import read_df
+
+MODES = ("buffered", "stream", "columnar")
+
+
+def bench(uri: str, sql: str, modes: list[str], repeat: int) -> int:
+    engine = get_engine(uri)
+    with engine.connect() as conn:
+        read_df(conn, sql, fetch_mode="buffered")  # warm the pool and the server cache
+
+    print(f"{'MODE':10} {'ROWS':>10} {'BEST_S':>8} {'ROWS/S':>12} {'CPU_S':>8} {'ROWS/CPU_S':>12}")
+    print("-" * 66)
+    for mode in modes:
+        best_wall = best_cpu = float("inf")
+        rows = 0
+        for _ in range(repeat):
+            with engine.connect() as conn:
+                wall, cpu = time.perf_counter(), time.process_time()
+                df = read_df(conn, sql, fetch_mode=mode)
+                best_wall = min(best_wall, time.perf_counter() - wall)
+                best_cpu = min(best_cpu, time.process_time() - cpu)
+            rows = len(df)
+            del df
+        print(
+            f"{mode:10} {rows:10d} {best_wall:8.3f} {rows / best_wall:12,.0f} "
+            f"{best_cpu:8.3f} {rows / max(best_cpu, 1e-9):12,.0f}"
+        )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark source fetch modes in rows/sec.")
+    parser.add_argument("--uri", default=os.getenv("GLOBAL_DB_URI", "mysql+pymysql://root:@127.0.0.1:3306/raw_ft"))
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--table", default="ft_holdings", help="benchmark SELECT * FROM this table")
+    group.add_argument("--sql", help="benchmark this query instead of a whole table")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated subset of " + ", ".join(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        print(f"Unknown fetch mode(s): {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    sql = args.sql or f"SELECT * FROM {args.table}"
+    return bench(args.uri, sql, modes, max(1, args.repeat))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Benchmark the traceability pipeline on synthetic data and compare against a stored baseline.
+
+Each scale runs in a fresh process: a deterministic synthetic dataset (``SyntheticScale`` times
+the factor) goes through ``build_bridge``, ``_prepare_nav_with_fx``, ``build_exposure_tables``,
+``write_tables`` (into a temporary SQLite mart) and ``build_funds_api_sql`` (reading SQLite
+copies of the Thai tables), each timed as its own stage. The best wall time and lowest peak
+RSS increase of ``--repeat`` runs are compared with the baseline; a stage slower or larger than
+the tolerances allow is a regression and the exit status is 1.
+
+Usage:
+  python etl/tools/benchmark_traceability.py                      # 1x and 10x against the baseline
+  python etl/tools/benchmark_traceability.py --scales 1,10,100    # include 100x (about 8 GB of RAM)
+  python etl/tools/benchmark_traceability.py --scales 1 --repeat 5
+  python etl/tools/benchmark_traceability.py --update-baseline    # record this machine's numbers
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.jobs.traceability.config import LOAD_COMPACT_DTYPES, PROJECT_ROOT
+
+STAGES = ("build_bridge", "prepare_nav_with_fx", "build_exposure_tables", "write_tables", "build_funds_api_sql")
+DEFAULT_BASELINE = PROJECT_ROOT / "reports" / "benchmarks" / "traceability_baseline.json"
+MB = 1024 * 1024
+
+
+def run_scale(factor: float, seed: int, profile: bool) -> dict:
+    """Worker: one pipeline run at ``factor`` x today's data; returns the run report."""
+    from etl.common.db import get_engine
+    from etl.jobs.traceability.calculations import _prepare_nav_with_fx, build_exposure_tables
+    from etl.jobs.traceability.dtypes import compact_frames
+    from etl.jobs.traceability.instrumentation import RunReport
+    from etl.jobs.traceability.mapping import build_bridge
+    from etl.jobs.traceability.models import Dataset
+    from etl.jobs.traceability.synthetic import SyntheticScale, synthetic_api_sources, synthetic_dataset
+    from etl.jobs.traceability.writer import write_tables
+    from etl.tools import build_funds_api_sql as api
+
+    scale = SyntheticScale().scaled(factor)
+    ds = synthetic_dataset(scale, seed)
+    if LOAD_COMPACT_DTYPES:
+        ds = Dataset(**compact_frames(asdict(ds)))
+    api_sources = synthetic_api_sources(ds, scale, seed)
+
+    report = RunReport(f"benchmark_traceability_x{factor:g}", profile=profile, factor=factor, seed=seed, scale=asdict(scale))
+    with tempfile.TemporaryDirectory(prefix="traceability_bench_") as tmp:
+        mart_engine = get_engine(f"sqlite:///{tmp}/fund_traceability.db")
+        write_tables(get_engine(f"sqlite:///{tmp}/raw_thai_funds.db"), api_sources)
+
+        with report.stage("build_bridge") as stage:
+            stage.count_in({name: getattr(ds, name) for name in ("thai_feeder", "ft_static", "thai_isin")})
+            bridge = build_bridge(ds)
+            stage.count_out({"bridge_thai_master": bridge})
+
+        with report.stage("prepare_nav_with_fx") as stage:
+            stage.count_in({"thai_nav_aum": ds.thai_nav_aum, "fx_rates": ds.fx_rates})
+            stage.count_out({"nav": _prepare_nav_with_fx(ds)})
+
+        with report.stage("build_exposure_tables") as stage:
+            stage.count_in(ds)
+            tables = build_exposure_tables(ds, bridge)
+            stage.count_out(tables)
+
+        with report.stage("write_tables") as stage:
+            write_tables(mart_engine, tables)
+            stage.count_out(tables)
+
+        with report.stage("build_funds_api_sql") as stage:
+            api.THAI_DB_URI = f"sqlite:///{tmp}/raw_thai_funds.db"
+            api.MART_DB_URI = f"sqlite:///{tmp}/fund_traceability.db"
+            api.OUT_SQL = Path(tmp) / "funds_API.sql"
+            stage.count_in(api_sources)
+            api_report = RunReport("build_funds_api_sql", directory=Path(tmp))
+            api._generate(api_report)
+            stage.count_out(api_report.stages[-1].rows_out)
+    report.write()
+    return report.to_dict()
+
+
+def _machine() -> dict:
+    import numpy
+    import pandas
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+    }
+
+
+def measure(factors: list[float], seed: int, repeat: int, profile: bool) -> dict[str, dict[str, dict]]:
+    """Best wall/CPU time and lowest peak RSS increase per stage over ``repeat`` runs, by scale."""
+    results: dict[str, dict[str, dict]] = {}
+    # A fresh process per run keeps the RSS high-water mark of earlier runs out of the numbers.
+    ctx = multiprocessing.get_context("spawn")
+    for factor in factors:
+        best: dict[str, dict] = {}
+        for _ in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                run = pool.submit(run_scale, factor, seed, profile).result()
+            for s in run["stages"]:
+                prev = best.setdefault(s["name"], {"wall_s": s["wall_s"], "cpu_s": s["cpu_s"], "rss_peak_delta_bytes": s["rss_peak_delta_bytes"]})
+                prev["wall_s"] = min(prev["wall_s"], s["wall_s"])
+                prev["cpu_s"] = min(prev["cpu_s"], s["cpu_s"])
+                prev["rss_peak_delta_bytes"] = min(prev["rss_peak_delta_bytes"], s["rss_peak_delta_bytes"])
+                prev["rows_out"] = sum(s["rows_out"].values())
+        results[f"{factor:g}"] = best
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float, mem_tolerance: float, min_seconds: float, min_mb: float) -> list[str]:
+    """Print current vs baseline per scale and stage; return the regressions."""
+    regressions = []
+    print(f"{'SCALE':>6} {'STAGE':22} {'WALL_S':>9} {'BASE_S':>9} {'RATIO':>6} {'RSS_MB':>9} {'BASE_MB':>9} {'ROWS_OUT':>12}")
+    print("-" * 90)
+    for scale, stages in current.items():
+        for name in STAGES:
+            cur = stages.get(name)
+            if cur is None:
+                continue
+            base = baseline.get(scale, {}).get(name)
+            flags = []
+            if base is None:
+                base_s = base_mb = ratio = "-"
+            else:
+                base_s, base_mb = f"{base['wall_s']:9.3f}", f"{base['rss_peak_delta_bytes'] / MB:9.1f}"
+                ratio = f"{cur['wall_s'] / max(base['wall_s'], 1e-9):6.2f}"
+                if cur["wall_s"] > base["wall_s"] * (1 + tolerance) and cur["wall_s"] - base["wall_s"] > min_seconds:
+                    flags.append("SLOWER")
+                rss, base_rss = cur["rss_peak_delta_bytes"], base["rss_peak_delta_bytes"]
+                if rss > base_rss * (1 + mem_tolerance) and rss - base_rss > min_mb * MB:
+                    flags.append("MORE MEMORY")
+            print(
+                f"{scale + 'x':>6} {name:22} {cur['wall_s']:9.3f} {base_s:>9} {ratio:>6} "
+                f"{cur['rss_peak_delta_bytes'] / MB:9.1f} {base_mb:>9} {cur['rows_out']:12,}  {' '.join(flags)}"
+            )
+            regressions.extend(f"{scale}x {name}: {flag.lower()}" for flag in flags)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the traceability pipeline on synthetic data at several scales.")
+    parser.add_argument("--scales", default="1,10", help="comma-separated multiples of today's data size (100 needs ~8 GB RAM)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scale; the best of them is compared")
+    parser.add_argument("--baseline", type=Path, default=Path(os.getenv("BENCHMARK_BASELINE", str(DEFAULT_BASELINE))))
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline instead of comparing")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=float(os.getenv("BENCHMARK_TOLERANCE", "0.5")),
+        help="allowed wall-time increase as a fraction of the baseline",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=float(os.getenv("BENCHMARK_MEMORY_TOLERANCE", "0.25")),
+        help="allowed peak RSS increase as a fraction of the baseline",
+    )
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--min-mb", type=float, default=16.0, help="ignore memory growth smaller than this")
+    parser.add_argument("--profile", action="store_true", help="write cProfile stats per stage next to the run reports")
+    args = parser.parse_args()
+
+    factors = [float(s) for s in args.scales.split(",") if s.strip()]
+    current = measure(factors, args.seed, max(1, args.repeat), args.profile)
+
+    if args.update_baseline:
+        stored = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+        scales = {**stored.get("scales", {}), **current}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"machine": _machine(), "seed": args.seed, "compact_dtypes": LOAD_COMPACT_DTYPES, "scales": scales}
+        args.baseline.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        compare(current, {}, args.tolerance, args.memory_tolerance, args.min_seconds, args.min_mb)
+        print(f"Baseline written: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        compare(current, {}, args.tolerance, args.memory_tolerance, args.min_seconds, args.min_mb)
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+
+    stored = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if stored.get("machine") != _machine():
+        print(f"Warning: baseline was recorded on a different machine/stack: {stored.get('machine')}")
+    if stored.get("seed") != args.seed or stored.get("compact_dtypes") != LOAD_COMPACT_DTYPES:
+        print("Warning: baseline used a different --seed or LOAD_COMPACT_DTYPES; numbers are not comparable.")
+    regressions = compare(current, stored["scales"], args.tolerance, args.memory_tolerance, args.min_seconds, args.min_mb)
+    if regressions:
+        print(f"PERFORMANCE REGRESSION ({len(regressions)}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Create SQLite stand-ins for raw_thai_funds, raw_ft and fund_traceability, filled with synthetic data.
+
+The mart build, sanity checks and funds API dump then run without a MySQL server:
+
+Usage:
+  python etl/tools/build_file_sources.py --dir .cache/file_db --scale 1
+  python etl/tools/build_file_sources.py --dir .cache/file_db --ft-schema legacy
+  eval "$(python etl/tools/build_file_sources.py --dir .cache/file_db --print-env)"
+  python etl/jobs/build_traceability_mart.py
+  python etl/tools/sanity_check_traceability.py --uri "$MART_DB_URI"
+  python etl/tools/build_funds_api_sql.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shlex
+import sys
+import time
+from pathlib import Path
+
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.jobs.traceability.config import PROJECT_ROOT
+from etl.jobs.traceability.storage import FT_SCHEMA_VARIANTS, create_file_databases, file_uris, write_source_tables
+from etl.jobs.traceability.synthetic import SyntheticScale, synthetic_sources
+
+
+def _exports(uris: dict[str, str]) -> str:
+    return "\n".join(f"export {name}={shlex.quote(uri)}" for name, uri in uris.items())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build SQLite source and mart databases from synthetic data.")
+    parser.add_argument("--dir", type=Path, default=Path(os.getenv("FILE_DB_DIR", str(PROJECT_ROOT / ".cache" / "file_db"))))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of today's data size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ft-schema", choices=FT_SCHEMA_VARIANTS, default="current", help="FT column variant to create")
+    parser.add_argument("--print-env", action="store_true", help="only print the *_DB_URI exports for existing files")
+    args = parser.parse_args()
+
+    if args.print_env:
+        print(_exports(file_uris(args.dir)))
+        return 0
+
+    started = time.perf_counter()
+    scale = SyntheticScale().scaled(args.scale)
+    uris = create_file_databases(args.dir, args.ft_schema)
+    counts = write_source_tables(args.dir, synthetic_sources(scale, args.seed))
+    for name, rows in counts.items():
+        print(f"{name:42} {rows:>12,} rows")
+    print(f"Built {args.ft_schema} schema at {args.scale:g}x in {time.perf_counter() - started:.1f}s. Point the jobs at it with:")
+    print(_exports(uris))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,9 +7,15 @@ import os
 import sys
 import urllib.request
 from datetime import UTC, date, datetime
+from pathlib import Path
 
 import pymysql
 
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.common.db import mysql_uri, raw_connection
+
 DEFAULT_API_URL = "https://open.er-api.com/v6/latest/USD"
 DEFAULT_SYMBOLS = "THB,USD,EUR,JPY,GBP,CHF,AUD,CAD,CNY,HKD,SGD"
 
@@ -124,15 +130,7 @@ def main() -> int:
     if "THB" not in symbols:
         symbols.append("THB")
 
-    conn = pymysql.connect(
-        host=args.host,
-        port=args.port,
-        user=args.user,
-        password=args.password,
-        database=args.database,
-        autocommit=False,
-        charset="utf8mb4",
-    )
+    conn = raw_connection(mysql_uri(args.host, args.port, args.user, args.password, args.database))
     try:
         ensure_table(conn, args.table)
         try:
@@ -5,9 +5,13 @@ import argparse
 import pathlib
 import sys
 
-import pymysql
 from pymysql.constants import CLIENT
 
+if __package__ is None or __package__ == "":
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+from etl.common.db import mysql_uri, raw_connection
+
 
 def statements_from_sql(path: pathlib.Path):
     with path.open("r", encoding="utf-8", errors="replace") as f:
@@ -130,15 +134,8 @@ def statements_from_sql(path: pathlib.Path):
 
 
 def import_dump(dump_file: pathlib.Path, target_db: str, host: str, port: int, user: str, password: str) -> int:
-    conn = pymysql.connect(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        autocommit=True,
-        client_flag=CLIENT.MULTI_STATEMENTS,
-        charset="utf8mb4",
-    )
+    conn = raw_connection(mysql_uri(host, port, user, password, client_flag=CLIENT.MULTI_STATEMENTS))
+    conn.autocommit(True)
 
     try:
         with conn.cursor() as cur:
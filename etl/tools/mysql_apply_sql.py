@@ -5,21 +5,18 @@ import argparse
 import pathlib
 import sys
 
-import pymysql
 from pymysql.constants import CLIENT
 
+if __package__ is None or __package__ == "":
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+from etl.common.db import mysql_uri, raw_connection
+
 
 def apply_sql(sql_file: pathlib.Path, host: str, port: int, user: str, password: str) -> None:
     sql = sql_file.read_text(encoding="utf-8")
-    conn = pymysql.connect(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        autocommit=True,
-        client_flag=CLIENT.MULTI_STATEMENTS,
-        charset="utf8mb4",
-    )
+    conn = raw_connection(mysql_uri(host, port, user, password, client_flag=CLIENT.MULTI_STATEMENTS))
+    conn.autocommit(True)
     try:
         with conn.cursor() as cur:
             cur.execute(sql)
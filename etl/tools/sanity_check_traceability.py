@@ -5,9 +5,17 @@ import argparse
 import os
 import sys
 from dataclasses import dataclass
+from pathlib import Path
 
-import pymysql
-from pymysql.cursors import DictCursor
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import URL
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import DBAPIError
+
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.common.db import get_engine, mysql_uri
 
 
 @dataclass
@@ -19,28 +27,26 @@ class Check:
     note: str
 
 
+REQUIRED_TABLES = (
+    "bridge_thai_master",
+    "fact_effective_exposure_stock",
+    "fact_effective_exposure_sector",
+    "fact_effective_exposure_region",
+    "agg_top_holdings",
+    "agg_top_holdings_topn",
+    "agg_sector_exposure",
+    "agg_sector_exposure_topn",
+    "agg_country_exposure",
+    "agg_country_exposure_topn",
+    "agg_region_exposure",
+    "agg_dashboard_cards",
+)
+
 CHECKS = [
+    # Counted from the SQLAlchemy inspector, so it works on any mart backend.
     Check(
         name="required_tables_present",
-        sql="""
-            SELECT 12 - COUNT(*) AS missing_count
-            FROM information_schema.tables
-            WHERE table_schema = %s
-              AND table_name IN (
-                'bridge_thai_master',
-                'fact_effective_exposure_stock',
-                'fact_effective_exposure_sector',
-                'fact_effective_exposure_region',
-                'agg_top_holdings',
-                'agg_top_holdings_topn',
-                'agg_sector_exposure',
-                'agg_sector_exposure_topn',
-                'agg_country_exposure',
-                'agg_country_exposure_topn',
-                'agg_region_exposure',
-                'agg_dashboard_cards'
-              )
-        """,
+        sql="",
         max_allowed=0,
         metric_label="missing_count",
         note="required mart tables exist",
@@ -129,57 +135,40 @@ CHECKS = [
 ]
 
 
-def run_checks(host: str, port: int, user: str, password: str, database: str, fx_missing_max_pct: float) -> int:
-    conn = pymysql.connect(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        database=database,
-        charset="utf8mb4",
-        cursorclass=DictCursor,
-    )
-
+def run_checks(uri: str | URL, fx_missing_max_pct: float) -> int:
     failures = []
-    try:
-        with conn.cursor() as cur:
-            print(f"Sanity checks on {database} @ {host}:{port}")
-            print("-" * 92)
-            print(f"{'CHECK':36} {'STATUS':7} {'METRIC':>14} {'THRESHOLD':>12}  NOTE")
-            print("-" * 92)
-
-            for c in CHECKS:
-                if c.name == "required_tables_present":
-                    cur.execute(c.sql, (database,))
-                else:
-                    cur.execute(c.sql)
-
-                row = cur.fetchone() or {}
-                value = float(row.get(c.metric_label, 0) or 0)
-                ok = value <= c.max_allowed
-                status = "PASS" if ok else "FAIL"
-                print(f"{c.name:36} {status:7} {value:14.4f} {c.max_allowed:12.4f}  {c.note}")
-                if not ok:
-                    failures.append((c.name, value, c.max_allowed))
-
-            # FX missing-rate alert check
-            cur.execute(
-                """
-                SELECT COUNT(*) AS c
-                FROM information_schema.views
-                WHERE table_schema = DATABASE()
-                  AND table_name = 'vw_nav_aum_thb'
-                """
-            )
-            view_exists = int((cur.fetchone() or {}).get("c", 0)) == 1
-            if not view_exists:
-                failures.append(("vw_nav_aum_thb_missing", 1.0, 0.0))
-                print(
-                    f"{'vw_nav_aum_thb_missing':36} {'FAIL':7} {1.0:14.4f} {0.0:12.4f}  "
-                    "required view for FX quality check not found"
-                )
+    with get_engine(uri).connect() as conn:
+        inspector = inspect(conn)
+        print(f"Sanity checks on {make_url(uri).render_as_string(hide_password=True)}")
+        print("-" * 92)
+        print(f"{'CHECK':36} {'STATUS':7} {'METRIC':>14} {'THRESHOLD':>12}  NOTE")
+        print("-" * 92)
+
+        for c in CHECKS:
+            if c.name == "required_tables_present":
+                present = set(inspector.get_table_names())
+                row = {c.metric_label: sum(t not in present for t in REQUIRED_TABLES)}
             else:
-                cur.execute(
+                row = conn.execute(text(c.sql)).mappings().fetchone() or {}
+
+            value = float(row.get(c.metric_label, 0) or 0)
+            ok = value <= c.max_allowed
+            status = "PASS" if ok else "FAIL"
+            print(f"{c.name:36} {status:7} {value:14.4f} {c.max_allowed:12.4f}  {c.note}")
+            if not ok:
+                failures.append((c.name, value, c.max_allowed))
+
+        # FX missing-rate alert check
+        view_exists = "vw_nav_aum_thb" in inspector.get_view_names()
+        if not view_exists:
+            failures.append(("vw_nav_aum_thb_missing", 1.0, 0.0))
+            print(
+                f"{'vw_nav_aum_thb_missing':36} {'FAIL':7} {1.0:14.4f} {0.0:12.4f}  "
+                "required view for FX quality check not found"
+            )
+        else:
+            row = conn.execute(
+                text(
                     """
                     SELECT
                       CASE WHEN COUNT(*) = 0 THEN 0
@@ -191,27 +180,26 @@ def run_checks(host: str, port: int, user: str, password: str, database: str, fx
                     FROM vw_nav_aum_thb
                     """
                 )
-                missing_fx_pct = float((cur.fetchone() or {}).get("missing_fx_pct", 0) or 0)
-                ok = missing_fx_pct <= fx_missing_max_pct
-                status = "PASS" if ok else "FAIL"
-                print(
-                    f"{'fx_missing_rate_pct':36} {status:7} {missing_fx_pct:14.4f} {fx_missing_max_pct:12.4f}  "
-                    "percent of rows using default_1_missing_fx (non-THB only)"
-                )
-                if not ok:
-                    failures.append(("fx_missing_rate_pct", missing_fx_pct, fx_missing_max_pct))
+            ).mappings().fetchone()
+            missing_fx_pct = float((row or {}).get("missing_fx_pct", 0) or 0)
+            ok = missing_fx_pct <= fx_missing_max_pct
+            status = "PASS" if ok else "FAIL"
+            print(
+                f"{'fx_missing_rate_pct':36} {status:7} {missing_fx_pct:14.4f} {fx_missing_max_pct:12.4f}  "
+                "percent of rows using default_1_missing_fx (non-THB only)"
+            )
+            if not ok:
+                failures.append(("fx_missing_rate_pct", missing_fx_pct, fx_missing_max_pct))
 
-            print("-" * 92)
-            if failures:
-                print("RESULT: FAIL")
-                for name, value, max_allowed in failures:
-                    print(f"  - {name}: {value:.4f} > {max_allowed:.4f}")
-                return 1
+    print("-" * 92)
+    if failures:
+        print("RESULT: FAIL")
+        for name, value, max_allowed in failures:
+            print(f"  - {name}: {value:.4f} > {max_allowed:.4f}")
+        return 1
 
-            print("RESULT: PASS")
-            return 0
-    finally:
-        conn.close()
+    print("RESULT: PASS")
+    return 0
 
 
 def main() -> int:
@@ -221,6 +209,7 @@ def main() -> int:
     parser.add_argument("--user", default=os.getenv("MART_DB_USER", "root"))
     parser.add_argument("--password", default=os.getenv("MART_DB_PASSWORD", ""))
     parser.add_argument("--database", default=os.getenv("MART_DB_NAME", "fund_traceability"))
+    parser.add_argument("--uri", help="mart SQLAlchemy URI (e.g. a SQLite file); overrides --host/--port/--user/--password/--database")
     parser.add_argument(
         "--fx-missing-max-pct",
         type=float,
@@ -229,9 +218,10 @@ def main() -> int:
     )
     args = parser.parse_args()
 
+    uri = args.uri or mysql_uri(args.host, args.port, args.user, args.password, args.database)
     try:
-        return run_checks(args.host, args.port, args.user, args.password, args.database, args.fx_missing_max_pct)
-    except pymysql.MySQLError as exc:
+        return run_checks(uri, args.fx_missing_max_pct)
+    except DBAPIError as exc:
         print(f"DB error: {exc}", file=sys.stderr)
         return 2
 
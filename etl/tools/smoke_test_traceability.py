@@ -6,9 +6,15 @@ import subprocess
 import sys
 from pathlib import Path
 
-import pymysql
-from pymysql.cursors import DictCursor
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import DBAPIError
 
+if __package__ is None or __package__ == "":
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from etl.common.db import get_engine, mysql_uri
 
 ROOT = Path(__file__).resolve().parents[2]
 
@@ -20,17 +26,7 @@ def run_build(python_bin: str) -> None:
         raise RuntimeError(f"Build failed with code {proc.returncode}")
 
 
-def check_row_counts(host: str, port: int, user: str, password: str, database: str) -> int:
-    conn = pymysql.connect(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        database=database,
-        charset="utf8mb4",
-        cursorclass=DictCursor,
-    )
-
+def check_row_counts(uri: str | URL) -> int:
     checks = [
         ("bridge_thai_master", 1),
         ("fact_effective_exposure_stock", 1),
@@ -41,33 +37,29 @@ def check_row_counts(host: str, port: int, user: str, password: str, database: s
     ]
 
     failures = []
-    try:
-        with conn.cursor() as cur:
-            print(f"Smoke test row-count checks on {database} @ {host}:{port}")
-            print("-" * 72)
-            print(f"{'TABLE':36} {'ROWS':>12} {'MIN_EXPECTED':>12}  STATUS")
-            print("-" * 72)
-
-            for table, min_rows in checks:
-                cur.execute(f"SELECT COUNT(*) AS c FROM `{table}`")
-                rows = int((cur.fetchone() or {}).get("c", 0))
-                ok = rows >= min_rows
-                status = "PASS" if ok else "FAIL"
-                print(f"{table:36} {rows:12d} {min_rows:12d}  {status}")
-                if not ok:
-                    failures.append((table, rows, min_rows))
-
-            print("-" * 72)
-            if failures:
-                print("RESULT: FAIL")
-                for table, rows, min_rows in failures:
-                    print(f"  - {table}: rows={rows}, expected>={min_rows}")
-                return 1
-
-            print("RESULT: PASS")
-            return 0
-    finally:
-        conn.close()
+    with get_engine(uri).connect() as conn:
+        print(f"Smoke test row-count checks on {make_url(uri).render_as_string(hide_password=True)}")
+        print("-" * 72)
+        print(f"{'TABLE':36} {'ROWS':>12} {'MIN_EXPECTED':>12}  STATUS")
+        print("-" * 72)
+
+        for table, min_rows in checks:
+            rows = int(conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() or 0)
+            ok = rows >= min_rows
+            status = "PASS" if ok else "FAIL"
+            print(f"{table:36} {rows:12d} {min_rows:12d}  {status}")
+            if not ok:
+                failures.append((table, rows, min_rows))
+
+    print("-" * 72)
+    if failures:
+        print("RESULT: FAIL")
+        for table, rows, min_rows in failures:
+            print(f"  - {table}: rows={rows}, expected>={min_rows}")
+        return 1
+
+    print("RESULT: PASS")
+    return 0
 
 
 def main() -> int:
@@ -77,6 +69,7 @@ def main() -> int:
     parser.add_argument("--user", default="root")
     parser.add_argument("--password", default="")
     parser.add_argument("--database", default="fund_traceability")
+    parser.add_argument("--uri", help="mart SQLAlchemy URI (e.g. a SQLite file); overrides --host/--port/--user/--password/--database")
     parser.add_argument("--python", dest="python_bin", default=sys.executable)
     parser.add_argument("--skip-build", action="store_true", help="skip build step and only verify row counts")
     args = parser.parse_args()
@@ -84,8 +77,8 @@ def main() -> int:
     try:
         if not args.skip_build:
             run_build(args.python_bin)
-        return check_row_counts(args.host, args.port, args.user, args.password, args.database)
-    except pymysql.MySQLError as exc:
+        return check_row_counts(args.uri or mysql_uri(args.host, args.port, args.user, args.password, args.database))
+    except DBAPIError as exc:
         print(f"DB error: {exc}", file=sys.stderr)
         return 2
     except Exception as exc:
@@ -200,6 +200,7 @@ CREATE TABLE IF NOT EXISTS fact_effective_exposure_stock (
   nav_as_of_date DATE,
   date_scraper DATE,
   holding_key VARCHAR(256),
+  lookthrough_depth TINYINT NOT NULL DEFAULT 1,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   KEY idx_fact_stock_fund (fund_code),
   KEY idx_fact_stock_symbol (holding_ticker_norm),